@@ -0,0 +1,76 @@
+import argparse, random, shlex, subprocess, sys, time
+from pathlib import Path
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from acslib import fingerprint
+
+# run_all.sh's default sizes
+SIZES = [16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864]
+
+def spec_lines(kernels, dtypes, sizes, strides, extra):
+    # dtype outermost: bench refills its shared buffer only when the dtype changes
+    return [f"--kernel {k} --dtype {t} --N {n} --stride {s}{' ' + extra if extra else ''}"
+            for t in dtypes for k in kernels for n in sizes for s in strides]
+
+def row_count(csv):
+    return len(pd.read_csv(csv)) if csv.exists() else 0
+
+def main():
+    ap = argparse.ArgumentParser(description="Run a whole bench.cpp sweep in one process per binary (bench --batch)")
+    ap.add_argument("--bins", nargs="+", default=["./bench_scalar", "./bench_simd"])
+    ap.add_argument("--kernel", nargs="+", default=["saxpy", "mul", "stencil3"])
+    ap.add_argument("--dtype", nargs="+", default=["f32", "f64"], choices=["f32", "f64"])
+    ap.add_argument("--N", nargs="+", type=int, default=SIZES)
+    ap.add_argument("--stride", nargs="+", type=int, default=[1])
+    ap.add_argument("--extra", default="", help='More bench flags for every point, e.g. "--variant omp --threads 4"')
+    ap.add_argument("--reps", type=int, default=5)
+    ap.add_argument("--warmup", type=int, default=2)
+    ap.add_argument("--between", choices=["warm", "flush"], default="warm",
+                    help="Before each point, warm the caches with its buffers or flush them (and the TLB)")
+    ap.add_argument("--flush-mb", type=int, default=64, help="Scratch buffer walked by --between flush")
+    ap.add_argument("--shuffle", type=int, metavar="SEED",
+                    help="Run the points in a random order (spreads drift over the sweep instead of along N)")
+    ap.add_argument("--spec", help="Only write the spec to this file (- for stdout) and exit")
+    ap.add_argument("--csv", default="results/default_results.csv")
+    ap.add_argument("--samples", help="Also keep every timed rep here")
+    args = ap.parse_args()
+
+    lines = spec_lines(args.kernel, args.dtype, args.N, args.stride, args.extra)
+    if args.shuffle is not None:
+        random.Random(args.shuffle).shuffle(lines)
+    if args.spec:
+        text = "\n".join(lines) + "\n"
+        if args.spec == "-":
+            sys.stdout.write(text)
+        else:
+            Path(args.spec).write_text(text)
+        return
+
+    out_csv = Path(args.csv)
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    fingerprint.write_sidecar(out_csv.parent)
+
+    new = []
+    for b in args.bins:
+        before = row_count(out_csv)
+        cmd = [b, "--batch", "-", "--reps", str(args.reps), "--warmup", str(args.warmup),
+               "--between", args.between, "--flush-mb", str(args.flush_mb), "--csv", str(out_csv)]
+        if args.samples:
+            cmd += ["--samples", args.samples]
+        print(f"== {shlex.join(cmd)} ({len(lines)} points)")
+        t0 = time.time()
+        subprocess.run(cmd, input="\n".join(lines) + "\n", text=True, check=True)
+        print(f"   {time.time() - t0:.1f} s")
+        new.append(pd.read_csv(out_csv).iloc[before:])
+
+    df = pd.concat(new, ignore_index=True)
+    table = df.pivot_table(index=["kernel", "dtype", "N"], columns="variant", values="gflops", aggfunc="median")
+    if "scalar" in table and "simd" in table:
+        table["speedup"] = table["simd"] / table["scalar"]  # = time(scalar) / time(simd)
+    print("GFLOP/s")
+    print(table.round(3).to_string())
+    print(f"{len(df)} rows appended to {out_csv}")
+
+if __name__ == "__main__":
+    main()
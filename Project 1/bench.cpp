@@ -12,7 +12,15 @@
 #include <limits>
 #include <cstdlib>
 #include <cstring>
+#include <algorithm>
+#include <iterator>
 #include "kernels.hpp"
+#if defined(__x86_64__) || defined(__i386__)
+#include <pmmintrin.h> // _MM_SET_DENORMALS_ZERO_MODE (pulls in xmmintrin.h for FTZ)
+#endif
+#ifdef _OPENMP
+#include <omp.h>
+#endif
 
 using clk = std::chrono::high_resolution_clock;
 using ns  = std::chrono::nanoseconds;
@@ -20,7 +28,7 @@ using ns  = std::chrono::nanoseconds;
 
 
 struct Cmd {
-    std::string kernel = "saxpy"; // saxpy,dot,mul,stencil3
+    std::string kernel = "saxpy"; // saxpy,dot,mul,stencil3,peak
     std::string dtype  = "f32";   // f32,f64
     size_t N = 1<<20;
     size_t reps = 3;
@@ -31,14 +39,25 @@ struct Cmd {
     bool   flush_to_zero = false; // set FTZ/DAZ (x86 only via MXCSR), best-effort
     unsigned seed = 12345;
     std::string csv_path = "results/default_results.csv";
+    std::string samples_path;     // optional: one row per timed rep (raw samples)
+    // scalar/simd: the single-threaded loops, named after how the binary was built
+    // (empty: taken from the executable name, bench_scalar / bench_simd);
+    // omp: OpenMP loops; blocked: temporally blocked stencil3 (OpenMP over tiles)
+    std::string variant;
+    int    threads = 0;           // omp/blocked team size (0: OMP_NUM_THREADS / all CPUs)
+    int    sweeps = 1;            // stencil3: sweeps per timed run, each over the previous output
+    size_t tile = 8192;           // blocked: elements per cache tile
+    // --batch SPEC: run every configuration listed in SPEC (see run_batch)
+    std::string batch_path;
+    std::string between = "warm"; // batch: warm | flush the caches before each point
+    size_t flush_mb = 64;         // batch: scratch buffer walked by --between flush
 };
 
 static inline void set_ftz_daz(bool enable) {
 #if defined(__x86_64__) || defined(__i386__)
-    if (!enable) return;
-    #include <xmmintrin.h>
-    _MM_SET_FLUSH_ZERO_MODE(_MM_FLUSH_ZERO_ON);
-    _MM_SET_DENORMALS_ZERO_MODE(_MM_DENORMALS_ZERO_ON);
+    // set both ways: a batch may mix --ftz and non-ftz points in one process
+    _MM_SET_FLUSH_ZERO_MODE(enable ? _MM_FLUSH_ZERO_ON : _MM_FLUSH_ZERO_OFF);
+    _MM_SET_DENORMALS_ZERO_MODE(enable ? _MM_DENORMALS_ZERO_ON : _MM_DENORMALS_ZERO_OFF);
 #else
     (void)enable;
 #endif
@@ -62,33 +81,65 @@ struct Buffers {
     void* base; // for freeing if needed
 };
 
-template<class T>
-Buffers<T> make_buffers(size_t N, size_t align, size_t misalign) {
-    size_t bytes = sizeof(T) * N * 2 + sizeof(T) * N; // x,y,z
+static void* alloc_raw(size_t bytes, size_t align) {
     void* raw = nullptr;
 #if defined(_MSC_VER)
-    raw = _aligned_malloc(bytes + align + misalign, align);
+    raw = _aligned_malloc(bytes, align);
     if (!raw) throw std::bad_alloc();
-    char* p = reinterpret_cast<char*>(raw) + misalign;
 #else
-    if (posix_memalign(&raw, align, bytes + align + misalign)) throw std::bad_alloc();
-    char* p = reinterpret_cast<char*>(raw) + misalign;
+    if (posix_memalign(&raw, align, bytes)) throw std::bad_alloc();
+#endif
+    return raw;
+}
+
+static void free_raw(void* raw) {
+#if defined(_MSC_VER)
+    _aligned_free(raw);
+#else
+    free(raw);
 #endif
-    T* x = reinterpret_cast<T*>(p);
+}
+
+static size_t buffers_bytes(size_t N, size_t elem, size_t align, size_t misalign) {
+    return elem * N * 3 + align + misalign; // x,y,z
+}
+
+// x, y, z of N elements each, back to back from `misalign` bytes past raw
+template<class T>
+Buffers<T> carve_buffers(void* raw, size_t N, size_t misalign) {
+    T* x = reinterpret_cast<T*>(reinterpret_cast<char*>(raw) + misalign);
     T* y = x + N;
     T* z = y + N;
     return Buffers<T>{x,y,z,raw};
 }
 
+template<class T>
+Buffers<T> make_buffers(size_t N, size_t align, size_t misalign) {
+    return carve_buffers<T>(alloc_raw(buffers_bytes(N, sizeof(T), align, misalign), align), N, misalign);
+}
+
+// splitmix64's output function: element i gets mix64(seed + i*golden), so the fill has no
+// serial dependency and vectorizes/parallelizes (mt19937 + uniform_real_distribution did not)
+static inline uint64_t mix64(uint64_t z) {
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ull;
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EBull;
+    return z ^ (z >> 31);
+}
+
+template<class T>
+void fill_uniform(T* p, size_t n, uint64_t seed) {
+    // [1, 2): avoid zeros/denormals. Parallel, so an OpenMP build first-touches pages
+    // on the threads that will use them
+    #pragma omp parallel for schedule(static)
+    for (size_t i=0;i<n;i++)
+        p[i] = static_cast<T>(1.0 + double(mix64(seed + (i+1)*0x9E3779B97F4A7C15ull) >> 11) * 0x1.0p-53);
+}
+
 template<class T>
 void init_data(Buffers<T>& B, size_t N, unsigned seed) {
-    std::mt19937 rng(seed);
-    std::uniform_real_distribution<double> dist(1.0, 2.0); // avoid zeros/denormals
-    for (size_t i=0;i<N;i++) {
-        B.x[i] = static_cast<T>(dist(rng));
-        B.y[i] = static_cast<T>(dist(rng));
-        B.z[i] = T(0);
-    }
+    fill_uniform(B.x, N, seed);
+    fill_uniform(B.y, N, uint64_t(seed) << 32 | 1);
+    std::fill(B.z, B.z + N, T(0));
 }
 
 struct Stats {
@@ -105,7 +156,7 @@ static double env_cpu_ghz() {
 }
 
 template<class F>
-Stats time_kernel(size_t reps, size_t N, double flops_per_elem, F&& f) {
+Stats time_kernel(size_t reps, size_t N, double flops_per_elem, F&& f, std::vector<double>* samples = nullptr) {
     // warmups inside caller
     double best_ms = 1e300;
     for (size_t r=0; r<reps; ++r) {
@@ -114,6 +165,7 @@ Stats time_kernel(size_t reps, size_t N, double flops_per_elem, F&& f) {
         auto t1 = clk::now();
         double ms = std::chrono::duration<double, std::milli>(t1-t0).count();
         best_ms = std::min(best_ms, ms);
+        if (samples) samples->push_back(ms);
     }
     double gflops = (N * flops_per_elem) / (best_ms * 1e-3) / 1e9;
     double ghz = env_cpu_ghz();
@@ -128,32 +180,78 @@ Stats time_kernel(size_t reps, size_t N, double flops_per_elem, F&& f) {
 }
 
 static void ensure_dir(const std::string& path) {
-    std::filesystem::create_directories(std::filesystem::path(path).parent_path());
+    auto dir = std::filesystem::path(path).parent_path();
+    if (!dir.empty()) std::filesystem::create_directories(dir);
 }
 
-static void write_csv_header_if_new(const std::string& path) {
-    if (std::filesystem::exists(path)) return;
-    ensure_dir(path);
-    std::ofstream f(path);
-    f << "timestamp,kernel,dtype,N,stride,misalign,variant,time_ms,gflops,cpe\n";
+// One CSV row as (column, value) pairs
+using Row = std::vector<std::pair<std::string, std::string>>;
+
+static std::string fmt6(double v) {
+    std::ostringstream o;
+    o << std::fixed << std::setprecision(6) << v;
+    return o.str();
 }
 
-static void append_csv(const std::string& path, const std::string& kernel, const std::string& dtype,
-                       size_t N, size_t stride, size_t misalign, const std::string& variant,
-                       const Stats& S) {
-    std::ofstream f(path, std::ios::app);
+static std::string timestamp() {
     auto now = std::chrono::system_clock::to_time_t(std::chrono::system_clock::now());
-    f << std::put_time(std::localtime(&now), "%F %T") << ","
-      << kernel << "," << dtype << "," << N << "," << stride << "," << misalign << ","
-      << variant << "," << std::fixed << std::setprecision(6) << S.time_ms << ","
-      << S.gflops << "," << S.cpe << "\n";
+    std::ostringstream o;
+    o << std::put_time(std::localtime(&now), "%F %T");
+    return o.str();
+}
+
+// Append rows in the file's own column order. An existing file keeps its header (it may
+// predate threads/sweeps/tile, or carry counter columns added by acslib.perfctr); columns
+// it lacks are added at the end of the header, so its older, shorter rows still line up.
+static void append_rows(const std::string& path, const std::vector<Row>& rows) {
+    std::vector<std::string> header;
+    std::ifstream in;
+    if (std::filesystem::exists(path)) {
+        in.open(path);
+        std::string first, col;
+        std::getline(in, first);
+        if (!first.empty() && first.back() == '\r') first.pop_back();
+        std::stringstream ss(first);
+        while (std::getline(ss, col, ',')) header.push_back(col);
+    } else {
+        ensure_dir(path);
+    }
+    bool grown = false;
+    for (const auto& kv : rows.front()) {
+        if (std::find(header.begin(), header.end(), kv.first) == header.end()) {
+            header.push_back(kv.first);
+            grown = true;
+        }
+    }
+    std::ofstream f;
+    if (grown) {
+        // only a new or widened header rewrites the file
+        std::string body;
+        if (in.is_open()) {
+            std::ostringstream rest;
+            rest << in.rdbuf();
+            body = rest.str();
+        }
+        in.close();
+        f.open(path, std::ios::trunc);
+        for (size_t i=0; i<header.size(); ++i) f << (i ? "," : "") << header[i];
+        f << "\n" << body;
+    } else {
+        f.open(path, std::ios::app);
+    }
+    for (const auto& row : rows) {
+        for (size_t i=0; i<header.size(); ++i) {
+            auto it = std::find_if(row.begin(), row.end(), [&](const auto& kv){ return kv.first == header[i]; });
+            f << (i ? "," : "") << (it != row.end() ? it->second : "");
+        }
+        f << "\n";
+    }
 }
 
-static Cmd parse(int argc, char** argv) {
-    Cmd c;
-    for (int i=1;i<argc;i++) {
-        std::string a = argv[i];
-        auto next = [&](const char* flag){ if (i+1>=argc) { fprintf(stderr,"Missing value for %s\n",flag); std::exit(1);} return std::string(argv[++i]); };
+static Cmd parse(const std::vector<std::string>& args, Cmd c, const std::string& where) {
+    for (size_t i=0;i<args.size();i++) {
+        const std::string& a = args[i];
+        auto next = [&](const char* flag){ if (i+1>=args.size()) { fprintf(stderr,"%sMissing value for %s\n",where.c_str(),flag); std::exit(1);} return args[++i]; };
         if (a=="--kernel") c.kernel = next("--kernel");
         else if (a=="--dtype") c.dtype = next("--dtype");
         else if (a=="--N") c.N = std::stoull(next("--N"));
@@ -163,77 +261,278 @@ static Cmd parse(int argc, char** argv) {
         else if (a=="--align") c.align_bytes = std::stoull(next("--align"));
         else if (a=="--misalign") c.misalign = std::stoull(next("--misalign"));
         else if (a=="--csv") c.csv_path = next("--csv");
+        else if (a=="--samples") c.samples_path = next("--samples");
         else if (a=="--seed") c.seed = std::stoul(next("--seed"));
         else if (a=="--ftz") c.flush_to_zero = true;
+        else if (a=="--variant") c.variant = next("--variant");
+        else if (a=="--threads") c.threads = std::stoi(next("--threads"));
+        else if (a=="--sweeps") c.sweeps = std::stoi(next("--sweeps"));
+        else if (a=="--tile") c.tile = std::stoull(next("--tile"));
+        else if (a=="--batch" && where.empty()) c.batch_path = next("--batch");
+        else if (a=="--between" && where.empty()) c.between = next("--between");
+        else if (a=="--flush-mb" && where.empty()) c.flush_mb = std::stoull(next("--flush-mb"));
         else {
-            fprintf(stderr, "Unknown arg: %s\n", a.c_str());
+            fprintf(stderr, "%sUnknown arg: %s\n", where.c_str(), a.c_str());
             std::exit(1);
         }
     }
     return c;
 }
 
+// Fills in the variant and returns what is wrong with a configuration ("" if nothing)
+static std::string check(Cmd& c, const std::string& exe) {
+    // Without --variant, fall back to the binary's name (bench_scalar is built with
+    // vectorization disabled; there is no portable way to tell at run time)
+    if (c.variant.empty())
+        c.variant = (exe.find("scalar")!=std::string::npos) ? "scalar" : "simd";
+    const bool parallel = c.variant=="omp" || c.variant=="blocked";
+    if (c.kernel!="saxpy" && c.kernel!="dot" && c.kernel!="mul" && c.kernel!="stencil3" && c.kernel!="peak")
+        return "Unknown kernel";
+    if (c.dtype!="f32" && c.dtype!="f64")
+        return "--dtype must be f32 or f64";
+    if (!parallel && c.variant!="scalar" && c.variant!="simd")
+        return "--variant must be scalar, simd, omp or blocked";
+    if (!parallel && c.threads > 1)
+        return "--threads needs --variant omp or blocked";
+    if (parallel && c.kernel=="peak")
+        return "--kernel peak has no omp/blocked variant (it runs on one thread)";
+    if (c.sweeps < 1 || (c.sweeps > 1 && c.kernel!="stencil3"))
+        return "--sweeps applies to stencil3 only (and must be >= 1)";
+    if (c.variant=="blocked" && (c.kernel!="stencil3" || c.stride!=1 || c.tile==0))
+        return "--variant blocked is stencil3 at unit stride with --tile > 0";
+    if (c.sweeps > 1 && c.stride!=1)
+        return "--sweeps > 1 needs unit stride";
+#ifndef _OPENMP
+    if (parallel) return "--variant omp/blocked needs a build with -fopenmp";
+#endif
+    return "";
+}
+
+// Time one configuration on buffers of c.N * c.stride + 8 elements each; its summary row
+// goes to rows, its per-rep rows (if c.samples_path is set) to samples
 template<class T>
-int run_typed(const Cmd& c, const std::string& variant) {
+void measure(const Cmd& c, Buffers<T>& B, std::vector<Row>& rows, std::vector<Row>& samples_out) {
+    const bool parallel = c.variant=="omp" || c.variant=="blocked";
     set_ftz_daz(c.flush_to_zero);
-    auto B = make_buffers<T>(c.N * c.stride + 8, c.align_bytes, c.misalign); // room for stride
-    init_data(B, c.N * c.stride + 8, c.seed);
     T a = T(1.111), b = T(2.222), cc = T(0.333);
-
-    // warmup
-    for (size_t w=0; w<c.warmup; ++w) {
-        if (c.kernel=="saxpy")      kernel_saxpy<T>(c.N, a, B.x, B.y, c.stride);
-        else if (c.kernel=="dot") {
-            volatile T sink = B.y[0];  // keep y in use
-                if (c.kernel == "dot") {
-                    // capture the dot result and use it
-                    sink += kernel_dot<T>(c.N, B.x, B.y, c.stride);
-                }
-            (void)sink;
-        }
-        else if (c.kernel=="mul")   kernel_mul<T>(c.N, B.x, B.y, B.z, c.stride);
-        else if (c.kernel=="stencil3") kernel_stencil3<T>(c.N, a,b,cc, B.x, B.y, c.stride);
+    if (c.sweeps > 1) {
+        // Repeated sweeps would grow like (a+b+c)^sweeps; keep the stencil weights summing to 1
+        a = T(0.25); b = T(0.5); cc = T(0.25);
     }
 
     double flops_elem = 0.0;
     if (c.kernel=="saxpy") flops_elem = flops_per_elem_saxpy();
     else if (c.kernel=="dot") flops_elem = flops_per_elem_dot();
     else if (c.kernel=="mul") flops_elem = flops_per_elem_mul();
-    else if (c.kernel=="stencil3") flops_elem = flops_per_elem_stencil3();
-    else { fprintf(stderr,"Unknown kernel\n"); return 1; }
-
-    Stats S = time_kernel(c.reps, c.N, flops_elem, [&](){
-        if (c.kernel=="saxpy")      kernel_saxpy<T>(c.N, a, B.x, B.y, c.stride);
-        else if (c.kernel=="dot")   (void)kernel_dot<T>(c.N, B.x, B.y, c.stride);
-        else if (c.kernel=="mul")   kernel_mul<T>(c.N, B.x, B.y, B.z, c.stride);
-        else if (c.kernel=="stencil3") kernel_stencil3<T>(c.N, a,b,cc, B.x, B.y, c.stride);
-    });
-
-    write_csv_header_if_new(c.csv_path);
-    append_csv(c.csv_path, c.kernel, (sizeof(T)==4?"f32":"f64"), c.N, c.stride, c.misalign, variant, S);
+    else if (c.kernel=="stencil3") flops_elem = flops_per_elem_stencil3() * c.sweeps;
+    else if (c.kernel=="peak") flops_elem = flops_per_elem_peak();
+
+    volatile T sink = T(0);  // keeps the dot result live
+    auto run_once = [&]() {
+        if (c.kernel=="saxpy") {
+            if (parallel) kernel_saxpy_omp<T>(c.N, a, B.x, B.y, c.stride);
+            else          kernel_saxpy<T>(c.N, a, B.x, B.y, c.stride);
+        } else if (c.kernel=="dot") {
+            sink = parallel ? kernel_dot_omp<T>(c.N, B.x, B.y, c.stride) : kernel_dot<T>(c.N, B.x, B.y, c.stride);
+        } else if (c.kernel=="mul") {
+            if (parallel) kernel_mul_omp<T>(c.N, B.x, B.y, B.z, c.stride);
+            else          kernel_mul<T>(c.N, B.x, B.y, B.z, c.stride);
+        } else if (c.kernel=="stencil3") {
+            if (c.variant=="blocked")  kernel_stencil3_blocked<T>(c.N, a,b,cc, B.x, B.y, c.sweeps, c.tile);
+            else if (c.sweeps > 1)     kernel_stencil3_sweeps<T>(c.N, a,b,cc, B.x, B.y, B.z, c.sweeps, parallel);
+            else if (parallel)         kernel_stencil3_omp<T>(c.N, a,b,cc, B.x, B.y, c.stride);
+            else                       kernel_stencil3<T>(c.N, a,b,cc, B.x, B.y, c.stride);
+        } else if (c.kernel=="peak") {
+            kernel_peak<T>(c.N, cc, b, B.y, c.stride);
+        }
+    };
+
+    for (size_t w=0; w<c.warmup; ++w) run_once();
+    std::vector<double> samples;
+    Stats S = time_kernel(c.reps, c.N, flops_elem, run_once, c.samples_path.empty() ? nullptr : &samples);
     // minimal correctness check so compilers don't DCE the loops
-    volatile T sink = B.y[0] + (sizeof(T)==4? T(0.5f):T(0.5));
+    sink = sink + B.y[0] + (sizeof(T)==4? T(0.5f):T(0.5));
     (void)sink;
-#if defined(_MSC_VER)
-    _aligned_free(B.base);
+
+    int threads = 1;
+#ifdef _OPENMP
+    if (parallel) threads = omp_get_max_threads();
+#endif
+    const std::string ts = timestamp();
+    Row cfg = {{"timestamp", ts}, {"kernel", c.kernel}, {"dtype", c.dtype}, {"N", std::to_string(c.N)},
+               {"stride", std::to_string(c.stride)}, {"misalign", std::to_string(c.misalign)},
+               {"variant", c.variant}};
+    Row extra = {{"threads", std::to_string(threads)}, {"sweeps", std::to_string(c.sweeps)},
+                 {"tile", std::to_string(c.variant=="blocked" ? c.tile : 0)}};
+
+    Row row = cfg;
+    row.insert(row.end(), {{"time_ms", fmt6(S.time_ms)}, {"gflops", fmt6(S.gflops)}, {"cpe", fmt6(S.cpe)}});
+    row.insert(row.end(), extra.begin(), extra.end());
+    rows.push_back(row);
+    for (size_t r=0; r<samples.size(); ++r) {
+        Row s = cfg;
+        s.insert(s.end(), {{"rep", std::to_string(r)}, {"time_ms", fmt6(samples[r])},
+                           {"gflops", fmt6((c.N * flops_elem) / (samples[r] * 1e-3) / 1e9)}});
+        s.insert(s.end(), extra.begin(), extra.end());
+        samples_out.push_back(s);
+    }
+}
+
+static void set_threads(const Cmd& c, int default_threads) {
+#ifdef _OPENMP
+    omp_set_num_threads(c.threads > 0 ? c.threads : default_threads);
 #else
-    free(B.base);
+    (void)c; (void)default_threads;
 #endif
+}
+
+template<class T>
+int run_typed(const Cmd& c) {
+    const size_t len = c.N * c.stride + 8; // room for stride
+    auto B = make_buffers<T>(len, c.align_bytes, c.misalign);
+    init_data(B, len, c.seed);
+    std::vector<Row> rows, samples;
+    measure(c, B, rows, samples);
+    append_rows(c.csv_path, rows);
+    if (!c.samples_path.empty()) append_rows(c.samples_path, samples);
+    free_raw(B.base);
     return 0;
 }
 
-int main(int argc, char** argv) {
-    Cmd c = parse(argc, argv);
+// ---- Batch mode ---------------------------------------------------------------------
+// bench --batch SPEC [flags]: SPEC (a file, or - for stdin) lists one configuration per
+// line as bench flags (--kernel mul --dtype f64 --N 1048576 ...; blank lines and # comments
+// are skipped), and the flags on the command line are every line's defaults. All points
+// share one allocation: x, y and z each get a fixed slot sized for the largest point (so a
+// point never reads another point's outputs as its x), filled once per dtype/misalign
+// change rather than once per point, and rows are written in bulk. Before each point's warmups the caches
+// are either warmed with its own buffers (--between warm: the state init_data leaves a
+// single run in) or flushed, TLB included, by walking a --flush-mb scratch buffer
+// (--between flush). x is only ever read, and y/z hold the previous point's outputs, which
+// stay small and finite, so points can run on them without re-filling.
+
+static volatile double batch_sink;
+
+// Read one byte per cache line (warm) or write one per line (flush scratch)
+static void touch(char* p, size_t bytes, bool write) {
+    double s = 0;
+    for (size_t i=0; i<bytes; i+=64) {
+        if (write) p[i] = char(p[i] + 1);
+        else       s += p[i];
+    }
+    batch_sink = s;
+}
 
-    // Detect variant by compilation flag hack: if -fno-tree-vectorize used, we name it "scalar"
-#if defined(__clang__) || defined(__GNUC__)
-    #if defined(__OPTIMIZE__)
-        // We can't detect -fno-tree-vectorize reliably at runtime; rely on binary name.
-    #endif
+static std::vector<std::pair<std::string, Cmd>> read_spec(const Cmd& base) {
+    std::ifstream file;
+    if (base.batch_path != "-") {
+        file.open(base.batch_path);
+        if (!file) { fprintf(stderr, "Cannot open %s\n", base.batch_path.c_str()); std::exit(1); }
+    }
+    std::istream& in = base.batch_path == "-" ? std::cin : file;
+    Cmd defaults = base;
+    defaults.batch_path.clear();
+    std::vector<std::pair<std::string, Cmd>> points;
+    std::string line;
+    for (size_t lineno=1; std::getline(in, line); ++lineno) {
+        line = line.substr(0, line.find('#'));
+        std::istringstream ws(line);
+        std::vector<std::string> args{std::istream_iterator<std::string>(ws), std::istream_iterator<std::string>()};
+        if (args.empty()) continue;
+        std::string where = base.batch_path + ":" + std::to_string(lineno) + ": ";
+        points.emplace_back(where, parse(args, defaults, where));
+    }
+    return points;
+}
+
+template<class T>
+void batch_point(const Cmd& c, char* base, size_t slot, std::vector<Row>& rows, std::vector<Row>& samples) {
+    Buffers<T> B{reinterpret_cast<T*>(base), reinterpret_cast<T*>(base + slot), reinterpret_cast<T*>(base + 2*slot), base};
+    measure(c, B, rows, samples);
+}
+
+static int run_batch(const Cmd& base, const std::string& exe) {
+    auto points = read_spec(base);
+    if (base.between!="warm" && base.between!="flush") { fprintf(stderr, "--between must be warm or flush\n"); return 1; }
+    size_t slot = 0, misalign = 0, align = 64, flush_bytes = base.between=="flush" ? base.flush_mb << 20 : 0;
+    for (auto& [where, c] : points) {
+        std::string err = check(c, exe);
+        if (!err.empty()) { fprintf(stderr, "%s%s\n", where.c_str(), err.c_str()); return 1; }
+        size_t elem = c.dtype=="f32" ? sizeof(float) : sizeof(double);
+        slot = std::max(slot, elem * (c.N * c.stride + 8));
+        misalign = std::max(misalign, c.misalign);
+        align = std::max(align, c.align_bytes);
+    }
+    if (points.empty()) return 0;
+    slot = (slot + 63) / 64 * 64;  // keeps y and z as aligned as x
+    const size_t arena = 3 * slot + align + misalign;
+
+    void* raw = alloc_raw(arena, align);
+    std::vector<char> scratch(flush_bytes);
+    int default_threads = 1;
+#ifdef _OPENMP
+    default_threads = omp_get_max_threads();
 #endif
+    // What the arena currently holds: fill_uniform values of this dtype from this misalign,
+    // the first `filled` bytes of each slot
+    std::string held_dtype;
+    size_t held_misalign = 0, filled = 0;
+    std::vector<std::pair<std::string, std::vector<Row>>> out;  // path -> rows not yet written
+    auto pending = [&](const std::string& path) -> std::vector<Row>& {
+        for (auto& [p, rows] : out) if (p == path) return rows;
+        return out.emplace_back(path, std::vector<Row>{}).second;
+    };
+    auto write_out = [&](size_t at_least) {
+        for (auto& [p, rows] : out) if (!rows.empty() && rows.size() >= at_least) { append_rows(p, rows); rows.clear(); }
+    };
+
+    auto t0 = clk::now();
+    for (auto& [where, c] : points) {
+        const size_t elem = c.dtype=="f32" ? sizeof(float) : sizeof(double);
+        const size_t bytes = elem * (c.N * c.stride + 8);
+        char* buf = static_cast<char*>(raw) + c.misalign;
+        if (c.dtype != held_dtype || c.misalign != held_misalign) filled = 0;
+        if (bytes > filled) {
+            // Continue each slot's sequence where the last fill stopped (element i of a
+            // fill_uniform with seed s is mix64(s + (i+1)*golden))
+            const uint64_t skip = (filled / elem) * 0x9E3779B97F4A7C15ull;
+            const uint64_t seeds[3] = {c.seed, uint64_t(c.seed) << 32 | 1, uint64_t(c.seed) << 32 | 2};
+            for (int k=0; k<3; ++k) {
+                char* p = buf + k*slot + filled;
+                if (c.dtype=="f32") fill_uniform(reinterpret_cast<float*>(p), (bytes - filled) / elem, seeds[k] + skip);
+                else                fill_uniform(reinterpret_cast<double*>(p), (bytes - filled) / elem, seeds[k] + skip);
+            }
+            held_dtype = c.dtype; held_misalign = c.misalign; filled = bytes;
+        }
+        set_threads(c, default_threads);
+        if (flush_bytes) touch(scratch.data(), flush_bytes, true);
+        else for (int k=0; k<3; ++k) touch(buf + k*slot, bytes, false);
+
+        std::vector<Row> samples;
+        if (c.dtype=="f32") batch_point<float>(c, buf, slot, pending(c.csv_path), samples);
+        else                batch_point<double>(c, buf, slot, pending(c.csv_path), samples);
+        if (!c.samples_path.empty()) {
+            auto& s = pending(c.samples_path);
+            s.insert(s.end(), samples.begin(), samples.end());
+        }
+        write_out(256);
+    }
+    write_out(1);
+    double secs = std::chrono::duration<double>(clk::now() - t0).count();
+    fprintf(stderr, "%zu points in %.2f s (arena %.1f MiB)\n", points.size(), secs, arena / 1048576.0);
+    free_raw(raw);
+    return 0;
+}
+
+int main(int argc, char** argv) {
+    Cmd c = parse(std::vector<std::string>(argv + 1, argv + argc), Cmd{}, "");
     std::string exe = std::filesystem::path(argv[0]).filename().string();
-    std::string variant = (exe.find("scalar")!=std::string::npos) ? "scalar" : "simd";
+    if (!c.batch_path.empty()) return run_batch(c, exe);
+
+    std::string err = check(c, exe);
+    if (!err.empty()) { fprintf(stderr, "%s\n", err.c_str()); return 1; }
+    if (c.threads > 0) set_threads(c, c.threads);
 
-    if (c.dtype=="f32") return run_typed<float>(c, variant);
-    else                return run_typed<double>(c, variant);
+    if (c.dtype=="f32") return run_typed<float>(c);
+    else                return run_typed<double>(c);
 }
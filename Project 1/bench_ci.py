@@ -0,0 +1,67 @@
+import argparse, os, subprocess, sys, tempfile, time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from acslib import fingerprint
+from acslib.stats import repeat_until_stable
+
+def main():
+    ap = argparse.ArgumentParser(description="Repeat each bench config until the median's bootstrap CI is narrow")
+    ap.add_argument("--bins", nargs="+", default=["./bench_scalar", "./bench_simd"])
+    ap.add_argument("--kernel", nargs="+", default=["saxpy", "mul", "stencil3"])
+    ap.add_argument("--dtype", nargs="+", default=["f32", "f64"], choices=["f32", "f64"])
+    ap.add_argument("--N", nargs="+", type=int,
+                    default=[16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864])
+    ap.add_argument("--batch", type=int, default=5, help="Timed reps per bench process")
+    ap.add_argument("--warmup", type=int, default=2)
+    ap.add_argument("--rel-ci", type=float, default=0.05, help="Stop once the 95%% CI width is below this fraction of the median")
+    ap.add_argument("--min-reps", type=int, default=5)
+    ap.add_argument("--max-reps", type=int, default=100)
+    ap.add_argument("--csv", default="results/ci_results.csv",
+                    help="One row per config: bench.cpp's columns with the median time, plus CI bounds and reps")
+    ap.add_argument("--samples", default="results/samples.csv", help="Every timed rep")
+    args = ap.parse_args()
+
+    for p in (args.csv, args.samples):
+        Path(p).parent.mkdir(parents=True, exist_ok=True)
+    fingerprint.write_sidecar(Path(args.csv).parent)
+    ghz = float(os.environ.get("CPU_GHZ", 0))
+    total, t_start = 0, time.time()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for k in args.kernel:
+            for t in args.dtype:
+                for N in args.N:
+                    for b in args.bins:
+                        tmp_samples = os.path.join(tmp, "samples.csv")
+
+                        def sample():
+                            if os.path.exists(tmp_samples):
+                                os.remove(tmp_samples)
+                            subprocess.run([b, "--kernel", k, "--dtype", t, "--N", str(N),
+                                            "--reps", str(args.batch), "--warmup", str(args.warmup),
+                                            "--csv", os.path.join(tmp, "best.csv"), "--samples", tmp_samples],
+                                           check=True)
+                            s = pd.read_csv(tmp_samples)
+                            # Keep every raw rep, not just the summary
+                            s.to_csv(args.samples, mode="a", index=False, header=not os.path.exists(args.samples))
+                            return s["time_ms"].to_numpy()
+
+                        vals, (med, lo, hi), ok = repeat_until_stable(sample, args.rel_ci, args.min_reps, args.max_reps)
+                        total += len(vals)
+                        flops = pd.read_csv(tmp_samples).eval("gflops * time_ms").iloc[0]  # GFLOP x ms per rep
+                        row = pd.DataFrame([{
+                            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "kernel": k, "dtype": t, "N": N,
+                            "stride": 1, "misalign": 0, "variant": "scalar" if "scalar" in Path(b).name else "simd",
+                            "time_ms": med, "gflops": flops / med, "cpe": med * 1e-3 * ghz * 1e9 / N if ghz else float("nan"),
+                            "time_ci_lo": lo, "time_ci_hi": hi, "reps": len(vals)}])
+                        row.to_csv(args.csv, mode="a", index=False, header=not os.path.exists(args.csv))
+                        print(f"{Path(b).name} {k} {t} N={N}: {med:.4f} ms [{lo:.4f}, {hi:.4f}] "
+                              f"after {len(vals)} reps{'' if ok else ' (CI target not reached)'}")
+
+    print(f"{total} timed reps in {time.time() - t_start:.1f} s. Summary in {args.csv}, raw samples in {args.samples}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import argparse, os, time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# NumPy versions of the kernels.hpp loops, in three variants:
+#   numpy_naive   - the obvious expression; every operator allocates a full-size temporary
+#   numpy_inplace - the same math through ufunc out= into preallocated buffers, no allocation per call
+#   numpy_blocked - numpy_inplace applied block by block, so the multi-pass ufunc chain
+#                   re-reads a cache-resident block instead of streaming the arrays from memory again
+# CLI and CSV schema follow bench.cpp so make_plots.py / roofline.py / results_store read the output.
+
+VARIANTS = ["numpy_naive", "numpy_inplace", "numpy_blocked"]
+FLOPS_PER_ELEM = {"saxpy": 2.0, "dot": 2.0, "mul": 1.0, "stencil3": 5.0}
+HEADER = "timestamp,kernel,dtype,N,stride,misalign,variant,time_ms,gflops,cpe\n"
+
+def make_buffers(N, dtype, align, misalign, seed):
+    # One raw byte buffer like bench.cpp, so --align/--misalign mean the same thing
+    T = np.dtype(dtype).itemsize
+    raw = np.empty(3 * N * T + align + misalign, dtype=np.uint8)
+    start = (-raw.ctypes.data) % align + misalign
+    x, y, z = raw[start:start + 3 * N * T].view(dtype).reshape(3, N)
+    rng = np.random.default_rng(seed)
+    x[:] = rng.uniform(1.0, 2.0, N)
+    y[:] = rng.uniform(1.0, 2.0, N)
+    z[:] = 0
+    return x, y, z
+
+def naive(kernel, n, a, b, c, x, y, z):
+    if kernel == "saxpy":
+        y[...] = a * x + y
+    elif kernel == "dot":
+        return (x * y).sum()
+    elif kernel == "mul":
+        z[...] = x * y
+    elif kernel == "stencil3":
+        y[1:n-1] = a * x[:n-2] + b * x[1:n-1] + c * x[2:n]
+        y[0], y[n-1] = b * x[0], b * x[n-1]
+
+def inplace(kernel, n, a, b, c, x, y, z, tmp):
+    if kernel == "saxpy":
+        np.multiply(x, a, out=tmp[:n])
+        np.add(y, tmp[:n], out=y)
+    elif kernel == "dot":
+        return np.dot(x, y)
+    elif kernel == "mul":
+        np.multiply(x, y, out=z)
+    elif kernel == "stencil3":
+        yi, t = y[1:n-1], tmp[:n-2]
+        np.multiply(x[:n-2], a, out=yi)
+        np.multiply(x[1:n-1], b, out=t)
+        np.add(yi, t, out=yi)
+        np.multiply(x[2:n], c, out=t)
+        np.add(yi, t, out=yi)
+        y[0], y[n-1] = b * x[0], b * x[n-1]
+
+def blocked(kernel, n, a, b, c, x, y, z, tmp, block):
+    if kernel == "dot":
+        return sum(np.dot(x[i:i+block], y[i:i+block]) for i in range(0, n, block))
+    if kernel == "stencil3":
+        # Interior points i in [1, n-1), each block reading its own x[i-1:i+blk+1] halo
+        for i in range(1, n - 1, block):
+            e = min(i + block, n - 1)
+            yi, t = y[i:e], tmp[:e-i]
+            np.multiply(x[i-1:e-1], a, out=yi)
+            np.multiply(x[i:e], b, out=t)
+            np.add(yi, t, out=yi)
+            np.multiply(x[i+1:e+1], c, out=t)
+            np.add(yi, t, out=yi)
+        y[0], y[n-1] = b * x[0], b * x[n-1]
+        return
+    for i in range(0, n, block):
+        e = min(i + block, n)
+        inplace(kernel, e - i, a, b, c, x[i:e], y[i:e], z[i:e], tmp)
+
+def main():
+    ap = argparse.ArgumentParser(description="NumPy backend with bench.cpp's CLI and CSV schema")
+    ap.add_argument("--kernel", default="saxpy", choices=sorted(FLOPS_PER_ELEM))
+    ap.add_argument("--dtype", default="f32", choices=["f32", "f64"])
+    ap.add_argument("--N", type=int, default=1 << 20)
+    ap.add_argument("--reps", type=int, default=3)
+    ap.add_argument("--warmup", type=int, default=1)
+    ap.add_argument("--stride", type=int, default=1)
+    ap.add_argument("--align", type=int, default=64)
+    ap.add_argument("--misalign", type=int, default=0)
+    ap.add_argument("--csv", default="results/default_results.csv")
+    ap.add_argument("--seed", type=int, default=12345)
+    ap.add_argument("--variant", nargs="+", default=VARIANTS, choices=VARIANTS)
+    ap.add_argument("--block", type=int, default=8192, help="Elements per block for numpy_blocked")
+    args = ap.parse_args()
+
+    dtype = np.float32 if args.dtype == "f32" else np.float64
+    n, s = args.N, args.stride
+    a, b, c = dtype(1.111), dtype(2.222), dtype(0.333)
+    ghz = float(os.environ.get("CPU_GHZ", 0))
+
+    for variant in args.variant:
+        X, Y, Z = make_buffers(n * s + 8, dtype, args.align, args.misalign, args.seed)
+        x, y, z = X[:n*s:s], Y[:n*s:s], Z[:n*s:s]  # strided views, same element pattern as bench.cpp
+        tmp = np.empty(min(n, args.block) if variant == "numpy_blocked" else n, dtype=dtype)
+        if variant == "numpy_naive":
+            run = lambda: naive(args.kernel, n, a, b, c, x, y, z)
+        elif variant == "numpy_inplace":
+            run = lambda: inplace(args.kernel, n, a, b, c, x, y, z, tmp)
+        else:
+            run = lambda: blocked(args.kernel, n, a, b, c, x, y, z, tmp, args.block)
+
+        for _ in range(args.warmup):
+            run()
+        best_ms = float("inf")
+        for _ in range(args.reps):
+            t0 = time.perf_counter()
+            run()
+            best_ms = min(best_ms, (time.perf_counter() - t0) * 1e3)
+        gflops = n * FLOPS_PER_ELEM[args.kernel] / (best_ms * 1e-3) / 1e9
+        cpe = best_ms * 1e-3 * ghz * 1e9 / n if ghz > 0 else float("nan")
+
+        path = Path(args.csv)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        new = not path.exists()
+        with open(path, "a") as f:
+            if new:
+                f.write(HEADER)
+            f.write(f"{datetime.now():%Y-%m-%d %H:%M:%S},{args.kernel},{args.dtype},{n},{s},{args.misalign},"
+                    f"{variant},{best_ms:.6f},{gflops:.6f},{cpe:.6f}\n")
+
+if __name__ == "__main__":
+    main()
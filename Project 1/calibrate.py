@@ -0,0 +1,71 @@
+import argparse, json, os, platform, subprocess, sys, tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from acslib.fingerprint import cache_sizes
+from acslib.kvcsv import read_kv_csv
+
+GIB_TO_GB = 1024**3 / 1e9
+P2 = Path(__file__).resolve().parents[1] / "Project 2"
+
+def measure_peak(bench, dtype, reps):
+    # peak kernel on an L1-resident buffer: compute-bound, so this is the FLOP/s roof
+    with tempfile.TemporaryDirectory() as tmp:
+        csv = os.path.join(tmp, "peak.csv")
+        subprocess.run([bench, "--kernel", "peak", "--dtype", dtype, "--N", "4096",
+                        "--reps", str(reps), "--warmup", "3", "--csv", csv], check=True)
+        return float(pd.read_csv(csv)["gflops"].max())
+
+def sweep_bandwidth(path, sizes):
+    """Best GiB/s per cache level (and DRAM) from a working-set sweep, as GB/s."""
+    df = read_kv_csv(path)
+    bw_col = "mean_bw" if "mean_bw" in df else "GiB/s"
+    ws = df[(df.stride == 1) & (df.read_pct == 100) & (df.threads == 1)]
+    out = {}
+    for _, r in ws.iterrows():
+        footprint = 2 * r.N_bytes  # x and y
+        level = next((l for l in sorted(sizes) if footprint <= sizes[l]), "DRAM")
+        out[level] = max(out.get(level, 0.0), r[bw_col] * GIB_TO_GB)
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Measure the machine's roofs and save them as a profile JSON")
+    ap.add_argument("--bench", default="./bench_simd", help="Auto-vectorized bench binary (for the peak kernel)")
+    ap.add_argument("--intensity", default=str(P2 / "intensity.csv"),
+                    help="Project 2 microbench intensity sweep; its best GiB/s is the sustained DRAM bandwidth")
+    ap.add_argument("--working-set", default=str(P2 / "microbench_results_avg.csv"),
+                    help="Project 2 working-set sweep, for per-cache-level bandwidth (\"\" to skip)")
+    ap.add_argument("--peak-f32", type=float, help="Skip measuring f32 peak GFLOP/s and use this")
+    ap.add_argument("--peak-f64", type=float, help="Skip measuring f64 peak GFLOP/s and use this")
+    ap.add_argument("--reps", type=int, default=50)
+    ap.add_argument("--out", default="machine_profile.json")
+    args = ap.parse_args()
+
+    sizes = cache_sizes()
+    intensity = read_kv_csv(args.intensity)
+    best = intensity.loc[intensity["GiB/s"].idxmax()]
+    bandwidth = float(best["GiB/s"]) * GIB_TO_GB
+
+    peaks = {}
+    for dtype, given in (("f32", args.peak_f32), ("f64", args.peak_f64)):
+        peaks[dtype] = given if given is not None else measure_peak(args.bench, dtype, args.reps)
+
+    level_bw = sweep_bandwidth(args.working_set, sizes) if args.working_set and Path(args.working_set).exists() else {}
+    # A single-threaded sweep that can't beat sustained DRAM bandwidth is not a cache roof
+    level_bw = {l: b for l, b in level_bw.items() if b > bandwidth}
+    profile = {
+        "cpu": platform.processor() or platform.machine(),
+        "bandwidth_gbs": bandwidth,
+        "bandwidth_source": f"{Path(args.intensity).name}: {int(best.threads)} threads, {int(best.N_bytes)} bytes",
+        "peak_gflops": peaks,
+        "caches": [{"level": l, "size_bytes": s, "bandwidth_gbs": level_bw.get(l)} for l, s in sorted(sizes.items())],
+    }
+    Path(args.out).write_text(json.dumps(profile, indent=2) + "\n")
+    print(f"Sustained bandwidth {bandwidth:.2f} GB/s, peak f32 {peaks['f32']:.1f} / f64 {peaks['f64']:.1f} GFLOP/s")
+    print("Caches: " + ", ".join(f"L{l} {s // 1024} KiB" for l, s in sorted(sizes.items())))
+    print(f"Saved {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@
 #include <cstdint>
 #include <cmath>
 #include <algorithm>
+#include <vector>
 
 // Arithmetic intensity (FLOPs per element) helpers per kernel
 // SAXPY: y = a*x + y  -> 1 mul + 1 add = 2 FLOPs/element
@@ -14,6 +15,9 @@ inline double flops_per_elem_dot() { return 2.0; }
 inline double flops_per_elem_mul() { return 1.0; }
 // 1D 3-point stencil: y[i]=a*x[i-1]+b*x[i]+c*x[i+1] -> 3 mul + 2 add = 5 FLOPs
 inline double flops_per_elem_stencil3() { return 5.0; }
+// Peak: PEAK_ITERS chained y=a*y+b per element -> 2*PEAK_ITERS FLOPs (compute-bound calibration)
+constexpr int PEAK_ITERS = 256;
+inline double flops_per_elem_peak() { return 2.0 * PEAK_ITERS; }
 
 // Kernels: scalar loops. Auto-vectorized build should vectorize these.
 // Stride parameter applies to x/y/z where relevant (>=1). Misalignment is controlled by pointer offsets.
@@ -67,3 +71,133 @@ inline void kernel_stencil3(std::size_t N, T a, T b, T c,
     y[0]         = b*x[0];
     y[(N-1)*stride] = b*x[(N-1)*stride];
 }
+
+// ---- OpenMP variants -------------------------------------------------------------
+// The same loops split statically across the team (one contiguous chunk per thread, so
+// each thread streams its own part of the arrays). Without -fopenmp the pragmas are
+// ignored and these run serially.
+
+template<class T>
+inline void kernel_saxpy_omp(std::size_t N, T a, const T* __restrict x, T* __restrict y,
+                             std::size_t stride=1)
+{
+    #pragma omp parallel for schedule(static)
+    for (std::size_t i=0; i<N; ++i) {
+        y[i*stride] = a*x[i*stride] + y[i*stride];
+    }
+}
+
+template<class T>
+inline T kernel_dot_omp(std::size_t N, const T* __restrict x, const T* __restrict y,
+                        std::size_t stride=1)
+{
+    T s = T(0);
+    #pragma omp parallel for schedule(static) reduction(+:s)
+    for (std::size_t i=0; i<N; ++i) {
+        s += x[i*stride] * y[i*stride];
+    }
+    return s;
+}
+
+template<class T>
+inline void kernel_mul_omp(std::size_t N, const T* __restrict x, const T* __restrict y,
+                           T* __restrict z, std::size_t stride=1)
+{
+    #pragma omp parallel for schedule(static)
+    for (std::size_t i=0; i<N; ++i) {
+        z[i*stride] = x[i*stride] * y[i*stride];
+    }
+}
+
+template<class T>
+inline void kernel_stencil3_omp(std::size_t N, T a, T b, T c,
+                                const T* __restrict x, T* __restrict y, std::size_t stride=1)
+{
+    if (N < 2) { kernel_stencil3(N, a, b, c, x, y, stride); return; }
+    #pragma omp parallel for schedule(static)
+    for (std::size_t i=1; i<N-1; ++i) {
+        y[i*stride] = a*x[(i-1)*stride] + b*x[i*stride] + c*x[(i+1)*stride];
+    }
+    y[0]            = b*x[0];
+    y[(N-1)*stride] = b*x[(N-1)*stride];
+}
+
+// ---- Temporal blocking ------------------------------------------------------------
+// `sweeps` applications of stencil3 (each sweep reads the previous one's output), in two
+// forms. The plain one streams the whole array through memory once per sweep, ping-ponging
+// between y and tmp. The blocked one cuts the array into tiles and runs every sweep on one
+// tile while it is in cache: each tile is loaded with a halo of `sweeps` elements per side
+// (the cells that influence it), the valid region shrinks by one per sweep, and only the
+// tile's own cells are stored. Halo cells are computed redundantly by both neighbours, so
+// tiles are independent and run in parallel. Result is in y for both; unit stride.
+
+template<class T>
+inline void kernel_stencil3_sweeps(std::size_t N, T a, T b, T c, const T* __restrict x,
+                                   T* __restrict y, T* __restrict tmp, int sweeps, bool parallel)
+{
+    const T* src = x;
+    for (int s=0; s<sweeps; ++s) {
+        T* dst = ((sweeps - s) % 2) ? y : tmp;  // the last sweep lands in y
+        if (parallel) kernel_stencil3_omp(N, a, b, c, src, dst);
+        else          kernel_stencil3(N, a, b, c, src, dst);
+        src = dst;
+    }
+}
+
+template<class T>
+inline void kernel_stencil3_blocked(std::size_t N, T a, T b, T c, const T* __restrict x,
+                                    T* __restrict y, int sweeps, std::size_t tile)
+{
+    if (N == 0 || sweeps <= 0) return;
+    const std::size_t h = std::size_t(sweeps);
+    const std::size_t n_tiles = (N + tile - 1) / tile;
+    #pragma omp parallel
+    {
+        // Per-thread tile buffers, tile + 2*halo elements each
+        std::vector<T> buf0(tile + 2*h), buf1(tile + 2*h);
+        #pragma omp for schedule(static)
+        for (std::size_t t=0; t<n_tiles; ++t) {
+            const std::size_t lo = t*tile, hi = std::min(N, lo + tile);
+            // Loaded range [g0, g1): the tile plus up to h cells either side
+            const std::size_t g0 = lo > h ? lo - h : 0, g1 = std::min(N, hi + h);
+            T* cur = buf0.data();
+            T* nxt = buf1.data();
+            std::copy(x + g0, x + g1, cur);
+            // After sweep s the cells [g0+s, g1-s) are exact (array ends are exact throughout)
+            for (std::size_t s=1; s<=h; ++s) {
+                const std::size_t v0 = g0 == 0 ? 0 : g0 + s, v1 = g1 == N ? N : g1 - s;
+                // interior cells as tile offsets, then the array ends if this tile has them
+                const std::size_t j0 = std::max<std::size_t>(v0, 1) - g0, j1 = std::min(v1, N-1) - g0;
+                for (std::size_t j=j0; j<j1; ++j)
+                    nxt[j] = a*cur[j-1] + b*cur[j] + c*cur[j+1];
+                if (v0 == 0)          nxt[0]        = b*cur[0];
+                if (v1 == N && N > 1) nxt[N-1-g0] = b*cur[N-1-g0];
+                std::swap(cur, nxt);
+            }
+            std::copy(cur + (lo-g0), cur + (hi-g0), y + lo);
+        }
+    }
+}
+
+// Compute-bound kernel for measuring peak FLOP/s. Each element runs a dependent chain of
+// multiply-adds; PEAK_BLOCK elements are kept in flight so the vectorized inner loop has
+// enough independent chains to cover FMA latency. Use |a| < 1 so values stay normal.
+template<class T>
+inline void kernel_peak(std::size_t N, T a, T b, T* __restrict y, std::size_t stride=1)
+{
+    constexpr std::size_t PEAK_BLOCK = 128;
+    std::size_t i = 0;
+    for (; i + PEAK_BLOCK <= N; i += PEAK_BLOCK) {
+        T v[PEAK_BLOCK];
+        for (std::size_t j=0; j<PEAK_BLOCK; ++j) v[j] = y[(i+j)*stride];
+        for (int k=0; k<PEAK_ITERS; ++k)
+            for (std::size_t j=0; j<PEAK_BLOCK; ++j) v[j] = a*v[j] + b;
+        for (std::size_t j=0; j<PEAK_BLOCK; ++j) y[(i+j)*stride] = v[j];
+    }
+    // tail
+    for (; i<N; ++i) {
+        T v = y[i*stride];
+        for (int k=0; k<PEAK_ITERS; ++k) v = a*v + b;
+        y[i*stride] = v;
+    }
+}
@@ -1,55 +1,143 @@
 
-import argparse, pandas as pd, matplotlib.pyplot as plt, os, numpy as np
+import argparse, pandas as pd, os, sys, numpy as np
+from pathlib import Path
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("csv")
-    args = ap.parse_args()
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from acslib import figures
+from acslib.kvcsv import fill_bench
+
+def load_results(args):
+    # Either a bench.cpp CSV or the shared SQLite store; the store only returns the requested slice
+    if args.db:
+        from acslib import results_store
+        conn = results_store.connect(args.db)
+        df = results_store.query(conn, "bench_runs", kernel=args.kernel, dtype=args.dtype)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        return fill_bench(df)
     df = pd.read_csv(args.csv, parse_dates=["timestamp"])
+    if args.kernel: df = df[df.kernel.isin(args.kernel)]
+    if args.dtype:  df = df[df.dtype.isin(args.dtype)]
+    return fill_bench(df)
+
+def config_label(threads, sweeps, tile):
+    label = f"{threads} thread{'s' if threads > 1 else ''}"
+    if sweeps > 1: label += f", {sweeps} sweeps"
+    if tile:       label += f", tile {tile}"
+    return label
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("csv", nargs="?")
+    ap.add_argument("--db", help="Read from a results store (acslib/results_store.py) instead of a CSV")
+    ap.add_argument("--kernel", nargs="+", help="Only plot these kernels")
+    ap.add_argument("--dtype", nargs="+", choices=["f32","f64"], help="Only plot these dtypes")
+    ap.add_argument("--jobs", "-j", type=int, default=1,
+                    help="Render figures in this many worker processes (0 = all cores)")
+    args = ap.parse_args(argv)
+    if not args.csv and not args.db:
+        ap.error("give a CSV path or --db")
+    df = load_results(args)
 
     os.makedirs("plots", exist_ok=True)
 
+    # Aggregate once in the parent; each figure job only carries its own median series
+    cfg = ["threads","sweeps","tile"]
+    full = df.groupby(["kernel","dtype","variant"] + cfg + ["N"])[["time_ms","gflops","cpe"]].median()
+    # The variant comparisons below are single-threaded, one sweep, untiled
+    serial = np.ones(len(full), bool)
+    for c, v in zip(cfg, (1, 1, 0)):
+        serial &= full.index.get_level_values(c) == v
+    med = full[serial].droplevel(cfg)
+    jobs = []
+
+    def line_job(out, title, ylabel, series):
+        return {"out": out, "title": title, "xlabel": "N (elements)", "ylabel": ylabel,
+                "xscale": "log", "grid": {"which": "both", "linestyle": ":"}, "bbox_inches": "tight",
+                "series": [{"x": series.index.to_numpy(), "y": series.to_numpy(), "style": {"marker": "o"}}]}
+
     # Speedup plots: simd vs scalar per kernel/dtype
-    for (k,d), g in df.groupby(["kernel","dtype"]):
-        piv = g.pivot_table(index="N", columns="variant", values="time_ms", aggfunc="median")
+    times = med["time_ms"].unstack("variant")
+    for (k,d), piv in times.groupby(level=["kernel","dtype"]):
         if "scalar" in piv and "simd" in piv:
-            speedup = piv["scalar"] / piv["simd"]
-            plt.figure()
-            plt.title(f"Speedup (scalar/simd) — {k} ({d})")
-            plt.xlabel("N (elements)"); plt.ylabel("Speedup")
-            plt.xscale("log")
-            plt.plot(speedup.index, speedup.values, marker="o")
-            plt.grid(True, which="both", linestyle=":")
-            plt.savefig(f"plots/speedup_{k}_{d}.png", bbox_inches="tight")
-            plt.close()
-
-    # GFLOP/s vs N for each variant
-    for (k,d,v), g in df.groupby(["kernel","dtype","variant"]):
-        gg = g.groupby("N", as_index=True)["gflops"].median()
-        plt.figure()
-        plt.title(f"GFLOP/s vs N — {k} ({d}, {v})")
-        plt.xlabel("N (elements)"); plt.ylabel("GFLOP/s")
-        plt.xscale("log")
-        plt.plot(gg.index, gg.values, marker="o")
-        plt.grid(True, which="both", linestyle=":")
-        plt.savefig(f"plots/gflops_{k}_{d}_{v}.png", bbox_inches="tight")
-        plt.close()
-
-    # CPE vs N if available
-    sub = df.dropna(subset=["cpe"])
-    if not sub.empty:
-        for (k,d,v), g in sub.groupby(["kernel","dtype","variant"]):
-            gg = g.groupby("N", as_index=True)["cpe"].median()
-            plt.figure()
-            plt.title(f"CPE vs N — {k} ({d}, {v})")
-            plt.xlabel("N (elements)"); plt.ylabel("Cycles per element")
-            plt.xscale("log")
-            plt.plot(gg.index, gg.values, marker="o")
-            plt.grid(True, which="both", linestyle=":")
-            plt.savefig(f"plots/cpe_{k}_{d}_{v}.png", bbox_inches="tight")
-            plt.close()
-
-    print("Plots saved to plots/*.png")
+            speedup = (piv["scalar"] / piv["simd"]).droplevel(["kernel","dtype"])
+            jobs.append(line_job(f"plots/speedup_{k}_{d}.png", f"Speedup (scalar/simd) — {k} ({d})",
+                                 "Speedup", speedup))
+
+    # Python/C++ gap: every variant of a kernel on one GFLOP/s plot, and how many times
+    # faster the C++ simd build is than each NumPy variant (bench_numpy.py)
+    gfl = med["gflops"].unstack("variant")
+    for (k,d), piv in gfl.groupby(level=["kernel","dtype"]):
+        piv = piv.droplevel(["kernel","dtype"]).dropna(axis=1, how="all")
+        numpy_vs = [v for v in piv.columns if v.startswith("numpy")]
+        if not numpy_vs:
+            continue
+        jobs.append({"out": f"plots/variants_{k}_{d}.png", "title": f"GFLOP/s vs N — {k} ({d}), all variants",
+                     "xlabel": "N (elements)", "ylabel": "GFLOP/s", "xscale": "log", "yscale": "log",
+                     "grid": {"which": "both", "linestyle": ":"}, "legend": True, "bbox_inches": "tight",
+                     "series": [{"x": piv.index.to_numpy(), "y": piv[v].to_numpy(), "label": v,
+                                 "style": {"marker": "o"}} for v in piv.columns]})
+        if "simd" in piv:
+            jobs.append({"out": f"plots/gap_{k}_{d}.png", "title": f"C++ simd / NumPy — {k} ({d})",
+                         "xlabel": "N (elements)", "ylabel": "Slowdown vs C++ simd (x)", "xscale": "log",
+                         "grid": {"which": "both", "linestyle": ":"}, "legend": True, "bbox_inches": "tight",
+                         "series": [{"x": piv.index.to_numpy(), "y": (piv["simd"] / piv[v]).to_numpy(),
+                                     "label": v, "style": {"marker": "o"}} for v in numpy_vs]})
+
+    # GFLOP/s vs N for each variant, and CPE vs N if available; one line per
+    # threads/sweeps/tile setting when a variant was run with more than one
+    for (k,d,v), g in full.groupby(level=["kernel","dtype","variant"]):
+        g = g.droplevel(["kernel","dtype","variant"])
+        for metric, name, ylabel in (("gflops", "GFLOP/s", "GFLOP/s"), ("cpe", "CPE", "Cycles per element")):
+            col = g[metric].dropna()
+            if col.empty:
+                continue
+            job = line_job(f"plots/{metric}_{k}_{d}_{v}.png", f"{name} vs N — {k} ({d}, {v})", ylabel,
+                           col.droplevel(cfg))
+            settings = col.index.droplevel("N").unique()
+            if len(settings) > 1:
+                job["legend"] = True
+                job["series"] = [{"x": s.index.to_numpy(), "y": s.to_numpy(), "label": config_label(*c),
+                                  "style": {"marker": "o"}}
+                                 for c, s in ((c, col.xs(c, level=cfg)) for c in settings)]
+            jobs.append(job)
+
+    # Thread scaling of the OpenMP variants: time at 1 thread / time at T threads, one
+    # line per N (blocked: the best tile at each point)
+    best = full["time_ms"].groupby(level=["kernel","dtype","variant","threads","sweeps","N"]).min()
+    par = best[best.index.get_level_values("variant").isin(["omp", "blocked"])]
+    for (k,d,v,sw), g in par.groupby(level=["kernel","dtype","variant","sweeps"]):
+        t = g.droplevel(["kernel","dtype","variant","sweeps"]).unstack("N")
+        if 1 not in t.index or len(t.index) < 2:
+            continue
+        speedup = t.loc[1] / t
+        tmax = int(t.index.max())
+        jobs.append({"out": f"plots/threads_{k}_{d}_{v}{f'_s{sw}' if sw > 1 else ''}.png",
+                     "title": f"Thread scaling — {k} ({d}, {v}{f', {sw} sweeps' if sw > 1 else ''})",
+                     "xlabel": "Threads", "ylabel": "Speedup vs 1 thread", "grid": {"linestyle": ":"},
+                     "legend": True, "bbox_inches": "tight",
+                     "series": [{"x": [1, tmax], "y": [1, tmax], "label": "ideal",
+                                 "style": {"linestyle": "--", "color": "gray"}}] +
+                               [{"x": speedup.index.to_numpy(), "y": speedup[n].to_numpy(), "label": f"N={n}",
+                                 "style": {"marker": "o"}} for n in speedup.columns]})
+
+    # Temporal blocking: untiled omp sweeps / blocked (best tile), per thread count and sweep count
+    for (k,d), g in best.groupby(level=["kernel","dtype"]):
+        t = g.droplevel(["kernel","dtype"]).unstack("variant")
+        if "omp" not in t or "blocked" not in t:
+            continue
+        gain = (t["omp"] / t["blocked"]).dropna()
+        if gain.empty:
+            continue
+        jobs.append({"out": f"plots/blocking_{k}_{d}.png", "title": f"Blocked / untiled speedup — {k} ({d})",
+                     "xlabel": "N (elements)", "ylabel": "time(omp) / time(blocked)", "xscale": "log",
+                     "grid": {"which": "both", "linestyle": ":"}, "legend": True, "bbox_inches": "tight",
+                     "series": [{"x": s.index.to_numpy(), "y": s.to_numpy(), "label": config_label(th, sw, 0),
+                                 "style": {"marker": "o"}}
+                                for (th, sw), s in gain.groupby(level=["threads","sweeps"])
+                                for s in [s.droplevel(["threads","sweeps"])]]})
+
+    figures.render_all(jobs, args.jobs)
+    print(f"{len(jobs)} plots saved to plots/*.png")
 
 if __name__ == "__main__":
     main()
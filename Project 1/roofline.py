@@ -1,60 +1,128 @@
+import argparse, json, pandas as pd, numpy as np, sys
+from pathlib import Path
 
-import argparse, pandas as pd, matplotlib.pyplot as plt, numpy as np
-
-def ai_for_kernel(kernel):
-    # Arithmetic intensity (FLOPs/byte) assuming streaming loads/stores of floats
-    # Adjust if needed in your report; here we approximate bytes moved per element for unit-stride.
-    # Bytes per element:
-    # saxpy: read x,y (2T) + write y (T) = 3T bytes, FLOPs=2
-    # dot: read x,y (2T), reduction write negligible amortized, FLOPs=2
-    # mul: read x,y (2T) + write z (T), FLOPs=1
-    # stencil3: read 3 neighbors (3T) + write y (T), FLOPs=5
-    return {
-        "saxpy":   lambda T: 2.0/(3*T),
-        "dot":     lambda T: 2.0/(2*T),
-        "mul":     lambda T: 1.0/(3*T),
-        "stencil3":lambda T: 5.0/(4*T),
-    }[kernel]
-
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--kernel", required=True, choices=["saxpy","dot","mul","stencil3"])
-    ap.add_argument("--csv", required=True)
-    ap.add_argument("--gbytes_per_s", type=float, required=True, help="Measured memory bandwidth (GB/s)")
-    ap.add_argument("--gflops_peak", type=float, required=True, help="Estimated peak GFLOP/s for chosen dtype and ISA")
-    ap.add_argument("--dtype", choices=["f32","f64"], default="f32")
-    args = ap.parse_args()
+# Per element: FLOPs, memory accesses (loads + stores) and distinct arrays touched (footprint)
+# saxpy: read x,y + write y, 2 FLOPs; dot: read x,y, 2 FLOPs; mul: read x,y + write z, 1 FLOP
+# stencil3: 3 neighbour reads + write y, 5 FLOPs; peak: read + write y, 2*256 FLOPs (kernels.hpp)
+KERNELS = {
+    "saxpy":    {"flops": 2.0,   "accesses": 3, "arrays": 2},
+    "dot":      {"flops": 2.0,   "accesses": 2, "arrays": 2},
+    "mul":      {"flops": 1.0,   "accesses": 3, "arrays": 3},
+    "stencil3": {"flops": 5.0,   "accesses": 4, "arrays": 2},
+    "peak":     {"flops": 512.0, "accesses": 2, "arrays": 1},
+}
+LINE = 64  # cache-line bytes
+LEVEL_COLORS = {1: "tab:green", 2: "tab:olive", 3: "tab:orange", 4: "tab:brown", "DRAM": "tab:red"}
+MARKERS = {"saxpy": "o", "dot": "v", "mul": "s", "stencil3": "^", "peak": "*"}
+
+def ai_for_kernel(kernel, T, stride=1):
+    # Effective arithmetic intensity (FLOPs/byte). With stride s every access still moves
+    # whole lines, so each one costs min(s*T, 64) bytes of traffic instead of T.
+    k = KERNELS[kernel]
+    return k["flops"] / (k["accesses"] * np.minimum(stride * T, LINE))
+
+def footprint_bytes(kernel, T, N, stride=1):
+    return KERNELS[kernel]["arrays"] * N * stride * T
 
+def cache_level(ws, caches):
+    for c in caches:
+        if ws <= c["size_bytes"]:
+            return c["level"]
+    return "DRAM"
+
+def load_rows(args):
+    filters = {"kernel": args.kernel, "dtype": args.dtype, "variant": args.variant}
+    if args.db:
+        sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+        from acslib import results_store
+        conn = results_store.connect(args.db)
+        return results_store.query(conn, "bench_runs", ["kernel", "dtype", "variant", "N", "stride", "gflops"],
+                                   **filters)
     df = pd.read_csv(args.csv)
-    df = df[(df.kernel==args.kernel) & (df.variant=="simd")]
+    for col, val in filters.items():
+        if val is not None:
+            df = df[df[col].isin(val if isinstance(val, list) else [val])]
+    return df
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--kernel", nargs="+", choices=sorted(KERNELS), help="Default: every kernel in the data")
+    ap.add_argument("--csv")
+    ap.add_argument("--db", help="Read from a results store (acslib/results_store.py) instead of a CSV")
+    ap.add_argument("--profile", help="machine_profile.json from calibrate.py (bandwidth, peaks, cache sizes)")
+    ap.add_argument("--gbytes_per_s", type=float, help="Measured memory bandwidth (GB/s); overrides the profile")
+    ap.add_argument("--gflops_peak", type=float, help="Peak GFLOP/s; overrides the profile")
+    ap.add_argument("--dtype", nargs="+", choices=["f32","f64"], help="Default: every dtype in the data")
+    ap.add_argument("--variant", nargs="+", default=["simd"],
+                    help="Builds/backends to place, e.g. simd scalar numpy_naive numpy_inplace numpy_blocked")
+    args = ap.parse_args(argv)
+
+    profile = json.loads(Path(args.profile).read_text()) if args.profile else {}
+    bw = args.gbytes_per_s or profile.get("bandwidth_gbs")
+    peaks = dict(profile.get("peak_gflops", {}))
+    if args.gflops_peak:
+        peaks = {d: args.gflops_peak for d in ("f32", "f64")}
+    if not bw or not peaks:
+        ap.error("give --profile or both --gbytes_per_s and --gflops_peak")
+    caches = [c for c in profile.get("caches", []) if c.get("size_bytes")]
+    if not args.csv and not args.db:
+        ap.error("give --csv or --db")
+
+    df = load_rows(args)
     if df.empty:
         raise SystemExit("No matching rows")
+    if "stride" not in df:
+        df["stride"] = 1
 
-    # Arithmetic intensity (FLOPs/byte) for dtype
-    T = 4 if args.dtype=="f32" else 8
-    ai = ai_for_kernel(args.kernel)(T)
+    # Achieved GFLOP/s per configuration, placed at its stride-aware AI and coloured by the
+    # cache level its footprint fits in
+    g = df.groupby(["kernel","dtype","variant","stride","N"], as_index=False)["gflops"].median()
+    T = np.where(g["dtype"] == "f32", 4, 8)
+    g["ai"] = [ai_for_kernel(k, t, s) for k, t, s in zip(g["kernel"], T, g["stride"])]
+    g["level"] = [cache_level(footprint_bytes(k, t, n, s), caches)
+                  for k, t, n, s in zip(g["kernel"], T, g["N"], g["stride"])]
 
-    # Achieved GFLOP/s across sizes
-    g = df.groupby("N", as_index=True)["gflops"].median()
-
-    plt.figure()
-    plt.title(f"Roofline — {args.kernel} ({args.dtype})")
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(9,6))
+    kernels = sorted(g["kernel"].unique())
+    dtypes = sorted(g["dtype"].unique())
+    plt.title("Roofline — " + ", ".join(kernels) + f" ({', '.join(dtypes)})")
     plt.xlabel("Arithmetic Intensity (FLOPs/byte)")
     plt.ylabel("GFLOP/s")
-    # Roofline lines
     ai_vals = np.array([1e-3, 1e3])
-    mem_bound = args.gbytes_per_s * ai_vals
-    compute_bound = np.full_like(ai_vals, args.gflops_peak)
-    plt.loglog(ai_vals, mem_bound, label=f"Memory BW = {args.gbytes_per_s} GB/s")
-    plt.loglog(ai_vals, compute_bound, label=f"Peak = {args.gflops_peak} GFLOP/s")
-
-    # Plot achieved points at the kernel AI (constant AI); vary GFLOP/s with N
-    plt.scatter([ai]*len(g), g.values, label="Achieved", marker="o")
-    plt.legend()
+    top = max(peaks.get(d, 0) for d in dtypes) or max(peaks.values())
+    # Memory roofs: DRAM, plus each cache level the profile has a bandwidth for
+    plt.loglog(ai_vals, np.minimum(bw * ai_vals, top), color=LEVEL_COLORS["DRAM"], label=f"DRAM BW = {bw:.1f} GB/s")
+    for c in caches:
+        if c.get("bandwidth_gbs"):
+            plt.loglog(ai_vals, np.minimum(c["bandwidth_gbs"] * ai_vals, top), linestyle="--",
+                       color=LEVEL_COLORS.get(c["level"], "gray"), label=f"L{c['level']} BW = {c['bandwidth_gbs']:.1f} GB/s")
+    for d in dtypes:
+        if d in peaks:
+            plt.loglog(ai_vals, np.full_like(ai_vals, peaks[d]), linestyle="-" if d == "f32" else "-.",
+                       color="black", label=f"Peak {d} = {peaks[d]:.1f} GFLOP/s")
+
+    variants = list(dict.fromkeys(g["variant"]))
+    for (k, v, lvl), sub in g.groupby(["kernel", "variant", "level"], sort=False):
+        name = f"L{lvl}" if lvl != "DRAM" else lvl
+        # With several variants: first one filled, the others hollow and progressively larger
+        vi = variants.index(v)
+        filled = vi == 0
+        plt.scatter(sub["ai"], sub["gflops"], marker=MARKERS.get(k, "o"), alpha=0.8, s=36 + 40 * vi,
+                    facecolors=LEVEL_COLORS.get(lvl, "gray") if filled else "none",
+                    edgecolors=LEVEL_COLORS.get(lvl, "gray"),
+                    label=f"{k}{'' if len(variants) == 1 else f' ({v})'} in {name}")
+    plt.legend(fontsize=8, loc="best")
     plt.grid(True, which="both", linestyle=":")
-    out = f"plots/roofline_{args.kernel}_{args.dtype}.png"
+    if len(kernels) == 1 and len(dtypes) == 1 and variants == ["simd"]:
+        out = f"plots/roofline_{kernels[0]}_{dtypes[0]}.png"
+    elif len(kernels) == 1 and len(dtypes) == 1:
+        out = f"plots/roofline_{kernels[0]}_{dtypes[0]}_{'_'.join(variants)}.png"
+    else:
+        out = "plots/roofline_all.png"
+    Path("plots").mkdir(exist_ok=True)
     plt.savefig(out, bbox_inches="tight")
-    print(f"Saved {out}. Use this plus a note on whether your points fall on the memory or compute roof.")
+    print(f"Saved {out}. Points are coloured by the cache level their working set fits in.")
 
 if __name__ == "__main__":
     main()
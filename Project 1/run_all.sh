@@ -8,11 +8,14 @@ set -euo pipefail
 mkdir -p results
 CSV=results/default_results.csv
 rm -f "$CSV"
+# Record which machine produced these results (see acslib/fingerprint.py)
+PYTHONPATH=.. python3 -m acslib.fingerprint --write results
 
 # Optionally export your CPU GHz for CPE (cycles/element) estimation
 # export CPU_GHZ=3.50
 
 # Sizes (adjust to cross L1/L2/LLC/DRAM). You can override via env SIZES="..."
+# (sweep_adaptive.py instead picks N itself, bisecting only around the cache knees)
 SIZES=${SIZES:-"16384 65536 262144 1048576 4194304 16777216 67108864"}
 
 # Kernels and types
@@ -22,28 +25,65 @@ DTYPES=${DTYPES:-"f32 f64"}
 # Build
 make -j
 
+# PERF=1 runs every bench under perf stat (acslib/perfctr.py) and adds the
+# counters (ghz, core_cycles, instructions, llc_misses, dtlb_misses) to its CSV row
+run() {
+  if [ -n "${PERF:-}" ]; then
+    PYTHONPATH=.. python3 -m acslib.perfctr --csv-row "$CSV" -- "$@"
+  else
+    "$@"
+  fi
+}
+
 # 1) Baseline vs auto-vectorized across sizes (unit stride, aligned)
+# BATCH=1 runs this sweep as one bench --batch process per binary (batch_sweep.py):
+# buffers allocated and filled once, rows written in bulk (not with PERF=1, whose
+# counters are per process)
+if [ -n "${BATCH:-}" ]; then
+  python3 batch_sweep.py --kernel $KERNELS --dtype $DTYPES --N $SIZES --reps 5 --warmup 2 --csv "$CSV"
+else
 for k in $KERNELS; do
   for t in $DTYPES; do
     for N in $SIZES; do
-      ./bench_scalar --kernel $k --dtype $t --N $N --reps 5 --warmup 2 --csv "$CSV"
-      ./bench_simd   --kernel $k --dtype $t --N $N --reps 5 --warmup 2 --csv "$CSV"
+      run ./bench_scalar --kernel $k --dtype $t --N $N --reps 5 --warmup 2 --csv "$CSV"
+      run ./bench_simd   --kernel $k --dtype $t --N $N --reps 5 --warmup 2 --csv "$CSV"
     done
   done
 done
+fi
 
 # 2) Alignment & tail handling (misalign by 4 bytes)
 for mis in 0 4; do
   for t in $DTYPES; do
     for N in 1048576 1050000; do # multiple of wide vector vs tail case
-      ./bench_simd --kernel saxpy --dtype $t --N $N --misalign $mis --csv "$CSV"
+      run ./bench_simd --kernel saxpy --dtype $t --N $N --misalign $mis --csv "$CSV"
     done
   done
 done
 
 # 3) Stride effects (1,2,4,8)
 for s in 1 2 4 8; do
-  ./bench_simd --kernel mul --dtype f32 --N 16777216 --stride $s --csv "$CSV"
+  run ./bench_simd --kernel mul --dtype f32 --N 16777216 --stride $s --csv "$CSV"
 done
 
+# 4) Thread scaling and temporal blocking, with an OpenMP build (see the readme):
+#    omp saxpy/stencil3 at every thread count, and 8 stencil3 sweeps untiled vs blocked
+if [ -x ./bench_omp ]; then
+  SWEEPS=${SWEEPS:-8}
+  for T in $(seq 1 "$(nproc 2>/dev/null || sysctl -n hw.ncpu)"); do
+    for N in 1048576 16777216; do
+      run ./bench_omp --variant omp --threads $T --kernel saxpy --N $N --csv "$CSV"
+      run ./bench_omp --variant omp --threads $T --kernel stencil3 --N $N --sweeps $SWEEPS --csv "$CSV"
+      for tile in 4096 16384 65536; do
+        run ./bench_omp --variant blocked --threads $T --kernel stencil3 --N $N --sweeps $SWEEPS --tile $tile --csv "$CSV"
+      done
+    done
+  done
+fi
+
+# Optional: load the CSV into the shared results store (see acslib/results_store.py)
+if [ -n "${RESULTS_DB:-}" ]; then
+  PYTHONPATH=.. python3 -m acslib.results_store ingest bench "$RESULTS_DB" "$CSV"
+fi
+
 echo "Done. Results in $CSV"
@@ -0,0 +1,58 @@
+import argparse, subprocess, sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from acslib import fingerprint
+from acslib.sweep import adaptive_sweep, find_knees
+
+# Arrays each kernel streams and element sizes, to report knees as working-set bytes
+ARRAYS = {"saxpy": 2, "dot": 2, "mul": 3, "stencil3": 2}
+ELEM_BYTES = {"f32": 4, "f64": 8}
+
+def run_bench(binary, kernel, dtype, N, reps, warmup, out_csv):
+    # bench appends its row to --csv under the file's own (possibly widened) header
+    subprocess.run([binary, "--kernel", kernel, "--dtype", dtype, "--N", str(N),
+                    "--reps", str(reps), "--warmup", str(warmup), "--csv", str(out_csv)], check=True)
+    lines = out_csv.read_text().splitlines()
+    return float(lines[-1].split(",")[lines[0].split(",").index("gflops")])
+
+def main():
+    ap = argparse.ArgumentParser(description="Sweep N coarsely, then bisect only where GFLOP/s changes sharply")
+    ap.add_argument("--bins", nargs="+", default=["./bench_scalar", "./bench_simd"])
+    ap.add_argument("--kernel", nargs="+", default=["saxpy", "mul", "stencil3"])
+    ap.add_argument("--dtype", nargs="+", default=["f32", "f64"], choices=["f32", "f64"])
+    ap.add_argument("--lo", type=int, default=4096, help="Smallest N (elements)")
+    ap.add_argument("--hi", type=int, default=1 << 26, help="Largest N (elements)")
+    ap.add_argument("--coarse", type=int, default=8, help="Points in the initial log grid")
+    ap.add_argument("--rel-change", type=float, default=0.10,
+                    help="Bisect an interval while GFLOP/s changes by more than this fraction across it")
+    ap.add_argument("--min-ratio", type=float, default=1.06, help="Stop refining once N_hi/N_lo is below this")
+    ap.add_argument("--max-points", type=int, default=32, help="Run budget per kernel/dtype/binary")
+    ap.add_argument("--align", type=int, default=64, help="Round N to a multiple of this")
+    ap.add_argument("--reps", type=int, default=5)
+    ap.add_argument("--warmup", type=int, default=2)
+    ap.add_argument("--csv", default="results/adaptive_results.csv")
+    args = ap.parse_args()
+
+    out_csv = Path(args.csv)
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    fingerprint.write_sidecar(out_csv.parent)
+
+    for k in args.kernel:
+        for t in args.dtype:
+            for b in args.bins:
+                print(f"== {Path(b).name} {k} {t}")
+                pts = adaptive_sweep(lambda N: run_bench(b, k, t, N, args.reps, args.warmup, out_csv),
+                                     args.lo, args.hi, coarse=args.coarse, rel_change=args.rel_change,
+                                     min_ratio=args.min_ratio, max_points=args.max_points,
+                                     align=args.align, verbose=True)
+                ws = ARRAYS.get(k, 2) * ELEM_BYTES[t]
+                for n0, n1, g0, g1 in find_knees(pts, args.rel_change):
+                    print(f"  knee: N {n0}..{n1} (working set {n0*ws/1024:.0f}..{n1*ws/1024:.0f} KiB), "
+                          f"{g0:.2f} -> {g1:.2f} GFLOP/s")
+                print(f"  {len(pts)} runs")
+
+    print(f"Done. Results in {out_csv}")
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,94 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-
-# Load CSV
-df = pd.read_csv("part6_data.csv")
-
-# Strip "ws_KiB=..." etc. if present
-for col in df.columns:
-    df[col] = df[col].astype(str).str.replace(r"^[a-zA-Z_]+=*", "", regex=True)
-
-num_cols = ["ws_KiB","stride","pattern","repeats","cycles","bytes"]
-for col in num_cols:
-    df[col] = pd.to_numeric(df[col], errors="coerce")
-
-# Compute metrics
-GHz = 3.0  # adjust for your CPU
-df["time_s"] = df["cycles"] / (GHz * 1e9)
-df["throughput_GiBps"] = df["bytes"] / df["time_s"] / (1024**3)
-df["ns_per_byte"] = (df["time_s"] / df["bytes"]) * 1e9
-
-# --- Throughput vs footprint with error bars ---
-plt.figure()
-for pat in df["pattern"].unique():
-    sub = df[df["pattern"] == pat]
-    grouped = sub.groupby("ws_KiB").agg(
-        mean_tp=("throughput_GiBps", "mean"),
-        std_tp=("throughput_GiBps", "std")
-    )
-    plt.errorbar(grouped.index, grouped["mean_tp"],
-                 yerr=grouped["std_tp"],
-                 marker="o", capsize=4, label=f"pattern {pat}")
-
-plt.xscale("log")
-plt.xlabel("Working set size (KiB, log scale)")
-plt.ylabel("Throughput (GiB/s)")
-plt.title("Cache impact: Throughput vs footprint")
-plt.legend()
-plt.savefig("part6_throughput_vs_ws.png", dpi=200)
-
-# --- Latency vs stride with error bars ---
-plt.figure()
-for pat in df["pattern"].unique():
-    sub = df[df["pattern"] == pat]
-    grouped = sub.groupby("stride").agg(
-        mean_lat=("ns_per_byte", "mean"),
-        std_lat=("ns_per_byte", "std")
-    )
-    plt.errorbar(grouped.index, grouped["mean_lat"],
-                 yerr=grouped["std_lat"],
-                 marker="x", capsize=4, label=f"pattern {pat}")
-
-plt.xscale("log")
-plt.xlabel("Stride (elements, log scale)")
-plt.ylabel("Latency (ns per byte)")
-plt.title("Cache impact: Latency vs stride")
-plt.legend()
-plt.savefig("part6_latency_vs_stride.png", dpi=200)
-
-print("✅ Saved plots with error bars: part6_throughput_vs_ws.png and part6_latency_vs_stride.png")
+import argparse
+import sys
+from pathlib import Path
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", default="part6_data.csv")
+    ap.add_argument("--db", help="Read saxpy rows from a results store (acslib/results_store.py) instead")
+    ap.add_argument("--ghz", type=float, default=3.0,
+                    help="rdtsc clock for rows without a measured tsc_ghz (runs not wrapped in acslib/perfctr.py)")
+    args = ap.parse_args(argv)
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    if args.db:
+        # Typed columns straight from the store
+        from acslib import results_store
+        df = results_store.query(results_store.connect(args.db), "saxpy_runs")
+    else:
+        # Load CSV; "ws_KiB=..." prefixes are stripped while parsing
+        from acslib.kvcsv import read_kv_csv
+        df = read_kv_csv(args.csv)
+
+    # Compute metrics; "cycles" are rdtsc ticks, so convert with the measured TSC rate when perf gave one
+    GHz = df["tsc_ghz"].fillna(args.ghz) if "tsc_ghz" in df else args.ghz
+    df["time_s"] = df["cycles"] / (GHz * 1e9)
+    df["throughput_GiBps"] = df["bytes"] / df["time_s"] / (1024**3)
+    df["ns_per_byte"] = (df["time_s"] / df["bytes"]) * 1e9
+
+    import matplotlib.pyplot as plt
+
+    # --- Throughput vs footprint with error bars ---
+    plt.figure()
+    for pat in df["pattern"].unique():
+        sub = df[df["pattern"] == pat]
+        grouped = sub.groupby("ws_KiB").agg(
+            mean_tp=("throughput_GiBps", "mean"),
+            std_tp=("throughput_GiBps", "std")
+        )
+        plt.errorbar(grouped.index, grouped["mean_tp"],
+                     yerr=grouped["std_tp"],
+                     marker="o", capsize=4, label=f"pattern {pat}")
+
+    plt.xscale("log")
+    plt.xlabel("Working set size (KiB, log scale)")
+    plt.ylabel("Throughput (GiB/s)")
+    plt.title("Cache impact: Throughput vs footprint")
+    plt.legend()
+    plt.savefig("part6_throughput_vs_ws.png", dpi=200)
+
+    # --- Latency vs stride with error bars ---
+    plt.figure()
+    for pat in df["pattern"].unique():
+        sub = df[df["pattern"] == pat]
+        grouped = sub.groupby("stride").agg(
+            mean_lat=("ns_per_byte", "mean"),
+            std_lat=("ns_per_byte", "std")
+        )
+        plt.errorbar(grouped.index, grouped["mean_lat"],
+                     yerr=grouped["std_lat"],
+                     marker="x", capsize=4, label=f"pattern {pat}")
+
+    plt.xscale("log")
+    plt.xlabel("Stride (elements, log scale)")
+    plt.ylabel("Latency (ns per byte)")
+    plt.title("Cache impact: Latency vs stride")
+    plt.legend()
+    plt.savefig("part6_latency_vs_stride.png", dpi=200)
+
+    # --- LLC misses per access vs footprint (rows measured under perf only) ---
+    saved = ["part6_throughput_vs_ws.png", "part6_latency_vs_stride.png"]
+    if "llc_misses" in df and df["llc_misses"].notna().any():
+        # Counters cover the whole process: the warmup pass plus `repeats` timed passes of N element updates
+        accesses = df["ws_KiB"] * 1024 / 4 * (df["repeats"] + 1)
+        df["llc_per_access"] = df["llc_misses"] / accesses
+        plt.figure()
+        for pat in df["pattern"].unique():
+            sub = df[(df["pattern"] == pat) & df["llc_per_access"].notna()]
+            grouped = sub.groupby("ws_KiB")["llc_per_access"].agg(["mean", "std"])
+            plt.errorbar(grouped.index, grouped["mean"], yerr=grouped["std"],
+                         marker="o", capsize=4, label=f"pattern {pat}")
+        plt.xscale("log")
+        plt.xlabel("Working set size (KiB, log scale)")
+        plt.ylabel("LLC load misses per element update")
+        plt.title("Cache impact: LLC misses vs footprint")
+        plt.legend()
+        plt.savefig("part6_llc_misses_per_access.png", dpi=200)
+        saved.append("part6_llc_misses_per_access.png")
+    if "ghz" in df and df["ghz"].notna().any():
+        print(f"Measured core clock: {df['ghz'].min():.2f}-{df['ghz'].max():.2f} GHz")
+
+    print("✅ Saved plots with error bars: " + " and ".join(saved))
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,72 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-
-# Load CSV (same format as part6)
-df = pd.read_csv("part6_data.csv")
-
-# Strip prefixes if present
-for col in df.columns:
-    df[col] = df[col].astype(str).str.replace(r"^[a-zA-Z_]+=*", "", regex=True)
-
-num_cols = ["ws_KiB","stride","pattern","repeats","cycles","bytes"]
-for col in num_cols:
-    df[col] = pd.to_numeric(df[col], errors="coerce")
-
-# Metrics
-GHz = 3.0  # adjust if you know
-df["time_s"] = df["cycles"] / (GHz * 1e9)
-df["throughput_GiBps"] = df["bytes"] / df["time_s"] / (1024**3)
-df["ns_per_byte"] = (df["time_s"] / df["bytes"]) * 1e9
-
-# Group by stride for error bars
-grouped = df.groupby("stride").agg(
-    mean_tp=("throughput_GiBps","mean"),
-    std_tp=("throughput_GiBps","std"),
-    mean_lat=("ns_per_byte","mean"),
-    std_lat=("ns_per_byte","std")
-)
-
-# Plot throughput vs stride
-plt.errorbar(grouped.index, grouped["mean_tp"], 
-             yerr=grouped["std_tp"], marker="o", capsize=4)
-plt.xscale("log")
-plt.xlabel("Stride (elements, log scale)")
-plt.ylabel("Throughput (GiB/s)")
-plt.title("TLB impact: Throughput vs stride (large footprint)")
-plt.savefig("part7_throughput_vs_stride.png", dpi=200)
-plt.clf()
-
-# Plot latency vs stride
-plt.errorbar(grouped.index, grouped["mean_lat"], 
-             yerr=grouped["std_lat"], marker="x", capsize=4)
-plt.xscale("log")
-plt.xlabel("Stride (elements, log scale)")
-plt.ylabel("Latency (ns per byte)")
-plt.title("TLB impact: Latency vs stride (large footprint)")
-plt.savefig("part7_latency_vs_stride.png", dpi=200)
-
-print("✅ Saved plots: part7_throughput_vs_stride.png and part7_latency_vs_stride.png")
+import argparse
+import sys
+from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from acslib.kvcsv import read_kv_csv
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", default="part6_data.csv")
+    ap.add_argument("--ghz", type=float, default=3.0,
+                    help="rdtsc clock for rows without a measured tsc_ghz (runs not wrapped in acslib/perfctr.py)")
+    args = ap.parse_args(argv)
+
+    # Load CSV (same format as part6); prefixes are stripped while parsing
+    df = read_kv_csv(args.csv)
+
+    # Metrics; "cycles" are rdtsc ticks, so convert with the measured TSC rate when perf gave one
+    GHz = df["tsc_ghz"].fillna(args.ghz) if "tsc_ghz" in df else args.ghz
+    df["time_s"] = df["cycles"] / (GHz * 1e9)
+    df["throughput_GiBps"] = df["bytes"] / df["time_s"] / (1024**3)
+    df["ns_per_byte"] = (df["time_s"] / df["bytes"]) * 1e9
+
+    import matplotlib.pyplot as plt
+
+    # Group by stride for error bars
+    grouped = df.groupby("stride").agg(
+        mean_tp=("throughput_GiBps","mean"),
+        std_tp=("throughput_GiBps","std"),
+        mean_lat=("ns_per_byte","mean"),
+        std_lat=("ns_per_byte","std")
+    )
+
+    # Plot throughput vs stride
+    plt.errorbar(grouped.index, grouped["mean_tp"], 
+                 yerr=grouped["std_tp"], marker="o", capsize=4)
+    plt.xscale("log")
+    plt.xlabel("Stride (elements, log scale)")
+    plt.ylabel("Throughput (GiB/s)")
+    plt.title("TLB impact: Throughput vs stride (large footprint)")
+    plt.savefig("part7_throughput_vs_stride.png", dpi=200)
+    plt.clf()
+
+    # Plot latency vs stride
+    plt.errorbar(grouped.index, grouped["mean_lat"], 
+                 yerr=grouped["std_lat"], marker="x", capsize=4)
+    plt.xscale("log")
+    plt.xlabel("Stride (elements, log scale)")
+    plt.ylabel("Latency (ns per byte)")
+    plt.title("TLB impact: Latency vs stride (large footprint)")
+    plt.savefig("part7_latency_vs_stride.png", dpi=200)
+
+    saved = ["part7_throughput_vs_stride.png", "part7_latency_vs_stride.png"]
+
+    # Plot measured dTLB misses per access vs stride (rows run under perf only)
+    if "dtlb_misses" in df and df["dtlb_misses"].notna().any():
+        # Whole-process counts: the warmup pass plus `repeats` timed passes of N element updates
+        df["dtlb_per_access"] = df["dtlb_misses"] / (df["ws_KiB"] * 1024 / 4 * (df["repeats"] + 1))
+        tlb = df[df["dtlb_per_access"].notna()].groupby("stride")["dtlb_per_access"].agg(["mean", "std"])
+        plt.errorbar(tlb.index, tlb["mean"], yerr=tlb["std"], marker="s", capsize=4)
+        plt.xscale("log")
+        plt.xlabel("Stride (elements, log scale)")
+        plt.ylabel("dTLB load misses per element update")
+        plt.title("TLB impact: dTLB misses vs stride (large footprint)")
+        plt.savefig("part7_dtlb_misses_per_access.png", dpi=200)
+        plt.clf()
+        saved.append("part7_dtlb_misses_per_access.png")
+
+    print("✅ Saved plots: " + " and ".join(saved))
+
+if __name__ == "__main__":
+    main()
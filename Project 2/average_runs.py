@@ -1,32 +1,44 @@
+import sys
+from pathlib import Path
 import pandas as pd
 import glob
 
-# Find all run CSVs
-files = glob.glob("results/csv/microbench_results_run*.csv")
-dfs = []
-
-for f in files:
-    df = pd.read_csv(f)
-    # Clean columns (remove "time=" and "GiB/s=" strings)
-    df['time'] = df['time'].astype(str).str.replace("time=","").astype(float)
-    df['GiB/s'] = df['GiB/s'].astype(str).str.replace("GiB/s=","").astype(float)
-    dfs.append(df)
-
-# Concatenate all runs
-data = pd.concat(dfs)
-
-# Group by unique experiment parameters
-grouped = data.groupby(
-    ["N_bytes", "stride", "repeats", "read_pct", "threads"]
-).agg(
-    mean_time=("time","mean"),
-    std_time=("time","std"),
-    mean_bw=("GiB/s","mean"),
-    std_bw=("GiB/s","std"),
-    count=("time","count")
-).reset_index()
-
-# Save
-out_path = "results/csv/microbench_results_avg.csv"
-grouped.to_csv(out_path, index=False)
-print(f"Averaged results saved to {out_path}")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from acslib.kvcsv import fill_mode, read_kv_csv
+from acslib.stats import group_median_ci
+
+def main(argv=None):
+    # Run CSVs given on the command line (e.g. the raw samples from run_microbench_ci.py), else all runs
+    files = (sys.argv[1:] if argv is None else argv) or glob.glob("results/csv/microbench_results_run*.csv")
+
+    # "N_bytes=", "time=", "GiB/s=" ... prefixes are stripped while parsing, so the
+    # grouping keys below are numbers rather than strings
+    dfs = [read_kv_csv(f) for f in files]
+
+    # Concatenate all runs; runs from before microbench had access modes count as mode=rand
+    data = fill_mode(pd.concat(dfs))
+
+    # Group by unique experiment parameters
+    grouped = data.groupby(
+        ["N_bytes", "stride", "repeats", "read_pct", "threads", "mode"]
+    ).agg(
+        mean_time=("time","mean"),
+        std_time=("time","std"),
+        mean_bw=("GiB/s","mean"),
+        std_bw=("GiB/s","std"),
+        count=("time","count")
+    ).reset_index()
+
+    # Median and 95% bootstrap CI of bandwidth: the error bars plot_microbench.py draws
+    keys = ["N_bytes", "stride", "repeats", "read_pct", "threads", "mode"]
+    ci = group_median_ci(data, keys, "GiB/s").rename(columns={
+        "median_GiB/s": "median_bw", "ci_lo_GiB/s": "ci_lo_bw", "ci_hi_GiB/s": "ci_hi_bw"})
+    grouped = grouped.merge(ci, on=keys, how="left")
+
+    # Save
+    out_path = "results/csv/microbench_results_avg.csv"
+    grouped.to_csv(out_path, index=False)
+    print(f"Averaged results saved to {out_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import argparse, io, math, os, subprocess, sys, time
+from pathlib import Path
+
+import pandas as pd
+import matplotlib.pyplot as plt
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from acslib import fingerprint
+from acslib.sweep import step_fit
+
+# Dense pointer-chase latency curve (ptrchase_latency.cpp), then a change-point fit over
+# log latency that reports each cache level's capacity and load latency.
+# --pages both runs the sweep with 4 KiB and transparent huge pages, so the part of
+# the rise that is TLB misses (gone with huge pages) can be told from cache misses.
+# The default sweep (52 sizes, 4 KiB..512 MiB) takes about 13 s on the build machine,
+# less than the four fixed sizes ptrchase used to time (16 s).
+
+FIG_DIR = "figures"
+
+def run_curve(args, huge):
+    cmd = [args.bin, "--min", str(args.lo), "--max", str(args.hi), "--per-octave", str(args.per_octave),
+           "--trials", str(args.trials)] + (["--hugepages"] if huge else [])
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    first, _, rest = out.partition("\n")
+    df = pd.read_csv(io.StringIO(rest)).rename(columns={"cycles/load": "cycles_per_load", "ns/load": "ns_per_load"})
+    df.insert(0, "tsc_ghz", float(first.split("=", 1)[1]))
+    return df
+
+def fit_levels(df, max_levels, min_points, caches=None):
+    """One row per plateau: name, largest size still on it, median ns/load.
+
+    caches lists the cache sizes, L1 first (fingerprint.cache_sizes). When given, the
+    fit uses at most one plateau per cache level plus DRAM, so the ramps between
+    levels cannot pass for levels of their own. Plateaus are then named in order,
+    skipping any level a plateau already starts past; DRAM is what comes after the
+    last cache level. Without it, the last of several plateaus is DRAM.
+    """
+    df = df.sort_values("bytes").reset_index(drop=True)
+    if caches:
+        max_levels = min(max_levels, len(caches) + 1)
+    segs = step_fit([math.log(v) for v in df["ns_per_load"]], max_segments=max_levels, min_len=min_points)
+    rows, level = [], 0
+    for k, (i, j) in enumerate(segs):
+        seg = df.iloc[i:j]
+        if caches:
+            start = seg["bytes"].iloc[0]
+            level = max(level + 1, next((n for n, size in enumerate(caches, 1) if start <= size), len(caches) + 1))
+            name = f"L{level}" if level <= len(caches) else "DRAM"
+        else:
+            name = "DRAM" if k == len(segs) - 1 and k > 0 else f"L{k + 1}"
+        rows.append({"level": name, "min_bytes": int(seg["bytes"].iloc[0]), "max_bytes": int(seg["bytes"].iloc[-1]),
+                     "ns_per_load": seg["ns_per_load"].median(), "cycles_per_load": seg["cycles_per_load"].median(),
+                     "points": j - i})
+    return pd.DataFrame(rows)
+
+def fmt_bytes(b):
+    return f"{b / 2**20:.4g} MiB" if b >= 2**20 else f"{b / 1024:.4g} KiB"
+
+def main():
+    ap = argparse.ArgumentParser(description="Pointer-chase latency curve with automatic cache-level detection")
+    ap.add_argument("--bin", default="./bin/ptrchase")
+    ap.add_argument("--lo", type=int, default=4096, help="Smallest working set (bytes)")
+    ap.add_argument("--hi", type=int, default=512 * 1024 * 1024, help="Largest working set (bytes)")
+    ap.add_argument("--per-octave", type=int, default=3, help="Sizes per doubling of the working set")
+    ap.add_argument("--trials", type=int, default=5, help="Timed chains per size (median is reported)")
+    ap.add_argument("--pages", choices=["4k", "huge", "both"], default="4k")
+    ap.add_argument("--max-levels", type=int, default=6, help="Most plateaus the fit may use (cache levels + DRAM)")
+    ap.add_argument("--caches", type=int, nargs="+", default=[v for _, v in sorted(fingerprint.cache_sizes().items())],
+                    metavar="BYTES", help="Cache sizes, L1 first, that cap and name the levels (default: from sysfs)")
+    ap.add_argument("--csv", default="results/csv/latency_curve.csv")
+    args = ap.parse_args()
+
+    if not Path(args.bin).exists():
+        sys.exit("ERROR: ptrchase binary not found. Run: make")
+    t0 = time.time()
+    modes = {"4k": [False], "huge": [True], "both": [False, True]}[args.pages]
+    curves = [run_curve(args, huge) for huge in modes]
+    df = pd.concat(curves, ignore_index=True)
+    df.insert(0, "ts", time.strftime("%Y-%m-%d %H:%M:%S"))
+    Path(args.csv).parent.mkdir(parents=True, exist_ok=True)
+    fingerprint.write_sidecar(Path(args.csv).parent)
+    df.to_csv(args.csv, index=False)
+    print(f"{len(df)} sizes in {time.time() - t0:.1f} s, TSC {df['tsc_ghz'].iloc[0]:.3f} GHz. Saved {args.csv}")
+
+    os.makedirs(FIG_DIR, exist_ok=True)
+    plt.figure(figsize=(9, 6))
+    all_levels = []
+    for curve in curves:
+        pages = "2 MiB (THP)" if curve["hugepages"].iloc[0] else "4 KiB"
+        # A level must span at least an octave; shorter runs are the slopes between levels
+        levels = fit_levels(curve, args.max_levels, args.per_octave + 1, args.caches)
+        levels.insert(0, "hugepages", int(curve["hugepages"].iloc[0]))
+        all_levels.append(levels)
+        print(f"\n{pages} pages:")
+        for r in levels.itertuples():
+            print(f"  {r.level:>4}: up to {fmt_bytes(r.max_bytes):>10}  {r.ns_per_load:7.2f} ns/load "
+                  f"({r.cycles_per_load:.1f} TSC cycles, {r.points} points)")
+        line, = plt.plot(curve["bytes"], curve["ns_per_load"], marker=".", label=f"{pages} pages")
+        for r in levels.itertuples():
+            plt.hlines(r.ns_per_load, r.min_bytes, r.max_bytes, colors=line.get_color(), linewidth=3, alpha=0.4)
+        for r in levels.iloc[:-1].itertuples():
+            plt.axvline(r.max_bytes, color=line.get_color(), linestyle=":", alpha=0.6)
+
+    levels = pd.concat(all_levels, ignore_index=True)
+    levels_csv = str(Path(args.csv).with_name(Path(args.csv).stem + "_levels.csv"))
+    levels.to_csv(levels_csv, index=False)
+    if len(curves) == 2:
+        # Same sizes in both runs: the huge-page saving at each size is the TLB-miss part
+        tlb = curves[0]["ns_per_load"].to_numpy() - curves[1]["ns_per_load"].to_numpy()
+        i = tlb.argmax()
+        print(f"\nLargest TLB share: {tlb[i]:.1f} ns/load at {fmt_bytes(curves[0]['bytes'].iloc[i])}")
+
+    plt.xscale("log", base=2)
+    plt.yscale("log")
+    plt.xlabel("Working set (bytes, log2)")
+    plt.ylabel("Load-to-use latency (ns, log)")
+    plt.title("Pointer-chase latency curve (bars: fitted levels)")
+    plt.grid(True, which="both", linestyle=":")
+    plt.legend()
+    out = os.path.join(FIG_DIR, "latency_curve.png")
+    plt.savefig(out, dpi=150, bbox_inches="tight")
+    print(f"Levels saved to {levels_csv}, plot to {out}")
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,27 @@
 #include <stdint.h>
 #include <time.h>
 #include <string.h>
+#include <sched.h>
 #include <omp.h>
+#ifdef __SSE2__
+#include <emmintrin.h>
+#endif
 
 #define ALIGN 64
+// branchless mode: the accessed elements are taken in blocks of MIX_BLOCK (100 cache lines
+// at stride 1), the first read% of each block are read and the rest written
+#define MIX_BLOCK 1600
+
+// How each accessed element is read or written:
+//   rand        rand_r per element picks read or write (the original loop; the RNG dominates)
+//   mask        read/write choice drawn up front into a byte mask, one branch per element
+//   branchless  fixed read/write runs per MIX_BLOCK elements, straight-line vectorizable loops
+//   read        sum of x (read% is reported as 100)
+//   ntstore     non-temporal stores to y, bypassing the caches (read% is reported as 0)
+// Reads always feed a reduction that ends up in `sink`, so the compiler cannot drop them.
+enum { MODE_RAND, MODE_MASK, MODE_BRANCHLESS, MODE_READ, MODE_NTSTORE, N_MODES };
+static const char *MODE_NAMES[N_MODES] = {"rand", "mask", "branchless", "read", "ntstore"};
+static volatile double sink;
 
 static void* xaligned_alloc(size_t alignment, size_t size) {
     void* p = NULL;
@@ -21,9 +39,55 @@ static double now_sec(void) {
     return ts.tv_sec + ts.tv_nsec * 1e-9;
 }
 
+// Static split of the n accessed elements: thread t gets [*lo, *hi)
+static void thread_range(size_t n, int t, int nt, size_t *lo, size_t *hi) {
+    *lo = n * t / nt;
+    *hi = n * (t + 1) / nt;
+}
+
+// Unit stride gets its own loop so it compiles to plain vector loads/stores, not gathers
+static float sum_range(const float *x, size_t lo, size_t hi, size_t stride) {
+    float acc = 0.0f;
+    if (stride == 1) {
+        #pragma omp simd reduction(+:acc)
+        for (size_t k = lo; k < hi; k++) acc += x[k];
+    } else {
+        for (size_t k = lo; k < hi; k++) acc += x[k * stride];
+    }
+    return acc;
+}
+
+static void add_range(float *y, size_t lo, size_t hi, size_t stride) {
+    if (stride == 1) {
+        #pragma omp simd
+        for (size_t k = lo; k < hi; k++) y[k] += 1.0f;
+    } else {
+        for (size_t k = lo; k < hi; k++) y[k * stride] += 1.0f;
+    }
+}
+
+static void stream_range(float *y, size_t lo, size_t hi, size_t stride, float v) {
+#ifdef __SSE2__
+    int bits;
+    memcpy(&bits, &v, sizeof bits);
+    size_t k = lo;
+    if (stride == 1) {
+        for (; k < hi && ((uintptr_t)&y[k] & 15); k++) _mm_stream_si32((int*)&y[k], bits);
+        __m128 vv = _mm_set1_ps(v);
+        for (; k + 4 <= hi; k += 4) _mm_stream_ps(&y[k], vv);
+    }
+    for (; k < hi; k++) _mm_stream_si32((int*)&y[k * stride], bits);
+    _mm_sfence();
+#else
+    #pragma omp simd
+    for (size_t k = lo; k < hi; k++) y[k * stride] = v;
+#endif
+}
+
 int main(int argc, char** argv) {
     if (argc < 6) {
-        fprintf(stderr, "Usage: %s <N_bytes> <stride_elems> <repeats> <rw_mix_percent_read> <threads>\n", argv[0]);
+        fprintf(stderr, "Usage: %s <N_bytes> <stride_elems> <repeats> <rw_mix_percent_read> <threads> "
+                "[rand|mask|branchless|read|ntstore (default mask)]\n", argv[0]);
         return 1;
     }
 
@@ -32,8 +96,16 @@ int main(int argc, char** argv) {
     size_t repeats   = strtoull(argv[3], NULL, 10);
     int read_percent = atoi(argv[4]);  // 0..100
     int nthreads     = atoi(argv[5]);
+    int mode = MODE_MASK;
+    if (argc > 6) {
+        for (mode = 0; mode < N_MODES && strcmp(argv[6], MODE_NAMES[mode]); mode++) {}
+        if (mode == N_MODES) { fprintf(stderr, "unknown mode %s\n", argv[6]); return 1; }
+    }
+    if (mode == MODE_READ) read_percent = 100;
+    if (mode == MODE_NTSTORE) read_percent = 0;
 
     size_t N = N_bytes / sizeof(float);
+    size_t n_acc = stride ? (N + stride - 1) / stride : 0;  // elements accessed per pass
     float *x = (float*)xaligned_alloc(ALIGN, N * sizeof(float));
     float *y = (float*)xaligned_alloc(ALIGN, N * sizeof(float));
     if (!x || !y) { fprintf(stderr, "alloc failed\n"); return 1; }
@@ -41,34 +113,102 @@ int main(int argc, char** argv) {
     for (size_t i=0; i<N; i++) { x[i] = 1.0f; y[i] = 2.0f; }
 
     omp_set_num_threads(nthreads);
+    // MICROBENCH_THREAD_STATS=1: one stderr line per thread with the CPU it ran on and
+    // its own bandwidth (its elements over its time in the loop, barrier waits excluded)
+    int thread_stats = getenv("MICROBENCH_THREAD_STATS") && atoi(getenv("MICROBENCH_THREAD_STATS"));
+    double *t_busy = calloc(nthreads, sizeof(double));
+    size_t *n_done = calloc(nthreads, sizeof(size_t));
+    int *cpu = calloc(nthreads, sizeof(int));
+    double *sums = calloc(nthreads, sizeof(double));
+
+    // mask mode: the same read/write draw the rand loop makes, done before the clock starts
+    // (one byte per accessed element, touched by the thread that will read it)
+    unsigned char *is_read = NULL;
+    if (mode == MODE_MASK) {
+        is_read = malloc(n_acc ? n_acc : 1);
+        if (!is_read) { fprintf(stderr, "alloc failed\n"); return 1; }
+        #pragma omp parallel
+        {
+            int tid = omp_get_thread_num();
+            unsigned int seed = 1234 + tid;
+            size_t lo, hi;
+            thread_range(n_acc, tid, omp_get_num_threads(), &lo, &hi);
+            for (size_t k = lo; k < hi; k++) is_read[k] = rand_r(&seed) % 100 < read_percent;
+        }
+    }
 
     double t0 = now_sec();
     #pragma omp parallel
     {
-        unsigned int seed = 1234 + omp_get_thread_num();
+        int tid = omp_get_thread_num();
+        int nt = omp_get_num_threads();
+        unsigned int seed = 1234 + tid;
+        double busy = 0.0, acc = 0.0;
+        size_t done = 0, lo, hi;
+        thread_range(n_acc, tid, nt, &lo, &hi);
         for (size_t r=0; r<repeats; r++) {
-            #pragma omp for schedule(static)
-            for (size_t i=0; i<N; i+=stride) {
-                int roll = rand_r(&seed) % 100;
-                if (roll < read_percent) {
-                    float tmp = x[i]; // read
-                    (void)tmp;
+            double a = now_sec();
+            if (mode == MODE_RAND) {
+                #pragma omp for schedule(static) nowait
+                for (size_t i=0; i<N; i+=stride) {
+                    int roll = rand_r(&seed) % 100;
+                    if (roll < read_percent) {
+                        acc += x[i];      // read
+                    } else {
+                        y[i] += 1.0f;     // write
+                    }
+                    done++;
+                }
+            } else {
+                if (mode == MODE_MASK) {
+                    float s = 0.0f;
+                    for (size_t k = lo; k < hi; k++) {
+                        if (is_read[k]) s += x[k * stride];
+                        else y[k * stride] += 1.0f;
+                    }
+                    acc += s;
+                } else if (mode == MODE_BRANCHLESS) {
+                    size_t n_rd = (size_t)read_percent * MIX_BLOCK / 100;
+                    for (size_t b = lo - lo % MIX_BLOCK; b < hi; b += MIX_BLOCK) {
+                        size_t b_lo = b < lo ? lo : b, b_hi = b + MIX_BLOCK < hi ? b + MIX_BLOCK : hi;
+                        size_t split = b + n_rd < b_lo ? b_lo : (b + n_rd > b_hi ? b_hi : b + n_rd);
+                        acc += sum_range(x, b_lo, split, stride);
+                        add_range(y, split, b_hi, stride);
+                    }
+                } else if (mode == MODE_READ) {
+                    acc += sum_range(x, lo, hi, stride);
                 } else {
-                    y[i] += 1.0f;     // write
+                    stream_range(y, lo, hi, stride, (float)r);
                 }
+                done += hi - lo;
             }
+            busy += now_sec() - a;
+            #pragma omp barrier
+        }
+        if (tid < nthreads) {
+            t_busy[tid] = busy; n_done[tid] = done; cpu[tid] = sched_getcpu(); sums[tid] = acc;
         }
     }
     double t1 = now_sec();
+    double total = 0.0;
+    for (int t = 0; t < nthreads; t++) total += sums[t];
+    sink = total;
 
     double secs = t1 - t0;
-    double bytes_accessed = (double)(N/stride) * repeats * sizeof(float);
+    double bytes_accessed = (double)n_acc * repeats * sizeof(float);
     double gib = bytes_accessed / (1024.0*1024.0*1024.0);
     double gibps = gib / secs;
 
-    printf("N_bytes=%zu,stride=%zu,repeats=%zu,read%%=%d,threads=%d,time=%.6f,GiB/s=%.3f\n",
-           N_bytes, stride, repeats, read_percent, nthreads, secs, gibps);
+    printf("N_bytes=%zu,stride=%zu,repeats=%zu,read%%=%d,threads=%d,mode=%s,time=%.6f,GiB/s=%.3f\n",
+           N_bytes, stride, repeats, read_percent, nthreads, MODE_NAMES[mode], secs, gibps);
+    if (thread_stats) {
+        for (int t = 0; t < nthreads; t++) {
+            double tg = (double)n_done[t] * sizeof(float) / (1024.0*1024.0*1024.0);
+            fprintf(stderr, "thread=%d,cpu=%d,time=%.6f,GiB/s=%.3f\n",
+                    t, cpu[t], t_busy[t], t_busy[t] > 0 ? tg / t_busy[t] : 0.0);
+        }
+    }
 
-    free(x); free(y);
+    free(x); free(y); free(t_busy); free(n_done); free(cpu); free(sums); free(is_read);
     return 0;
 }
@@ -0,0 +1,30 @@
+# The sweeps run_microbench.sh performs, as (N_bytes, stride, read_pct, threads) in its order
+import os
+
+MiB = 1024 * 1024
+
+WORKING_SET = [(n, 1, 100, 1) for n in (32768, 262144, 2097152, 32 * MiB, 256 * MiB, 512 * MiB)]
+STRIDE = [(64 * MiB, s, 100, 1) for s in (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)]
+RW_MIX = [(64 * MiB, 1, rw, 1) for rw in (100, 70, 50, 0)]
+# Every thread count up to the CPU count, so usl_fit.py has a curve to fit
+INTENSITY = [(256 * MiB, 1, 100, t) for t in range(1, (os.cpu_count() or 1) + 1)]
+CONFIGS = WORKING_SET + STRIDE + RW_MIX + INTENSITY
+
+# microbench.c access modes (its last argument). The first three honour read_pct; read is
+# a pure read reduction and ntstore pure non-temporal stores, whatever read_pct says.
+MODES = ["mask", "branchless", "read", "ntstore", "rand"]
+MIX_MODES = ("mask", "branchless", "rand")
+DEFAULT_MODE = "mask"
+
+HEADER = "ts,N_bytes,stride,repeats,read_pct,threads,mode,time,GiB/s\n"
+
+
+def mode_configs(modes):
+    """(N_bytes, stride, read_pct, threads, mode) for every sweep point of every mode,
+    without the read/write mix sweep for modes that ignore read_pct."""
+    return [cfg + (m,) for m in modes for cfg in CONFIGS if m in MIX_MODES or cfg not in RW_MIX[1:]]
+
+
+def parse_line(line):
+    """microbench stdout line (N_bytes=...,GiB/s=...) -> dict of strings."""
+    return dict(kv.split("=", 1) for kv in line.strip().split(","))
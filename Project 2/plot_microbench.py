@@ -1,91 +1,145 @@
+import argparse
 import os
+import sys
+from pathlib import Path
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from acslib import figures
+from acslib.kvcsv import fill_mode, read_kv_csv
+from acslib.stats import group_median_ci
+from microbench_configs import MIX_MODES, MODES
+from usl_fit import fit_usl, usl
 
 CSV_PATH = "results/csv/microbench_results_avg.csv"  # averaged results
 FIG_DIR = "figures"
-os.makedirs(FIG_DIR, exist_ok=True)
-
-# --- Load data ---
-df = pd.read_csv(CSV_PATH)
-
-# --- Clean up columns if they still have prefixes ---
-def strip_prefix(series, prefix):
-    return series.astype(str).str.replace(prefix, "", regex=False).astype(float)
-
-if df['N_bytes'].astype(str).str.contains("N_bytes=").any():
-    df['N_bytes'] = strip_prefix(df['N_bytes'], "N_bytes=")
-else:
-    df['N_bytes'] = pd.to_numeric(df['N_bytes'], errors="coerce")
-
-if df['stride'].astype(str).str.contains("stride=").any():
-    df['stride'] = strip_prefix(df['stride'], "stride=")
-else:
-    df['stride'] = pd.to_numeric(df['stride'], errors="coerce")
-
-if df['read_pct'].astype(str).str.contains("read%=").any():
-    df['read_pct'] = strip_prefix(df['read_pct'], "read%=")
-else:
-    df['read_pct'] = pd.to_numeric(df['read_pct'], errors="coerce")
-
-if df['threads'].astype(str).str.contains("threads=").any():
-    df['threads'] = strip_prefix(df['threads'], "threads=")
-else:
-    df['threads'] = pd.to_numeric(df['threads'], errors="coerce")
-
-# Ensure mean/std columns are numeric
-df['mean_bw'] = pd.to_numeric(df['mean_bw'], errors='coerce')
-df['std_bw'] = pd.to_numeric(df['std_bw'], errors='coerce')
-
-# ---- Plot 1: Working-set sweep ----
-ws = df[(df['stride']==1)&(df['read_pct']==100)&(df['threads']==1)]
-ws = ws.sort_values('N_bytes')
-plt.figure()
-plt.errorbar(ws['N_bytes']/1024, ws['mean_bw'], yerr=ws['std_bw'],
-             marker='o', capsize=3)
-plt.xscale('log', base=2)
-plt.xlabel("Working Set Size (KB, log2)")
-plt.ylabel("Bandwidth (GiB/s)")
-plt.title("Working-set Sweep")
-plt.grid(True, which="both")
-plt.tight_layout()
-plt.savefig(os.path.join(FIG_DIR, "working_set_sweep.png"))
-
-# ---- Plot 2: Stride sweep ----
-stride = df[(df['N_bytes']==64*1024*1024)&(df['read_pct']==100)&(df['threads']==1)]
-stride = stride.sort_values('stride')
-plt.figure()
-plt.errorbar(stride['stride'], stride['mean_bw'], yerr=stride['std_bw'],
-             marker='o', capsize=3)
-plt.xscale('log', base=2)
-plt.xlabel("Stride (elements, log2)")
-plt.ylabel("Bandwidth (GiB/s)")
-plt.title("Stride Sweep (64MB)")
-plt.grid(True, which="both")
-plt.tight_layout()
-plt.savefig(os.path.join(FIG_DIR, "stride_sweep.png"))
-
-# ---- Plot 3: Read/Write mix ----
-rw = df[(df['N_bytes']==64*1024*1024)&(df['stride']==1)&(df['threads']==1)]
-plt.figure()
-plt.bar(rw['read_pct'], rw['mean_bw'], yerr=rw['std_bw'], capsize=3)
-plt.xlabel("Read %")
-plt.ylabel("Bandwidth (GiB/s)")
-plt.title("Read/Write Mix (64MB, stride=1)")
-plt.tight_layout()
-plt.savefig(os.path.join(FIG_DIR, "rw_mix.png"))
-
-# ---- Plot 4: Intensity sweep ----
-intens = df[(df['N_bytes']==256*1024*1024)&(df['stride']==1)&(df['read_pct']==100)]
-intens = intens.sort_values('threads')
-plt.figure()
-plt.errorbar(intens['threads'], intens['mean_bw'], yerr=intens['std_bw'],
-             marker='o', capsize=3)
-plt.xlabel("Threads")
-plt.ylabel("Bandwidth (GiB/s)")
-plt.title("Intensity Sweep (256MB, 100% Read)")
-plt.grid(True)
-plt.tight_layout()
-plt.savefig(os.path.join(FIG_DIR, "intensity_sweep.png"))
-
-print("✅ Plots with error bars saved in figures/")
+
+
+def csv_loader(path):
+    # Prefixes such as "N_bytes=" or "read%=" are stripped while parsing
+    df = fill_mode(read_kv_csv(path))
+
+    def load_slice(**filters):
+        mask = pd.Series(True, index=df.index)
+        for col, val in filters.items():
+            mask &= df[col] == val
+        return df[mask]
+    return load_slice
+
+
+def db_loader(path):
+    # Each plot pulls only its own slice; mean/std are aggregated by SQLite
+    from acslib import results_store
+    conn = results_store.connect(path)
+
+    def load_slice(**filters):
+        summary = results_store.microbench_summary(conn, **filters)
+        raw = results_store.query(conn, "microbench_runs", **filters)
+        keys = ["N_bytes", "stride", "repeats", "read_pct", "threads", "mode"]
+        ci = group_median_ci(raw, keys, "gibps").rename(columns={
+            "median_gibps": "median_bw", "ci_lo_gibps": "ci_lo_bw", "ci_hi_gibps": "ci_hi_bw"})
+        return summary.merge(ci, on=keys, how="left")
+    return load_slice
+
+
+def bw_and_err(sub):
+    # Median with its bootstrap CI when the summary has one, else the old mean +- std
+    if "ci_lo_bw" in sub and sub["ci_lo_bw"].notna().all():
+        y = sub["median_bw"].to_numpy()
+        return y, [y - sub["ci_lo_bw"].to_numpy(), sub["ci_hi_bw"].to_numpy() - y]
+    return sub["mean_bw"].to_numpy(), sub["std_bw"].to_numpy()
+
+
+def mode_slices(load_slice, modes, **filters):
+    """{mode: rows} for the modes that have rows. read and ntstore record read_pct as 100/0
+    whatever was asked, so they are not filtered on it."""
+    out = {}
+    for m in modes:
+        f = dict(filters, mode=m)
+        if m not in MIX_MODES:
+            f.pop("read_pct", None)
+        sub = load_slice(**f)
+        if len(sub):
+            out[m] = sub
+    return out
+
+
+def mode_tag(slices):
+    # A single mode goes in the title; several get a legend
+    return f" [{next(iter(slices))}]" if len(slices) == 1 else ""
+
+
+def errorbar_job(name, title, xlabel, col, slices, scale=1, xscale=None, grid=None):
+    """One errorbar series per access mode, x = slices[mode][col] / scale."""
+    series = []
+    for mode, sub in slices.items():
+        sub = sub.sort_values(col)
+        y, yerr = bw_and_err(sub)
+        series.append({"kind": "errorbar", "x": sub[col].to_numpy() / scale, "y": y, "yerr": yerr,
+                       "label": mode, "style": {"marker": "o", "capsize": 3}})
+    return {"out": os.path.join(FIG_DIR, name), "title": title + mode_tag(slices), "xlabel": xlabel,
+            "ylabel": "Bandwidth (GiB/s)", "xscale": xscale, "grid": grid, "tight_layout": True,
+            "legend": len(series) > 1, "series": series}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", default=CSV_PATH)
+    ap.add_argument("--db", help="Read per-run rows from a results store (acslib/results_store.py) instead")
+    ap.add_argument("--jobs", "-j", type=int, default=1,
+                    help="Render figures in this many worker processes (0 = all cores)")
+    ap.add_argument("--mode", nargs="+", choices=MODES, default=MODES,
+                    help="microbench access modes to plot, one series each (default: every mode with data)")
+    args = ap.parse_args(argv)
+
+    os.makedirs(FIG_DIR, exist_ok=True)
+    load_slice = db_loader(args.db) if args.db else csv_loader(args.csv)
+    jobs = []
+
+    # ---- Plot 1: Working-set sweep ----
+    ws = mode_slices(load_slice, args.mode, stride=1, read_pct=100, threads=1)
+    jobs.append(errorbar_job("working_set_sweep.png", "Working-set Sweep", "Working Set Size (KB, log2)",
+                             "N_bytes", ws, scale=1024, xscale=("log", {"base": 2}), grid={"which": "both"}))
+
+    # ---- Plot 2: Stride sweep ----
+    stride = mode_slices(load_slice, args.mode, N_bytes=64*1024*1024, read_pct=100, threads=1)
+    jobs.append(errorbar_job("stride_sweep.png", "Stride Sweep (64MB)", "Stride (elements, log2)",
+                             "stride", stride, xscale=("log", {"base": 2}), grid={"which": "both"}))
+
+    # ---- Plot 3: Read/Write mix (modes that honour read%; bars side by side) ----
+    rw = mode_slices(load_slice, [m for m in args.mode if m in MIX_MODES], N_bytes=64*1024*1024, stride=1, threads=1)
+    width = 8 / max(len(rw), 1)
+    series = []
+    for j, (mode, sub) in enumerate(rw.items()):
+        rw_y, rw_err = bw_and_err(sub)
+        series.append({"kind": "bar", "x": sub['read_pct'].to_numpy() + (j - (len(rw) - 1) / 2) * width,
+                       "y": rw_y, "yerr": rw_err, "label": mode, "style": {"capsize": 3, "width": width}})
+    jobs.append({"out": os.path.join(FIG_DIR, "rw_mix.png"),
+                 "title": "Read/Write Mix (64MB, stride=1)" + mode_tag(rw),
+                 "xlabel": "Read %", "ylabel": "Bandwidth (GiB/s)", "tight_layout": True,
+                 "legend": len(rw) > 1, "series": series})
+
+    # ---- Plot 4: Intensity sweep ----
+    intens = mode_slices(load_slice, args.mode, N_bytes=256*1024*1024, stride=1, read_pct=100)
+    job = errorbar_job("intensity_sweep.png", "Intensity Sweep (256MB, 100% Read)", "Threads",
+                       "threads", intens, grid={})
+    for mode, sub in intens.items():
+        if sub['threads'].nunique() < 3:
+            continue
+        # Universal Scalability Law through the points (usl_fit.py fits every configuration)
+        y, _ = bw_and_err(sub)
+        (lam,), (sigma,), (kappa,) = fit_usl(sub['threads'], y, np.zeros(len(sub), int), 1)
+        n = np.linspace(1, sub['threads'].max(), 100)
+        label = f"USL: sigma={sigma:.3f}, kappa={kappa:.4f}"
+        job["series"].append({"x": n, "y": usl(n, lam, sigma, kappa), "style": {"linestyle": "--"},
+                              "label": label if len(intens) == 1 else f"{mode} {label}"})
+        job["legend"] = True
+    jobs.append(job)
+
+    figures.render_all(jobs, args.jobs)
+    print("✅ Plots with error bars saved in figures/")
+
+
+if __name__ == "__main__":
+    main()
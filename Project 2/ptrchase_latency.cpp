@@ -1,7 +1,17 @@
 #include <bits/stdc++.h>
 #include <x86intrin.h>
+#ifdef __linux__
+#include <sys/mman.h>
+#endif
 using namespace std;
 
+// Pointer-chase load latency over a sweep of working-set sizes.
+//   ptrchase                                   # 4 KiB .. 512 MiB, 3 sizes per octave
+//   ptrchase --min 16384 --max 268435456 --per-octave 4 --hugepages
+//   ptrchase --sizes 16384,262144,16777216,268435456
+// Prints "tsc_GHz=<calibrated>" and then one CSV row per size.
+// latency_curve.py drives this and fits the cache levels from the curve.
+
 // Return TSC with ordering (serialize loads around it).
 static inline uint64_t rdtsc_serialized() {
     unsigned aux;
@@ -11,60 +21,154 @@ static inline uint64_t rdtsc_serialized() {
     return t;
 }
 
-static vector<uint32_t> make_random_cycle(size_t N) {
+// TSC ticks per ns, measured against the OS monotonic clock (no guessed frequency)
+static double calibrate_tsc_ghz(int ms = 200) {
+    auto c0 = chrono::steady_clock::now();
+    uint64_t t0 = rdtsc_serialized();
+    while (chrono::steady_clock::now() - c0 < chrono::milliseconds(ms)) {}
+    auto c1 = chrono::steady_clock::now();
+    uint64_t t1 = rdtsc_serialized();
+    return double(t1 - t0) / chrono::duration<double, nano>(c1 - c0).count();
+}
+
+// One node per cache line, so every hop touches a new line
+static const size_t LINE = 64;
+struct alignas(LINE) Node { uint32_t next; };
+
+static const size_t HUGE_PAGE = 2u << 20;
+
+// Line-aligned node array; on Linux mmap'd at a 2 MiB boundary and madvise'd so the
+// page size is explicit: transparent huge pages with --hugepages, 4 KiB pages otherwise.
+struct Nodes {
+    Node* p = nullptr;
+    void* base = nullptr;
+    size_t len = 0;
+    Nodes(size_t bytes, bool huge) {
+#ifdef __linux__
+        len = bytes + HUGE_PAGE;
+        base = mmap(nullptr, len, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0);
+        if (base == MAP_FAILED) { perror("mmap"); exit(2); }
+        uintptr_t a = (reinterpret_cast<uintptr_t>(base) + HUGE_PAGE - 1) & ~(uintptr_t)(HUGE_PAGE - 1);
+        p = reinterpret_cast<Node*>(a);
+        if (madvise(p, bytes, huge ? MADV_HUGEPAGE : MADV_NOHUGEPAGE) != 0 && huge)
+            perror("madvise(MADV_HUGEPAGE)");
+#else
+        if (huge) fprintf(stderr, "--hugepages is only supported on Linux; using normal pages\n");
+        base = ::operator new(bytes, align_val_t(HUGE_PAGE));
+        p = static_cast<Node*>(base);
+#endif
+    }
+    ~Nodes() {
+#ifdef __linux__
+        munmap(base, len);
+#else
+        ::operator delete(base, align_val_t(HUGE_PAGE));
+#endif
+    }
+};
+
+static void make_random_cycle(Node* nodes, size_t N, uint64_t seed) {
     vector<uint32_t> idx(N);
     iota(idx.begin(), idx.end(), 0);
     // quality RNG matters less than permutation; mt19937_64 is fine
-    mt19937_64 rng(123456789ULL);
+    mt19937_64 rng(seed);
     shuffle(idx.begin(), idx.end(), rng);
-    vector<uint32_t> next(N);
-    for (size_t i = 0; i + 1 < N; ++i) next[idx[i]] = idx[i+1];
-    next[idx.back()] = idx[0];
-    return next;
+    for (size_t i = 0; i + 1 < N; ++i) nodes[idx[i]].next = idx[i+1];
+    nodes[idx.back()].next = idx[0];
 }
 
-// Run a dependent chain over 'next' and return ns/load and cycles/load (median over trials).
-struct Result { double cycles_per_load, ns_per_load; };
-static Result measure_chain(vector<uint32_t>& next, size_t hops, int trials, double ghz) {
+static volatile uint32_t sink;
+
+// Run a dependent chain and return TSC ticks per load (median over trials).
+static double measure_chain(const Node* nodes, size_t N, size_t hops, int trials) {
     vector<double> cyc;
     cyc.reserve(trials);
-    volatile uint32_t cur = 0;
+    uint32_t cur = 0;
 
-    // Warm-up to touch the list
-    for (size_t i = 0; i < 100000; ++i) cur = next[cur];
+    // Warm-up: one lap around the cycle puts every line in cache. Past the timed hops
+    // (large sets) a full lap only evicts itself, and building the cycle already
+    // touched every page, so stop there.
+    for (size_t i = 0; i < max<size_t>(min(N, hops), 100000); ++i) cur = nodes[cur].next;
 
     for (int t = 0; t < trials; ++t) {
-        cur = (t & 1) ? 0 : cur; // small perturbation
         uint64_t t0 = rdtsc_serialized();
-        for (size_t i = 0; i < hops; ++i) cur = next[cur];
+        for (size_t i = 0; i < hops; ++i) cur = nodes[cur].next;
         uint64_t t1 = rdtsc_serialized();
-        double cycles = double(t1 - t0) / double(hops);
-        cyc.push_back(cycles);
+        cyc.push_back(double(t1 - t0) / double(hops));
     }
+    sink = cur;
     nth_element(cyc.begin(), cyc.begin() + cyc.size()/2, cyc.end());
-    double med_cycles = cyc[cyc.size()/2];
-    return { med_cycles, med_cycles / ghz }; // ns = cycles / GHz
+    return cyc[cyc.size()/2];
+}
+
+struct Cmd {
+    vector<size_t> sizes;
+    size_t min_bytes = 4*1024ULL, max_bytes = 512*1024*1024ULL;  // latency_curve.py's defaults
+    int per_octave = 3;
+    int trials = 5;
+    size_t hops_per_line = 4;                          // hops scale with the number of lines ...
+    size_t min_hops = 200000, max_hops = 500000;        // ... within these bounds
+    bool huge = false;
+    uint64_t seed = 123456789ULL;
+};
+
+static vector<size_t> parse_sizes(const string& s) {
+    vector<size_t> out;
+    stringstream ss(s);
+    for (string tok; getline(ss, tok, ',');) if (!tok.empty()) out.push_back(stoull(tok));
+    return out;
+}
+
+static Cmd parse(int argc, char** argv) {
+    Cmd c;
+    for (int i=1;i<argc;i++) {
+        string a = argv[i];
+        auto next = [&](const char* flag){ if (i+1>=argc) { fprintf(stderr,"Missing value for %s\n",flag); exit(1);} return string(argv[++i]); };
+        if (a=="--sizes") c.sizes = parse_sizes(next("--sizes"));
+        else if (a=="--min") c.min_bytes = stoull(next("--min"));
+        else if (a=="--max") c.max_bytes = stoull(next("--max"));
+        else if (a=="--per-octave") c.per_octave = stoi(next("--per-octave"));
+        else if (a=="--trials") c.trials = stoi(next("--trials"));
+        else if (a=="--hops-per-line") c.hops_per_line = stoull(next("--hops-per-line"));
+        else if (a=="--min-hops") c.min_hops = stoull(next("--min-hops"));
+        else if (a=="--max-hops") c.max_hops = stoull(next("--max-hops"));
+        else if (a=="--hugepages") c.huge = true;
+        else if (a=="--seed") c.seed = stoull(next("--seed"));
+        else {
+            fprintf(stderr, "Unknown arg: %s\n", a.c_str());
+            exit(1);
+        }
+    }
+    if (c.sizes.empty()) {
+        // Log-spaced sweep, per_octave points per doubling, rounded to whole lines
+        double step = pow(2.0, 1.0 / max(1, c.per_octave));
+        for (double b = double(c.min_bytes); b <= double(c.max_bytes) * 1.0001; b *= step) {
+            size_t s = size_t(llround(b / LINE)) * LINE;
+            if (c.sizes.empty() || s != c.sizes.back()) c.sizes.push_back(s);
+        }
+    }
+    return c;
 }
 
 int main(int argc, char** argv) {
     ios::sync_with_stdio(false);
     cin.tie(nullptr);
+    Cmd c = parse(argc, argv);
+
+    const double tsc_GHz = calibrate_tsc_ghz();
+    cout << fixed << setprecision(3);
+    cout << "tsc_GHz=" << tsc_GHz << "\n";
+    // cycles/load are TSC ticks; ns/load = ticks / tsc_GHz
+    cout << "bytes,entries,hops,cycles/load,ns/load,hugepages\n" << flush;
 
-    // Defaults for 5800X (edit if needed)
-    const double freq_GHz = 3.8;     // use your observed clock if you prefer
-    const size_t sizes_bytes[] = { 16*1024ULL, 256*1024ULL, 16*1024*1024ULL, 256*1024*1024ULL };
-    const size_t hops = 50'000'00ULL; // 5e7; reduce if it runs too long on DRAM
-    const int trials = 9;
-
-    cout << fixed << setprecision(2);
-    cout << "freq_GHz=" << freq_GHz << "\n";
-    cout << "bytes,entries,cycles/load,ns/load\n";
-
-    for (size_t bytes : sizes_bytes) {
-        size_t N = bytes / sizeof(uint32_t);
-        auto next = make_random_cycle(N);
-        auto r = measure_chain(next, hops, trials, freq_GHz);
-        cout << bytes << "," << N << "," << r.cycles_per_load << "," << r.ns_per_load << "\n";
+    for (size_t bytes : c.sizes) {
+        size_t N = max<size_t>(bytes / LINE, 2);
+        size_t hops = min(max(c.hops_per_line * N, c.min_hops), c.max_hops);
+        Nodes nodes(N * LINE, c.huge);
+        make_random_cycle(nodes.p, N, c.seed);
+        double cycles = measure_chain(nodes.p, N, hops, c.trials);
+        cout << N * LINE << "," << N << "," << hops << "," << cycles << "," << cycles / tsc_GHz << ","
+             << int(c.huge) << "\n" << flush;
     }
     return 0;
 }
@@ -11,32 +11,57 @@ if [ ! -x "$BIN" ]; then
   exit 1
 fi
 
-echo "ts,N_bytes,stride,repeats,read_pct,threads,time,GiB/s" > "$OUT"
+echo "ts,N_bytes,stride,repeats,read_pct,threads,mode,time,GiB/s" > "$OUT"
+# Record which machine produced these results (see acslib/fingerprint.py)
+PYTHONPATH=.. python3 -m acslib.fingerprint --write "$(dirname "$OUT")"
 
 ts=$(date +"%Y-%m-%d %H:%M:%S")
 
-# Working set sweep (32KB → 512MB)
-for N in 32768 262144 2097152 33554432 268435456 536870912; do
-  $BIN $N 1 5 100 1 | tee -a results/raw/microbench_out.txt | \
-  awk -v ts="$ts" -F, '{print ts","$1","$2","$3","$4","$5","$6","$7}' >> "$OUT"
-done
+# PERF=1 runs every config under perf stat (acslib/perfctr.py); the counters
+# (ghz, core_cycles, instructions, llc_misses, dtlb_misses) are appended to each row
+if [ -n "${PERF:-}" ]; then
+  BIN="env PYTHONPATH=.. python3 -m acslib.perfctr -- $BIN"
+fi
 
-# Stride sweep at 64MB
-for STR in 1 2 4 8 16 32 64 128 256 512 1024; do
-  $BIN $((64*1024*1024)) $STR 5 100 1 | tee -a results/raw/microbench_out.txt | \
-  awk -v ts="$ts" -F, '{print ts","$1","$2","$3","$4","$5","$6","$7}' >> "$OUT"
-done
+# MODES selects microbench's access modes, each a full sweep with rows tagged mode=...:
+#   mask (default)  read/write choice precomputed outside the timed loop
+#   branchless      fixed read/write runs, vectorized;  read  pure read reduction
+#   ntstore         non-temporal stores;  rand  the old rand_r loop (measures the RNG)
+# e.g. MODES="mask read ntstore" ./run_microbench.sh
+MODES="${MODES:-mask}"
 
-# Read/Write mix at 64MB, stride=1
-for RW in 100 70 50 0; do
-  $BIN $((64*1024*1024)) 1 5 $RW 1 | tee -a results/raw/microbench_out.txt | \
-  awk -v ts="$ts" -F, '{print ts","$1","$2","$3","$4","$5","$6","$7}' >> "$OUT"
-done
+for MODE in $MODES; do
+  # Working set sweep (32KB → 512MB)
+  # (sweep_adaptive.py bisects only around the cache knees instead of this fixed list)
+  for N in 32768 262144 2097152 33554432 268435456 536870912; do
+    $BIN $N 1 5 100 1 $MODE | tee -a results/raw/microbench_out.txt | \
+    awk -v ts="$ts" '{print ts","$0}' >> "$OUT"
+  done
 
-# Intensity sweep at 256MB, stride=1
-for T in 1 2 4 8; do
-  $BIN $((256*1024*1024)) 1 5 100 $T | tee -a results/raw/microbench_out.txt | \
-  awk -v ts="$ts" -F, '{print ts","$1","$2","$3","$4","$5","$6","$7}' >> "$OUT"
+  # Stride sweep at 64MB
+  for STR in 1 2 4 8 16 32 64 128 256 512 1024; do
+    $BIN $((64*1024*1024)) $STR 5 100 1 $MODE | tee -a results/raw/microbench_out.txt | \
+    awk -v ts="$ts" '{print ts","$0}' >> "$OUT"
+  done
+
+  # Read/Write mix at 64MB, stride=1 (read and ntstore ignore read%)
+  case "$MODE" in read|ntstore) MIX="100" ;; *) MIX="100 70 50 0" ;; esac
+  for RW in $MIX; do
+    $BIN $((64*1024*1024)) 1 5 $RW 1 $MODE | tee -a results/raw/microbench_out.txt | \
+    awk -v ts="$ts" '{print ts","$0}' >> "$OUT"
+  done
+
+  # Intensity sweep at 256MB, stride=1, every thread count up to the CPU count
+  # (thread_sweep.py adds explicit compact/scatter/NUMA placement; usl_fit.py models the curve)
+  for T in $(seq 1 "$(nproc 2>/dev/null || sysctl -n hw.ncpu)"); do
+    $BIN $((256*1024*1024)) 1 5 100 $T $MODE | tee -a results/raw/microbench_out.txt | \
+    awk -v ts="$ts" '{print ts","$0}' >> "$OUT"
+  done
 done
 
+# Optional: load the CSV into the shared results store (see acslib/results_store.py)
+if [ -n "${RESULTS_DB:-}" ]; then
+  PYTHONPATH=.. python3 -m acslib.results_store ingest microbench "$RESULTS_DB" "$OUT"
+fi
+
 echo "Results saved to $OUT"
@@ -0,0 +1,59 @@
+import argparse, subprocess, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from acslib import fingerprint, perfctr
+from acslib.stats import repeat_until_stable
+from microbench_configs import DEFAULT_MODE, HEADER, MODES, mode_configs, parse_line
+
+def main():
+    ap = argparse.ArgumentParser(description="Repeat each microbench config until the median's bootstrap CI is narrow")
+    ap.add_argument("--bin", default="./bin/microbench")
+    ap.add_argument("--repeats", type=int, default=5, help="Passes per microbench run")
+    ap.add_argument("--rel-ci", type=float, default=0.05, help="Stop once the 95%% CI width is below this fraction of the median")
+    ap.add_argument("--min-runs", type=int, default=3)
+    ap.add_argument("--max-runs", type=int, default=30)
+    ap.add_argument("--out", default="results/csv/microbench_results_samples.csv",
+                    help="Every raw run, same row format as microbench_results_run*.csv")
+    ap.add_argument("--perf", action="store_true", help="Run under perf stat and add the counters to each row")
+    ap.add_argument("--mode", nargs="+", choices=MODES, default=[DEFAULT_MODE],
+                    help="microbench access modes to sweep (rows are tagged with theirs)")
+    args = ap.parse_args()
+
+    if not Path(args.bin).exists():
+        sys.exit("ERROR: microbench binary not found. Run: make")
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    fingerprint.write_sidecar(out.parent)
+    Path("results/raw").mkdir(parents=True, exist_ok=True)
+    ts = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    total, t_start = 0, time.time()
+    with open(out, "w") as f, open("results/raw/microbench_out.txt", "a") as raw:
+        f.write(HEADER)
+
+        # The sweeps share some points (e.g. 64MB/stride 1/100% read); measure each once
+        for n, stride, rw, threads, mode in dict.fromkeys(mode_configs(args.mode)):
+            cmd = [args.bin, str(n), str(stride), str(args.repeats), str(rw), str(threads), mode]
+
+            def sample():
+                if args.perf:
+                    out, counters = perfctr.run(cmd, check=True, capture_output=True, text=True)
+                    line = out.stdout.strip() + perfctr.kv_fields(counters)
+                else:
+                    line = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout.strip()
+                raw.write(line + "\n")
+                f.write(f"{ts},{line}\n")
+                return float(parse_line(line)["GiB/s"])
+
+            vals, (med, lo, hi), ok = repeat_until_stable(sample, args.rel_ci, args.min_runs, args.max_runs)
+            f.flush()
+            total += len(vals)
+            print(f"N={n} stride={stride} read%={rw} threads={threads} mode={mode}: {med:.3f} GiB/s "
+                  f"[{lo:.3f}, {hi:.3f}] after {len(vals)} runs{'' if ok else ' (CI target not reached)'}")
+
+    print(f"{total} runs in {time.time() - t_start:.1f} s. Raw samples saved to {out}")
+    print(f"Summarize with: python3 average_runs.py {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Run the run_microbench.sh sweep concurrently where that cannot skew the results.
+
+Configs whose whole footprint (x and y, 2 x N_bytes) fits in one core's private
+caches and that use one thread do not contend for shared LLC or DRAM bandwidth,
+so they run side by side, each pinned (taskset) to its own physical core.
+Everything else (large footprints, the thread-intensity sweep) runs alone, pinned
+to its first `threads` CPUs of: one CPU per physical core, then their SMT siblings
+(every CPU in the affinity mask when it has more threads than that), so no two
+threads share a CPU. Rows come out in run_microbench.sh order.
+With the default sweep only the 32 KiB and 256 KiB working-set points (per mode) fit
+a typical private L2, so the saving is small; it grows with --private-limit or with
+sweeps that have more small-footprint points.
+
+    python3 sched_microbench.py            # parallel where safe
+    python3 sched_microbench.py --serial   # one at a time, for comparison
+    python3 sched_microbench.py --perf     # add perf counters to each row (acslib/perfctr.py)
+    python3 sched_microbench.py --mode read ntstore   # microbench access modes to sweep
+"""
+import argparse
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from acslib import fingerprint, perfctr
+from microbench_configs import DEFAULT_MODE, HEADER, MODES, mode_configs, parse_line
+
+SYS_CPU = Path("/sys/devices/system/cpu")
+
+
+def _read(path, default=None):
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return default
+
+
+def physical_cores():
+    """One usable logical CPU per physical core (SMT siblings would share L1/L2)."""
+    seen, cpus = set(), []
+    for cpu in sorted(os.sched_getaffinity(0)):
+        topo = SYS_CPU / f"cpu{cpu}" / "topology"
+        key = (_read(topo / "physical_package_id", "0"), _read(topo / "core_id", str(cpu)))
+        if key not in seen:
+            seen.add(key)
+            cpus.append(cpu)
+    return cpus
+
+
+def exclusive_cpus():
+    """Every usable CPU, one per physical core first and their SMT siblings after."""
+    cores = physical_cores()
+    return cores + [c for c in sorted(os.sched_getaffinity(0)) if c not in set(cores)]
+
+
+def private_cache_bytes(cpu):
+    """Size of the largest cache level not shared with another physical core."""
+    siblings = _read(SYS_CPU / f"cpu{cpu}" / "topology" / "thread_siblings_list", str(cpu))
+    return max((size for _, size, shared in fingerprint.cache_levels(cpu) if shared == siblings), default=0)
+
+
+def is_private(cfg, limit):
+    n_bytes, _, _, threads, _ = cfg
+    return threads == 1 and 2 * n_bytes <= limit
+
+
+def run_one(binary, cfg, repeats, cpus, perf=False):
+    n_bytes, stride, rw, threads, mode = cfg
+    # taskset sets the affinity before exec; a preexec_fn is not safe from the worker threads
+    cmd = ["taskset", "-c", ",".join(map(str, sorted(cpus))),
+           binary, str(n_bytes), str(stride), str(repeats), str(rw), str(threads), mode]
+    kw = dict(check=True, capture_output=True, text=True, env=dict(os.environ, OMP_PROC_BIND="true"))
+    if not perf:
+        return subprocess.run(cmd, **kw).stdout.strip()
+    # taskset execs the benchmark in the same process, so perf stat counts (almost) only it
+    out, counters = perfctr.run(cmd, **kw)
+    return out.stdout.strip() + perfctr.kv_fields(counters)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bin", default="./bin/microbench")
+    ap.add_argument("--repeats", type=int, default=5)
+    ap.add_argument("--out", default="results/csv/microbench_results.csv")
+    ap.add_argument("--serial", action="store_true", help="Run every config alone (the run_microbench.sh behaviour)")
+    ap.add_argument("--private-limit", type=int, default=None,
+                    help="Max footprint in bytes that may share the machine (default: private cache size per core)")
+    ap.add_argument("--perf", action="store_true", help="Run each config under perf stat and add its counters to the row")
+    ap.add_argument("--mode", nargs="+", choices=MODES, default=[DEFAULT_MODE], help="microbench access modes to sweep")
+    args = ap.parse_args()
+    configs = mode_configs(args.mode)
+
+    if not Path(args.bin).exists():
+        raise SystemExit("ERROR: microbench binary not found. Run: make")
+    if not shutil.which("taskset"):
+        raise SystemExit("ERROR: taskset (util-linux) is needed to pin the runs")
+    cores = physical_cores()
+    limit = args.private_limit if args.private_limit is not None else private_cache_bytes(cores[0])
+    concurrent = [] if args.serial else [i for i, c in enumerate(configs) if is_private(c, limit)]
+    exclusive = [i for i in range(len(configs)) if i not in set(concurrent)]
+    print(f"{len(cores)} physical cores, private cache {limit // 1024} KiB: "
+          f"{len(concurrent)} configs in parallel, {len(exclusive)} exclusive")
+
+    lines = [None] * len(configs)
+    t0 = time.time()
+
+    # Phase 1: private-cache configs, one per pinned core
+    if concurrent:
+        free = queue.Queue()
+        for c in cores:
+            free.put(c)
+
+        def pinned(i):
+            cpu = free.get()
+            try:
+                lines[i] = run_one(args.bin, configs[i], args.repeats, {cpu}, args.perf)
+            finally:
+                free.put(cpu)
+
+        with ThreadPoolExecutor(max_workers=len(cores)) as pool:
+            list(pool.map(pinned, concurrent))
+
+    # Phase 2: configs that contend for LLC/DRAM, alone on the machine
+    cpus = exclusive_cpus()
+    for i in exclusive:
+        threads = configs[i][3]
+        lines[i] = run_one(args.bin, configs[i], args.repeats, set(cpus[:threads]), args.perf)
+
+    elapsed = time.time() - t0
+    ts = time.strftime("%Y-%m-%d %H:%M:%S")
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    fingerprint.write_sidecar(Path(args.out).parent)
+    Path("results/raw").mkdir(parents=True, exist_ok=True)
+    with open(args.out, "w") as f, open("results/raw/microbench_out.txt", "a") as raw:
+        f.write(HEADER)
+        for line in lines:
+            raw.write(line + "\n")
+            f.write(f"{ts},{line}\n")
+
+    for cfg, line in zip(configs, lines):
+        print(f"N={cfg[0]} stride={cfg[1]} read%={cfg[2]} threads={cfg[3]} mode={cfg[4]}: {parse_line(line)['GiB/s']} GiB/s")
+    print(f"Sweep took {elapsed:.1f} s. Results saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
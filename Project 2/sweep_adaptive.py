@@ -0,0 +1,56 @@
+import argparse, subprocess, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from acslib import fingerprint
+from acslib.sweep import adaptive_sweep, find_knees
+from microbench_configs import DEFAULT_MODE, HEADER, MODES, parse_line
+
+def run_microbench(binary, n_bytes, stride, repeats, read_pct, threads, mode, out_csv, raw, ts):
+    # Same row layout as run_microbench.sh: timestamp + the binary's key=value fields
+    line = subprocess.run([binary, str(n_bytes), str(stride), str(repeats), str(read_pct), str(threads), mode],
+                          check=True, capture_output=True, text=True).stdout.strip()
+    raw.write(line + "\n")
+    out_csv.write(f"{ts},{line}\n")
+    out_csv.flush()
+    return float(parse_line(line)["GiB/s"])
+
+def main():
+    ap = argparse.ArgumentParser(description="Sweep the working set coarsely, then bisect only where GiB/s changes sharply")
+    ap.add_argument("--bin", default="./bin/microbench")
+    ap.add_argument("--lo", type=int, default=16 * 1024, help="Smallest working set (bytes)")
+    ap.add_argument("--hi", type=int, default=512 * 1024 * 1024, help="Largest working set (bytes)")
+    ap.add_argument("--coarse", type=int, default=8, help="Points in the initial log grid")
+    ap.add_argument("--rel-change", type=float, default=0.10,
+                    help="Bisect an interval while GiB/s changes by more than this fraction across it")
+    ap.add_argument("--min-ratio", type=float, default=1.06, help="Stop refining once hi/lo is below this")
+    ap.add_argument("--max-points", type=int, default=40, help="Run budget")
+    ap.add_argument("--stride", type=int, default=1)
+    ap.add_argument("--repeats", type=int, default=5)
+    ap.add_argument("--read-pct", type=int, default=100)
+    ap.add_argument("--threads", type=int, default=1)
+    ap.add_argument("--mode", choices=MODES, default=DEFAULT_MODE, help="microbench access mode")
+    ap.add_argument("--csv", default="results/csv/microbench_adaptive.csv")
+    args = ap.parse_args()
+
+    if not Path(args.bin).exists():
+        sys.exit("ERROR: microbench binary not found. Run: make")
+    out = Path(args.csv)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    fingerprint.write_sidecar(out.parent)
+    Path("results/raw").mkdir(parents=True, exist_ok=True)
+    ts = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    with open(out, "w") as f, open("results/raw/microbench_out.txt", "a") as raw:
+        f.write(HEADER)
+        pts = adaptive_sweep(lambda n: run_microbench(args.bin, n, args.stride, args.repeats, args.read_pct,
+                                                      args.threads, args.mode, f, raw, ts),
+                             args.lo, args.hi, coarse=args.coarse, rel_change=args.rel_change,
+                             min_ratio=args.min_ratio, max_points=args.max_points, align=4096, verbose=True)
+
+    for b0, b1, g0, g1 in find_knees(pts, args.rel_change):
+        print(f"knee: {b0/1024:.0f}..{b1/1024:.0f} KiB, {g0:.2f} -> {g1:.2f} GiB/s")
+    print(f"{len(pts)} runs. Results saved to {out}")
+
+if __name__ == "__main__":
+    main()
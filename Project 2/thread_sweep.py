@@ -0,0 +1,166 @@
+"""Intensity sweep over every thread count with explicit thread placement.
+
+run_microbench.sh's intensity sweep leaves placement to the OpenMP runtime. Here each
+point pins its threads to an explicit CPU list (OMP_PLACES, one place per thread,
+OMP_PROC_BIND=close) built from the /sys topology:
+    compact   fill a core's SMT siblings, then the next core, node by node
+    scatter   one thread per physical core, round-robin over NUMA nodes, siblings last
+    node      compact within NUMA node K only (--nodes); the process is pinned there too,
+              so microbench's first-touch initialization puts x and y in that node's memory
+microbench is run with MICROBENCH_THREAD_STATS=1, so every thread's CPU and own
+bandwidth are recorded next to the aggregate. Fit the scaling model with usl_fit.py.
+
+    python3 thread_sweep.py                              # compact + scatter (+ node per node), 1..all CPUs
+    python3 thread_sweep.py --placement scatter --threads 1 2 4 8 16 --trials 5
+    python3 thread_sweep.py --mode read                  # pure read reduction instead of the read/write mask
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from acslib import fingerprint
+from microbench_configs import DEFAULT_MODE, MODES, parse_line
+
+SYS_CPU = Path("/sys/devices/system/cpu")
+SYS_NODE = Path("/sys/devices/system/node")
+HEADER = ("ts,placement,threads,trial,cpus,nodes,N_bytes,stride,repeats,read_pct,mode,time,GiB/s,"
+          "thread_mean_GiBps,thread_min_GiBps,thread_max_GiBps\n")
+THREAD_HEADER = "placement,threads,trial,thread,cpu,node,time,GiB/s\n"
+
+
+def parse_cpulist(text):
+    """'0-3,8,10-11' -> [0, 1, 2, 3, 8, 10, 11]"""
+    cpus = []
+    for part in filter(None, text.strip().split(",")):
+        lo, _, hi = part.partition("-")
+        cpus.extend(range(int(lo), int(hi or lo) + 1))
+    return cpus
+
+
+def topology():
+    """{cpu: (node, package, core_id)} for the CPUs this process may use."""
+    node_of = {}
+    for d in SYS_NODE.glob("node[0-9]*"):
+        for cpu in parse_cpulist((d / "cpulist").read_text()):
+            node_of[cpu] = int(d.name[4:])
+    topo = {}
+    for cpu in sorted(os.sched_getaffinity(0)):
+        t = SYS_CPU / f"cpu{cpu}" / "topology"
+        try:
+            pkg, core = int((t / "physical_package_id").read_text()), int((t / "core_id").read_text())
+        except OSError:
+            pkg, core = 0, cpu
+        topo[cpu] = (node_of.get(cpu, 0), pkg, core)
+    return topo
+
+
+def placements(topo, nodes=None):
+    """{name: ordered CPU list}; the first n CPUs of a list are where n threads go."""
+    compact = sorted(topo, key=lambda c: (topo[c], c))
+    by_node = {}
+    for cpu in compact:
+        by_node.setdefault(topo[cpu][0], []).append(cpu)
+
+    def siblings_last(cpus):
+        # SMT rank of each CPU within its core: all first hardware threads, then the second ones ...
+        rank, seen = {}, {}
+        for c in cpus:
+            key = topo[c]
+            rank[c] = seen.get(key, 0)
+            seen[key] = rank[c] + 1
+        return sorted(cpus, key=lambda c: (rank[c], topo[c][1:], c))
+
+    queues = [siblings_last(cpus) for cpus in by_node.values()]
+    scatter = []
+    for rank in range(max(map(len, queues))):
+        for q in queues:
+            if rank < len(q):
+                scatter.append(q[rank])
+    out = {"compact": compact, "scatter": scatter}
+    for n in (sorted(by_node) if nodes is None else nodes):
+        if n not in by_node:
+            raise SystemExit(f"NUMA node {n} has no usable CPUs (nodes: {sorted(by_node)})")
+        out[f"node{n}"] = by_node[n]
+    return out
+
+
+def run_point(args, cpus):
+    """One microbench run on exactly these CPUs -> (aggregate line, [per-thread dicts])."""
+    env = dict(os.environ, MICROBENCH_THREAD_STATS="1", OMP_PROC_BIND="close",
+               OMP_PLACES=",".join(f"{{{c}}}" for c in cpus))
+    cmd = [args.bin, str(args.bytes), str(args.stride), str(args.repeats), str(args.read_pct), str(len(cpus)),
+           args.mode]
+    proc = subprocess.run(cmd, check=True, capture_output=True, text=True, env=env,
+                          preexec_fn=lambda: os.sched_setaffinity(0, set(cpus)))
+    threads = [parse_line(l) for l in proc.stderr.splitlines() if l.startswith("thread=")]
+    return proc.stdout.strip(), threads
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Thread-count sweep with compact/scatter/per-node placement")
+    ap.add_argument("--bin", default="./bin/microbench")
+    ap.add_argument("--bytes", type=int, default=256 * 1024 * 1024, help="Working set (N_bytes)")
+    ap.add_argument("--stride", type=int, default=1)
+    ap.add_argument("--read-pct", type=int, default=100)
+    ap.add_argument("--mode", choices=MODES, default=DEFAULT_MODE, help="microbench access mode")
+    ap.add_argument("--repeats", type=int, default=5, help="Passes per microbench run")
+    ap.add_argument("--threads", type=int, nargs="+", help="Thread counts (default: 1 .. CPUs in the placement)")
+    ap.add_argument("--placement", nargs="+", choices=["compact", "scatter", "node"],
+                    default=["compact", "scatter", "node"],
+                    help="node = one sweep per NUMA node (skipped on single-node machines unless --nodes is given)")
+    ap.add_argument("--nodes", type=int, nargs="+", help="NUMA nodes for --placement node (default: all)")
+    ap.add_argument("--trials", type=int, default=3, help="Runs per point")
+    ap.add_argument("--out", default="results/csv/thread_sweep.csv")
+    args = ap.parse_args()
+
+    if not Path(args.bin).exists():
+        raise SystemExit("ERROR: microbench binary not found. Run: make")
+    topo = topology()
+    orders = placements(topo, args.nodes)
+    n_nodes = len({t[0] for t in topo.values()})
+    wanted = [p for p in orders if p in args.placement
+              or (p.startswith("node") and "node" in args.placement and (n_nodes > 1 or args.nodes))]
+    print(f"{len(topo)} CPUs on {n_nodes} NUMA node(s): " + "; ".join(f"{p} {orders[p][:8]}" for p in wanted))
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    fingerprint.write_sidecar(out.parent)
+    thread_out = out.with_name(out.stem + "_threads.csv")
+    t0, runs = time.time(), 0
+    with open(out, "w") as f, open(thread_out, "w") as ft:
+        f.write(HEADER)
+        ft.write(THREAD_HEADER)
+        for name in wanted:
+            cpus = orders[name]
+            counts = [t for t in (args.threads or range(1, len(cpus) + 1)) if t <= len(cpus)]
+            for t in counts:
+                use = cpus[:t]
+                nodes = len({topo[c][0] for c in use})
+                for trial in range(args.trials):
+                    line, threads = run_point(args, use)
+                    kv = parse_line(line)
+                    tb = [float(th["GiB/s"]) for th in threads] or [float(kv["GiB/s"]) / t]
+                    ts = time.strftime("%Y-%m-%d %H:%M:%S")
+                    f.write(f"{ts},{name},{t},{trial},{' '.join(map(str, use))},{nodes},{kv['N_bytes']},"
+                            f"{kv['stride']},{kv['repeats']},{kv['read%']},{kv['mode']},{kv['time']},{kv['GiB/s']},"
+                            f"{sum(tb) / len(tb):.3f},{min(tb):.3f},{max(tb):.3f}\n")
+                    for th in threads:
+                        cpu = int(th["cpu"])
+                        ft.write(f"{name},{t},{trial},{th['thread']},{cpu},{topo.get(cpu, (-1,))[0]},"
+                                 f"{th['time']},{th['GiB/s']}\n")
+                    runs += 1
+                f.flush()
+                ft.flush()
+                print(f"{name:>8} threads={t:<3} on {nodes} node(s): {kv['GiB/s']} GiB/s "
+                      f"({sum(tb) / len(tb):.3f} per thread, last trial)")
+
+    print(f"{runs} runs in {time.time() - t0:.1f} s. Saved {out} and {thread_out}")
+    print(f"Fit the scaling model with: python3 usl_fit.py --csv {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Universal Scalability Law fit of bandwidth vs thread count.
+
+    X(N) = lambda * N / (1 + sigma * (N - 1) + kappa * N * (N - 1))
+
+lambda is the one-thread bandwidth, sigma the contention (serialized) fraction and
+kappa the coherency cost that makes bandwidth fall again past a peak at
+N* = sqrt((1 - sigma) / kappa). N / X(N) is linear in (1/lambda, sigma/lambda,
+kappa/lambda), so every configuration (placement x working set x stride x read mix)
+is fitted at once from per-group normal equations, solved as one batch, with
+relative-error weights. Coefficients are kept non-negative by also solving the
+kappa = 0 / sigma = 0 / linear sub-models and taking the best feasible one.
+
+For sizing worker pools the report gives, per configuration, the saturation thread
+count (fewest threads reaching --tol of the peak) and the peak sustainable bandwidth.
+
+    python3 usl_fit.py                                    # results/csv/thread_sweep.csv
+    python3 usl_fit.py --csv results/csv/microbench_results_run*.csv --tol 0.10
+"""
+import argparse
+import glob
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from acslib.kvcsv import fill_mode, read_kv_csv
+
+GROUP_COLS = ["placement", "mode", "N_bytes", "stride", "read_pct"]
+FIG_DIR = "figures"
+# Sub-models by the coefficients they keep (1/lambda, sigma/lambda, kappa/lambda), best first
+SUBMODELS = [(0, 1, 2), (0, 1), (0, 2), (0,)]
+
+
+def fit_usl(n, x, groups, n_groups):
+    """Batched weighted least squares; returns (lam, sigma, kappa) arrays of length n_groups."""
+    n, x = np.asarray(n, float), np.asarray(x, float)
+    y = n / x
+    w = 1.0 / y ** 2  # residuals in y relative to y == relative error in X
+    feats = np.stack([np.ones_like(n), n - 1, n * (n - 1)], axis=1)
+    A = np.zeros((n_groups, 3, 3))
+    b = np.zeros((n_groups, 3))
+    for i in range(3):
+        b[:, i] = np.bincount(groups, w * feats[:, i] * y, n_groups)
+        for j in range(3):
+            A[:, i, j] = np.bincount(groups, w * feats[:, i] * feats[:, j], n_groups)
+    yy = np.bincount(groups, w * y * y, n_groups)
+
+    best = np.full((n_groups, 3), np.nan)
+    best_sse = np.full(n_groups, np.inf)
+    for keep in SUBMODELS:
+        k = list(keep)
+        Ak = A[:, k][:, :, k] + 1e-12 * np.eye(len(k))  # guards groups with too few thread counts
+        theta = np.linalg.solve(Ak, b[:, k][..., None])[..., 0]
+        sse = yy - 2 * np.einsum("gi,gi->g", theta, b[:, k]) + np.einsum("gi,gij,gj->g", theta, A[:, k][:, :, k], theta)
+        ok = (theta > 0).all(axis=1) & (sse < best_sse)
+        full = np.zeros((n_groups, 3))
+        full[:, k] = theta
+        best[ok] = full[ok]
+        best_sse[ok] = sse[ok]
+    a = best[:, 0]
+    return 1.0 / a, best[:, 1] / a, best[:, 2] / a
+
+
+def usl(n, lam, sigma, kappa):
+    n = np.asarray(n, float)
+    return lam * n / (1 + sigma * (n - 1) + kappa * n * (n - 1))
+
+
+def saturation(lam, sigma, kappa, tol, n_max=4096):
+    """Peak thread count/bandwidth and the fewest threads within tol of the peak (vectorized)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n_peak = np.where(kappa > 0, np.sqrt(np.clip(1 - sigma, 0, None) / kappa), np.inf)
+        n_peak = np.maximum(n_peak, 1.0)
+        # kappa = 0: X rises towards lambda / sigma (Amdahl); sigma = 0 too: no limit at all
+        x_peak = np.where(np.isfinite(n_peak), usl(n_peak, lam, sigma, kappa),
+                          np.where(sigma > 0, lam / sigma, np.inf))
+    grid = np.arange(1, n_max + 1)
+    curve = usl(grid[None, :], lam[:, None], sigma[:, None], kappa[:, None])
+    reached = curve >= (1 - tol) * x_peak[:, None]
+    n_sat = np.where(reached.any(axis=1), grid[reached.argmax(axis=1)], np.nan)
+    return n_peak, x_peak, n_sat
+
+
+def load(paths):
+    frames = [read_kv_csv(p) for p in paths]
+    df = fill_mode(pd.concat(frames, ignore_index=True))
+    if "thread_mean_GiBps" not in df:
+        df["thread_mean_GiBps"] = df["GiB/s"] / df["threads"]
+    return df
+
+
+def plot(df, gid, res, keys, out):
+    import matplotlib.pyplot as plt
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(13, 5))
+    med = df.groupby([gid, df["threads"]])[["GiB/s", "thread_mean_GiBps"]].median().reset_index(level=1)
+    vary = [k for k in keys if res[k].nunique() > 1] or keys  # label by what differs between the lines
+    for g, r in enumerate(res.itertuples(index=False)):
+        pts = med.loc[[g]]
+        label = " ".join(f"{k}={getattr(r, k)}" for k in vary) or "all"
+        # Extend the model past the measurements to show the saturation point, within reason
+        n_hi = pts["threads"].max()
+        n_hi = min(max(n_hi, r.n_sat if np.isfinite(r.n_sat) else 1), 4 * n_hi)
+        grid = np.linspace(1, n_hi, 200)
+        line, = ax1.plot(grid, usl(grid, r.lambda_GiBps, r.sigma, r.kappa), linestyle="--")
+        ax1.plot(pts["threads"], pts["GiB/s"], "o", color=line.get_color(), label=label)
+        if r.n_sat <= n_hi:
+            ax1.plot([r.n_sat], [usl(r.n_sat, r.lambda_GiBps, r.sigma, r.kappa)], "*", markersize=12,
+                     color=line.get_color())
+        ax2.plot(grid, usl(grid, r.lambda_GiBps, r.sigma, r.kappa) / grid, linestyle="--", color=line.get_color())
+        ax2.plot(pts["threads"], pts["thread_mean_GiBps"], "o", color=line.get_color(), label=label)
+    ax1.set(xlabel="Threads", ylabel="Bandwidth (GiB/s)", title="USL fit (dashed), saturation point (*)")
+    ax2.set(xlabel="Threads", ylabel="Per-thread bandwidth (GiB/s)", title="Per-thread bandwidth")
+    for ax in (ax1, ax2):
+        ax.grid(True, linestyle=":")
+        ax.legend(fontsize=7)
+    fig.tight_layout()
+    fig.savefig(out, dpi=150)
+    plt.close(fig)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Fit the Universal Scalability Law to bandwidth vs threads")
+    ap.add_argument("--csv", nargs="+", default=["results/csv/thread_sweep.csv"],
+                    help="thread_sweep.py output and/or microbench run CSVs (quoted globs allowed)")
+    ap.add_argument("--tol", type=float, default=0.05,
+                    help="Saturation = fewest threads within this fraction of the peak bandwidth")
+    ap.add_argument("--min-counts", type=int, default=3, help="Distinct thread counts a configuration needs")
+    ap.add_argument("--out", default="results/csv/usl_fit.csv")
+    ap.add_argument("--no-plot", action="store_true")
+    args = ap.parse_args(argv)
+
+    paths = [p for pat in args.csv for p in (sorted(glob.glob(pat)) or [pat])]
+    missing = [p for p in paths if not Path(p).exists()]
+    if missing:
+        raise SystemExit(f"{', '.join(missing)} not found; run thread_sweep.py first")
+    df = load(paths)
+    keys = [k for k in GROUP_COLS if k in df]
+    # Configurations measured at too few thread counts (e.g. the working-set sweep) are left out
+    df = df[df.groupby(keys, dropna=False)["threads"].transform("nunique") >= args.min_counts] if keys else df
+    if df.empty or df["threads"].nunique() < args.min_counts:
+        raise SystemExit(f"No configuration has {args.min_counts}+ thread counts; run thread_sweep.py first")
+    df = df.reset_index(drop=True)
+    gid = df.groupby(keys, dropna=False).ngroup().to_numpy() if keys else np.zeros(len(df), int)
+    n_groups = gid.max() + 1
+
+    lam, sigma, kappa = fit_usl(df["threads"], df["GiB/s"], gid, n_groups)
+    n_peak, x_peak, n_sat = saturation(lam, sigma, kappa, args.tol)
+    pred = usl(df["threads"], lam[gid], sigma[gid], kappa[gid])
+    resid = np.bincount(gid, (df["GiB/s"] - pred) ** 2, n_groups)
+    mean = np.bincount(gid, df["GiB/s"], n_groups) / np.bincount(gid, minlength=n_groups)
+    total = np.bincount(gid, (df["GiB/s"] - mean[gid]) ** 2, n_groups)
+
+    first = df.groupby(gid).first()
+    res = first[keys].reset_index(drop=True) if keys else pd.DataFrame(index=range(n_groups))
+    res["lambda_GiBps"], res["sigma"], res["kappa"] = lam, sigma, kappa
+    res["r2"] = 1 - resid / np.where(total > 0, total, np.nan)
+    res["n_peak"], res["peak_GiBps"] = n_peak, x_peak
+    res["n_sat"] = n_sat
+    res["sat_GiBps"] = usl(np.nan_to_num(n_sat, nan=1.0), lam, sigma, kappa)
+    res["max_threads_measured"] = df.groupby(gid)["threads"].max().to_numpy()
+    res["measured_max_GiBps"] = df.groupby(gid)["GiB/s"].max().to_numpy()
+
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    res.to_csv(args.out, index=False)
+    for r in res.itertuples(index=False):
+        name = " ".join(f"{k}={getattr(r, k)}" for k in keys)
+        extrapolated = np.isfinite(r.n_sat) and r.n_sat > r.max_threads_measured
+        sat = (f"saturates at {r.n_sat:.0f} threads{' (extrapolated)' if extrapolated else ''} "
+               f"with {r.sat_GiBps:.2f} GiB/s" if np.isfinite(r.n_sat) else "no saturation within 4096 threads")
+        peak = f"peak {r.peak_GiBps:.2f} GiB/s" + (f" at {r.n_peak:.1f}" if np.isfinite(r.n_peak) else " (asymptote)")
+        print(f"{name}: lambda={r.lambda_GiBps:.3f} GiB/s sigma={r.sigma:.4f} kappa={r.kappa:.5f} "
+              f"R2={r.r2:.3f}; {peak}; {sat}")
+    print(f"Saved {args.out}")
+
+    if not args.no_plot:
+        os.makedirs(FIG_DIR, exist_ok=True)
+        out = os.path.join(FIG_DIR, "usl_fit.png")
+        plot(df, gid, res, keys, out)
+        print(f"Plot saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,12 @@
-import json
+import argparse
+import sys
 import pandas as pd
-import matplotlib.pyplot as plt
 from pathlib import Path
 
-results_dir = Path.home() / "fio" / "results"
-json_files = list(results_dir.glob("*.json"))
+from fio_cache import load_fio_results
 
-baseline_rows = []
-sweep_rows = []
-
-for jf in json_files:
-    with open(jf) as f:
-        data = json.load(f)
-
-        # iterate through ALL jobs in the file (4k, 8k, ... 256k)
-        for job in data["jobs"]:
-            stats = job["read"] if job["read"]["io_bytes"] > 0 else job["write"]
-
-            row = {
-                "file": jf.name,
-                "jobname": job["jobname"],   # rand_4k, rand_8k, etc.
-                "iops": stats["iops"],
-                "bw_MBps": stats["bw_bytes"] / (1024*1024),
-                "lat_avg_us": stats["clat_ns"]["mean"] / 1000,
-                "lat_99_us": stats["clat_ns"]["percentile"].get("99.000000", 0) / 1000,
-                "bs": job.get("job options", {}).get("bs", None)
-            }
-
-            if "_qd1" in jf.name:
-                baseline_rows.append(row)
-            elif "_sweep" in jf.name:
-                sweep_rows.append(row)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from acslib.fingerprint import find_sidecar
 
 def save_table(df, name):
     """Save dataframe to both CSV and Markdown (if possible)."""
@@ -40,12 +16,14 @@ def save_table(df, name):
     except ImportError:
         print(f"[!] Skipping Markdown export for {name} (install `tabulate` to enable)")
 
-# === Baselines ===
-if baseline_rows:
-    df_base = pd.DataFrame(baseline_rows)
-    print("\n=== Zero-Queue Baselines ===")
-    print(df_base[["file","iops","bw_MBps","lat_avg_us","lat_99_us"]])
-    save_table(df_base, "baseline_table")
+def parse_bs(col):
+    # "4k" / "1M" / "4096" -> bytes, for the whole column at once
+    parts = col.str.extract(r"^(\d+)([kKmM]?)$")
+    mult = parts[1].str.lower().map({"": 1, "k": 1024, "m": 1024 * 1024})
+    return (pd.to_numeric(parts[0]) * mult).astype("Int64")
+
+def plot_baselines(df_base):
+    import matplotlib.pyplot as plt
 
     plt.figure(figsize=(8,5))
     plt.bar(df_base["file"], df_base["bw_MBps"])
@@ -63,24 +41,8 @@ if baseline_rows:
     plt.tight_layout()
     plt.savefig("baseline_iops.png")
 
-# === Sweeps ===
-if sweep_rows:
-    df_sweep = pd.DataFrame(sweep_rows)
-
-    def parse_bs(x):
-        if x is None:
-            return None
-        if x.endswith("k"):
-            return int(x[:-1]) * 1024
-        elif x.endswith("M"):
-            return int(x[:-1]) * 1024 * 1024
-        else:
-            return int(x)
-    df_sweep["bs_bytes"] = df_sweep["bs"].apply(parse_bs)
-
-    print("\n=== Pattern & Granularity Sweep ===")
-    print(df_sweep[["file","bs","iops","bw_MBps","lat_avg_us","lat_99_us"]])
-    save_table(df_sweep, "sweep_table")
+def plot_sweeps(df_sweep):
+    import matplotlib.pyplot as plt
 
     # Bandwidth vs block size
     plt.figure(figsize=(8,5))
@@ -107,4 +69,73 @@ if sweep_rows:
     plt.tight_layout()
     plt.savefig("sweep_latency.png")
 
-print("\nSaved plots and tables (CSV always, Markdown if available).")
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("results_dir", nargs="?", default=str(Path.home() / "fio" / "results"))
+    ap.add_argument("--cache-dir", default=None, help="Where parsed .npz files are kept (default: <results_dir>/.fio_cache)")
+    ap.add_argument("--no-cache", action="store_true", help="Re-parse every JSON file")
+    ap.add_argument("--lat-logs", action="store_true",
+                    help="Also summarize per-IO latency logs (*_clat.N.log) in results_dir, streamed in chunks")
+    ap.add_argument("--window-ms", type=int, default=1000, help="Window for lat-log spike detection")
+    ap.add_argument("--no-plots", action="store_true", help="Only write the tables (matplotlib is not loaded)")
+    args = ap.parse_args(argv)
+
+    # One row per job (4k, 8k, ... 256k) across every JSON file; unchanged files come from the cache
+    df_all = load_fio_results(args.results_dir, args.cache_dir, use_cache=not args.no_cache, verbose=True)
+
+    df_all["bw_MBps"] = df_all["bw_bytes"] / (1024*1024)
+    df_all["lat_avg_us"] = df_all["clat_mean_ns"] / 1000
+    df_all["lat_99_us"] = df_all["clat_p99_ns"] / 1000
+    df_all["bs"] = df_all["bs"].replace("", None)
+    df_all = df_all[["file", "jobname", "iops", "bw_MBps", "lat_avg_us", "lat_99_us", "bs"]]
+
+    # write_lat_log runs: one summary row per log, named so the _qd1/_sweep split below still applies
+    if args.lat_logs:
+        from fio_latlog import flag_spikes, scan_lat_log
+        log_rows = []
+        for log in sorted(Path(args.results_dir).glob("*_clat.*.log")):
+            windows, summary = scan_lat_log(log, args.window_ms)
+            if summary is None:
+                continue
+            n_spikes = int(flag_spikes(windows)["spike"].sum())
+            print(f"[latlog] {log.name}: {len(windows)} windows, {n_spikes} p99 spike(s)")
+            log_rows.append(summary)
+        if log_rows:
+            df_all = pd.concat([df_all, pd.DataFrame(log_rows)[df_all.columns]], ignore_index=True)
+
+    # The machine that ran the jobs, from the machine.json saved with the results
+    # (python3 -m acslib.fingerprint --write <results_dir> --disk <fio filename>)
+    fp = find_sidecar(args.results_dir, root=args.results_dir) or {}
+    df_all.insert(1, "host", fp.get("host") or "unknown")
+    if fp:
+        print(f"[host] {fp['host']} ({fp['machine_id']}): {fp['cpu_model']}, disk {fp.get('disk_model')}")
+
+    is_baseline = df_all["file"].str.contains("_qd1", regex=False)
+    is_sweep = ~is_baseline & df_all["file"].str.contains("_sweep", regex=False)
+    baseline_rows = df_all[is_baseline].reset_index(drop=True)
+    sweep_rows = df_all[is_sweep].reset_index(drop=True)
+
+    # === Baselines ===
+    if not baseline_rows.empty:
+        df_base = baseline_rows
+        print("\n=== Zero-Queue Baselines ===")
+        print(df_base[["file","iops","bw_MBps","lat_avg_us","lat_99_us"]])
+        save_table(df_base, "baseline_table")
+        if not args.no_plots:
+            plot_baselines(df_base)
+
+    # === Sweeps ===
+    if not sweep_rows.empty:
+        df_sweep = sweep_rows.copy()
+        df_sweep["bs_bytes"] = parse_bs(df_sweep["bs"])
+
+        print("\n=== Pattern & Granularity Sweep ===")
+        print(df_sweep[["file","bs","iops","bw_MBps","lat_avg_us","lat_99_us"]])
+        save_table(df_sweep, "sweep_table")
+        if not args.no_plots:
+            plot_sweeps(df_sweep)
+
+    print("\nSaved " + ("tables" if args.no_plots else "plots and tables") + " (CSV always, Markdown if available).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Bump when the set/meaning of cached columns changes so old .npz files are re-parsed.
+CACHE_VERSION = 1
+
+# Per-job columns extracted from fio JSON. Strings are stored as fixed-width unicode
+# arrays so np.load never needs pickle.
+NUM_COLS = ["iops", "bw_bytes", "clat_mean_ns", "clat_p99_ns"]
+STR_COLS = ["jobname", "bs"]
+
+
+def default_cache_dir(results_dir):
+    return Path(results_dir) / ".fio_cache"
+
+
+def _cache_path(cache_dir, json_path):
+    key = hashlib.sha1(str(Path(json_path).resolve()).encode()).hexdigest()[:16]
+    return Path(cache_dir) / f"{Path(json_path).stem}.{key}.npz"
+
+
+def parse_fio_json(json_path):
+    """Walk every job in one fio JSON file and return its columns as numpy arrays."""
+    with open(json_path) as f:
+        data = json.load(f)
+
+    cols = {c: [] for c in NUM_COLS + STR_COLS}
+    for job in data["jobs"]:
+        stats = job["read"] if job["read"]["io_bytes"] > 0 else job["write"]
+        clat = stats["clat_ns"]
+        cols["jobname"].append(job["jobname"])
+        cols["bs"].append(job.get("job options", {}).get("bs", ""))
+        cols["iops"].append(stats["iops"])
+        cols["bw_bytes"].append(stats["bw_bytes"])
+        cols["clat_mean_ns"].append(clat["mean"])
+        cols["clat_p99_ns"].append(clat.get("percentile", {}).get("99.000000", 0))
+
+    out = {c: np.asarray(cols[c], dtype=np.float64) for c in NUM_COLS}
+    out.update({c: np.asarray(cols[c], dtype=str) for c in STR_COLS})
+    return out
+
+
+def _load_cached(cache_file, st):
+    try:
+        with np.load(cache_file, allow_pickle=False) as z:
+            meta = z["_meta"]
+            if (int(meta[0]) != CACHE_VERSION or int(meta[1]) != st.st_size
+                    or int(meta[2]) != st.st_mtime_ns):
+                return None
+            return {c: z[c] for c in NUM_COLS + STR_COLS}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _store_cached(cache_file, st, cols):
+    meta = np.array([CACHE_VERSION, st.st_size, st.st_mtime_ns], dtype=np.int64)
+    tmp = cache_file.with_suffix(".tmp.npz")
+    np.savez(tmp, _meta=meta, **cols)
+    os.replace(tmp, cache_file)
+
+
+def load_fio_results(results_dir, cache_dir=None, use_cache=True, verbose=False):
+    """Return one row per fio job across all *.json files in results_dir.
+
+    Each JSON file is parsed at most once per (size, mtime); its columns are kept
+    in a per-file .npz under cache_dir and every run concatenates the cached
+    arrays into a single DataFrame.
+    """
+    results_dir = Path(results_dir)
+    cache_dir = Path(cache_dir) if cache_dir else default_cache_dir(results_dir)
+    if use_cache:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # machine.json is the host fingerprint (acslib/fingerprint.py), not a fio report
+    json_files = sorted(p for p in results_dir.glob("*.json") if p.name != "machine.json")
+    parts, names, parsed = [], [], 0
+    for jf in json_files:
+        st = jf.stat()
+        cache_file = _cache_path(cache_dir, jf)
+        cols = _load_cached(cache_file, st) if use_cache else None
+        if cols is None:
+            try:
+                cols = parse_fio_json(jf)
+            except (json.JSONDecodeError, KeyError) as e:
+                print(f"[!] Skipping {jf.name}: {e}")
+                continue
+            parsed += 1
+            if use_cache:
+                _store_cached(cache_file, st, cols)
+        parts.append(cols)
+        names.append(np.full(len(cols["jobname"]), jf.name))
+
+    if verbose:
+        print(f"[cache] {len(json_files)} files, {parsed} parsed, "
+              f"{len(json_files) - parsed} from cache")
+
+    if not parts:
+        return pd.DataFrame(columns=["file"] + STR_COLS + NUM_COLS)
+
+    df = pd.DataFrame({"file": np.concatenate(names)})
+    for c in STR_COLS + NUM_COLS:
+        df[c] = np.concatenate([p[c] for p in parts])
+    return df
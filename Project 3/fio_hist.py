@@ -0,0 +1,165 @@
+import bisect
+import math
+from itertools import accumulate
+
+
+class LatencyHistogram:
+    """Completion-latency histogram as two sorted arrays (latency ns, IO count).
+
+    Built from fio's `--output-format=json+` "bins" it is exact: merging read and
+    write, several jobs or repeated runs just adds counts per latency value, and
+    any percentile (p99.99, p99.999, ...) is a cumulative-sum lookup.
+
+    Plain `json` output only has the precomputed "percentile" table; from_percentiles
+    turns that into a coarse histogram with exact=False so callers can say so.
+
+    numpy is imported by the methods that need it, not with the module: the table
+    commands (tail-lat, rwmix/qd-sweep --no-plot) read a handful of percentiles
+    through job_bins()/bins_percentiles() below and never load it.
+    """
+    __slots__ = ("values", "counts", "exact")
+
+    def __init__(self, values, counts, exact=True):
+        import numpy as np
+        self.values = np.asarray(values, dtype=np.int64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.exact = exact
+
+    @classmethod
+    def empty(cls):
+        return cls([], [])
+
+    @classmethod
+    def from_bins(cls, bins, exact=True):
+        import numpy as np
+        vals = np.fromiter(map(int, bins.keys()), dtype=np.int64, count=len(bins))
+        cnts = np.fromiter(bins.values(), dtype=np.int64, count=len(bins))
+        order = np.argsort(vals, kind="stable")
+        return cls(vals[order], cnts[order], exact)
+
+    @classmethod
+    def from_percentiles(cls, pct, total, max_ns=None):
+        """Approximate histogram: the IOs between two listed percentiles sit at the upper one."""
+        return cls.from_bins(percentile_bins(pct, total, max_ns), exact=False)
+
+    @classmethod
+    def from_fio(cls, stats, kind="clat_ns"):
+        """Histogram for one direction ("read"/"write") dict of a fio job."""
+        return cls.from_bins(*fio_bins(stats, kind))
+
+    @classmethod
+    def merge(cls, *hists):
+        import numpy as np
+        hists = [h for h in hists if h.total]
+        if not hists:
+            return cls.empty()
+        exact = all(h.exact for h in hists)
+        if len(hists) == 1 and np.all(np.diff(hists[0].values) > 0):
+            return cls(hists[0].values, hists[0].counts, exact)
+        vals = np.concatenate([h.values for h in hists])
+        cnts = np.concatenate([h.counts for h in hists])
+        uniq, inv = np.unique(vals, return_inverse=True)
+        summed = np.zeros(len(uniq), dtype=np.int64)
+        np.add.at(summed, inv, cnts)
+        return cls(uniq, summed, exact)
+
+    def __add__(self, other):
+        return LatencyHistogram.merge(self, other)
+
+    def __sub__(self, other):
+        """IOs in self but not in other, e.g. one status interval from two cumulative snapshots."""
+        diff = LatencyHistogram.merge(self, LatencyHistogram(other.values, -other.counts))
+        keep = diff.counts > 0
+        return LatencyHistogram(diff.values[keep], diff.counts[keep], self.exact and other.exact)
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def mean(self):
+        import numpy as np
+        t = self.total
+        return float(np.dot(self.values, self.counts) / t) if t else float("nan")
+
+    def percentiles(self, ps):
+        """Latency (ns) at each percentile in ps (0-100), vectorized over ps."""
+        import numpy as np
+        ps = np.atleast_1d(np.asarray(ps, dtype=np.float64))
+        if not self.total:
+            return np.full(ps.shape, np.nan)
+        cum = np.cumsum(self.counts)
+        rank = np.ceil(ps / 100.0 * cum[-1]).clip(1, cum[-1])
+        return self.values[np.searchsorted(cum, rank, side="left")].astype(np.float64)
+
+
+def percentile_bins(pct, total, max_ns=None):
+    """{latency ns: IO count} from fio's percentile table, for total IOs."""
+    if not pct or total <= 0:
+        return {}
+    # ceil matches the rank rule in percentiles(), so each listed percentile reads back
+    # its own value, except where two of them ceil to the same rank (small N): that
+    # rank can only hold one value, and the upper percentile's wins
+    vs, cnts, edge = [], [], 0
+    for p, v in sorted((float(p), int(v)) for p, v in pct.items()):
+        rank = min(math.ceil(p / 100.0 * total), total)
+        if rank > edge:
+            vs.append(v)
+            cnts.append(rank - edge)
+            edge = rank
+        elif vs:
+            vs[-1] = v
+    if total > edge:
+        vs.append(max_ns if max_ns is not None else vs[-1] if vs else 0)
+        cnts.append(total - edge)
+    bins = {}
+    for v, c in zip(vs, cnts):
+        bins[v] = bins.get(v, 0) + c
+    return bins
+
+
+def fio_bins(stats, kind="clat_ns"):
+    """({latency ns: IO count}, exact) for one direction dict of a fio job."""
+    lat = stats.get(kind, {})
+    if lat.get("bins"):
+        return {int(v): c for v, c in lat["bins"].items()}, True
+    return percentile_bins(lat.get("percentile", {}), int(lat.get("N", 0)), lat.get("max")), False
+
+
+def merge_bins(*parts):
+    """Sum (bins, exact) pairs into one."""
+    out = {}
+    for bins, _ in parts:
+        for v, c in bins.items():
+            out[v] = out.get(v, 0) + c
+    return out, all(exact for bins, exact in parts if bins)
+
+
+def job_bins(job, ddirs=("read", "write"), kind="clat_ns"):
+    """job_histogram() as (bins, exact), without numpy."""
+    return merge_bins(*(fio_bins(job[d], kind) for d in ddirs if d in job and job[d].get("io_bytes", 0) > 0))
+
+
+def bins_percentiles(bins, ps):
+    """LatencyHistogram.percentiles() of a bins dict in plain Python, as a list (few bins, few ps)."""
+    if not sum(bins.values()):
+        return [float("nan")] * len(ps)
+    vals = sorted(v for v, c in bins.items() if c)
+    cum = list(accumulate(bins[v] for v in vals))
+    n = cum[-1]
+    return [float(vals[bisect.bisect_left(cum, min(max(math.ceil(p / 100.0 * n), 1), n))]) for p in ps]
+
+
+def job_histogram(job, ddirs=("read", "write"), kind="clat_ns"):
+    """Merge the directions of one fio job that actually did IO."""
+    parts = [LatencyHistogram.from_fio(job[d], kind) for d in ddirs
+             if d in job and job[d].get("io_bytes", 0) > 0]
+    return LatencyHistogram.merge(*parts)
+
+
+def percentile_lookup(pct):
+    """{float percentile: value} so "99.000000" / "99.0" / "99" all resolve in O(1)."""
+    return {round(float(k), 6): v for k, v in pct.items()}
+
+
+def parse_percentiles(text):
+    return [float(p) for p in text.split(",") if p.strip()]
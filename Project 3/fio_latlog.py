@@ -0,0 +1,211 @@
+"""Streaming reader for fio per-IO latency logs (write_lat_log / log_avg_msec=0).
+
+Each line of a `<prefix>_clat.<N>.log` is `time_ms, latency_ns, ddir, bs, offset[, prio]`.
+The log is read in fixed-size chunks and every IO is dropped into a log-spaced latency
+bin of its time window. Memory depends on the chunk size, not on the log size or on how
+many windows a chunk spans: a chunk is taken a bounded number of windows at a time and
+open windows keep only the bins they have IOs in. Bins are 1/64 of an octave wide
+(< 1.1% error on every percentile).
+
+    python3 fio_latlog.py results/qd_sweep_4k_rand_clat.1.log --window-ms 1000
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fio_hist import LatencyHistogram, parse_percentiles
+
+CHUNK_ROWS = 1_000_000
+WINDOWS_PER_PASS = 4096
+BINS_PER_OCTAVE = 64
+N_BINS = 48 * BINS_PER_OCTAVE  # up to 2^48 ns (~78 h)
+# Upper edge of each bin, so binned percentiles never under-report a latency
+BIN_NS = np.exp2((np.arange(N_BINS) + 1) / BINS_PER_OCTAVE)
+DDIRS = {"read": 0, "write": 1, "trim": 2}
+LOG_COLS = ["time_ms", "lat_ns", "ddir", "bs"]
+
+
+def iter_chunks(path, chunksize=CHUNK_ROWS, ddir=None):
+    """Yield the log as DataFrames of at most chunksize rows (time_ms, lat_ns, ddir, bs)."""
+    reader = pd.read_csv(path, header=None, names=LOG_COLS, usecols=range(4),
+                         dtype=np.int64, skipinitialspace=True, chunksize=chunksize)
+    for chunk in reader:
+        if ddir is not None:
+            chunk = chunk[chunk["ddir"] == DDIRS.get(ddir, ddir)]
+        if len(chunk):
+            yield chunk
+
+
+def latency_bins(lat_ns):
+    return np.clip(np.log2(np.maximum(lat_ns, 1)) * BINS_PER_OCTAVE, 0, N_BINS - 1).astype(np.int64)
+
+
+def iter_windows(path, window_ms=1000, chunksize=CHUNK_ROWS, ddir=None):
+    """Yield one dict per time window: start_ms, end_ms, ios, bytes, lat_sum_ns, bs_counts, bins.
+
+    fio writes completions roughly in time order, so a window is emitted once the log has
+    moved two windows past it. The rare IO that completes later still goes into the
+    oldest open window.
+    """
+    open_w = {}
+
+    def emit(w):
+        e = open_w.pop(w)
+        e["start_ms"] = w * window_ms
+        bins = np.zeros(N_BINS, dtype=np.int64)
+        for idx, cnt in e["bins"]:
+            bins[idx] += cnt  # idx has no repeats within one part
+        e["bins"] = bins
+        return e
+
+    def add(uw, rel, t, lat, bs):
+        nwin = len(uw)
+        # (window, bin) counts, sparse: a chunk fills at most one bin per row however many
+        # windows it spans, where a dense nwin x N_BINS array grows with the span
+        keys, key_counts = np.unique(rel * N_BINS + latency_bins(lat), return_counts=True)
+        cuts = np.searchsorted(keys, np.arange(1, nwin) * N_BINS)
+        bin_idx, bin_cnt = np.split(keys % N_BINS, cuts), np.split(key_counts, cuts)
+        ios = np.bincount(rel, minlength=nwin)
+        nbytes = np.bincount(rel, weights=bs, minlength=nwin)
+        lat_sum = np.bincount(rel, weights=lat, minlength=nwin)
+        t_end = np.full(nwin, -1, dtype=np.int64)
+        np.maximum.at(t_end, rel, t)
+
+        pairs, pair_counts = np.unique(np.stack([rel, bs], axis=1), axis=0, return_counts=True)
+
+        for i in range(nwin):
+            w = int(uw[i])
+            e = open_w.get(w)
+            if e is None:
+                open_w[w] = e = {"ios": 0, "bytes": 0.0, "lat_sum_ns": 0.0, "end_ms": 0,
+                                 "bins": [], "bs_counts": {}}
+            e["ios"] += int(ios[i])
+            e["bytes"] += float(nbytes[i])
+            e["lat_sum_ns"] += float(lat_sum[i])
+            e["end_ms"] = max(e["end_ms"], int(t_end[i]))
+            e["bins"].append((bin_idx[i], bin_cnt[i]))
+        for (i, size), c in zip(pairs.tolist(), pair_counts.tolist()):
+            e = open_w[int(uw[i])]["bs_counts"]
+            e[size] = e.get(size, 0) + c
+
+        last = int(uw[-1])
+        for w in sorted(w for w in open_w if w < last - 1):
+            yield emit(w)
+
+    for chunk in iter_chunks(path, chunksize, ddir):
+        t = chunk["time_ms"].to_numpy()
+        lat = chunk["lat_ns"].to_numpy()
+        bs = chunk["bs"].to_numpy()
+        win = t // window_ms
+        if open_w:
+            win = np.maximum(win, min(open_w))
+        # Only windows that actually have IOs in this chunk (idle gaps cost nothing)
+        uw, rel = np.unique(win, return_inverse=True)
+        # A sparse chunk can span a great many windows; take them WINDOWS_PER_PASS at a
+        # time so no more than that are ever open
+        starts = list(range(0, len(uw), WINDOWS_PER_PASS)) + [len(uw)]
+        if len(starts) > 2:
+            order = np.argsort(rel, kind="stable")
+            t, lat, bs, rel = t[order], lat[order], bs[order], rel[order]
+            rows = np.searchsorted(rel, starts)
+        else:
+            rows = [0, len(rel)]
+        for lo, hi, a, b in zip(starts, starts[1:], rows, rows[1:]):
+            yield from add(uw[lo:hi], rel[a:b] - lo, t[a:b], lat[a:b], bs[a:b])
+
+    for w in sorted(open_w):
+        yield emit(w)
+
+
+def bins_histogram(bins):
+    nz = np.flatnonzero(bins)
+    return LatencyHistogram(BIN_NS[nz].round(), bins[nz], exact=False)
+
+
+def scan_lat_log(path, window_ms=1000, percentiles=(50, 99, 99.9), chunksize=CHUNK_ROWS, ddir=None):
+    """Return (per-window DataFrame, whole-log summary dict) for one lat log."""
+    rows = []
+    total_bins = np.zeros(N_BINS, dtype=np.int64)
+    ios = nbytes = lat_sum = 0
+    bs_counts = {}
+    t_first = t_last = None
+    for w in iter_windows(path, window_ms, chunksize, ddir):
+        # A partial last window is rated over the time it actually covers
+        span_s = max(min(window_ms, w["end_ms"] - w["start_ms"] + 1), 1) / 1000.0
+        row = {"start_s": w["start_ms"] / 1000.0, "ios": w["ios"],
+               "iops": w["ios"] / span_s, "bw_MBps": w["bytes"] / span_s / (1024*1024),
+               "lat_avg_us": w["lat_sum_ns"] / w["ios"] / 1000}
+        pv = bins_histogram(w["bins"]).percentiles(percentiles) / 1000
+        row.update({f"lat_p{p:g}_us": v for p, v in zip(percentiles, pv)})
+        rows.append(row)
+
+        total_bins += w["bins"]
+        ios += w["ios"]
+        nbytes += w["bytes"]
+        lat_sum += w["lat_sum_ns"]
+        for s, c in w["bs_counts"].items():
+            bs_counts[s] = bs_counts.get(s, 0) + c
+        t_first = w["start_ms"] if t_first is None else t_first
+        t_last = w["end_ms"]
+
+    windows = pd.DataFrame(rows)
+    if not ios:
+        return windows, None
+    runtime_s = max(t_last - t_first, 1) / 1000.0
+    p99 = bins_histogram(total_bins).percentiles([99])[0]
+    bs = max(bs_counts, key=bs_counts.get)
+    summary = {"file": Path(path).name, "jobname": Path(path).name.split(".")[0],
+               "iops": ios / runtime_s, "bw_MBps": nbytes / runtime_s / (1024*1024),
+               "lat_avg_us": lat_sum / ios / 1000, "lat_99_us": p99 / 1000,
+               "bs": f"{bs // 1024}k" if bs % 1024 == 0 else str(bs)}
+    return windows, summary
+
+
+def flag_spikes(windows, col="lat_p99_us", factor=3.0, history=30):
+    """Mark windows whose tail latency is factor x the rolling median of the previous ones."""
+    baseline = windows[col].shift(1).rolling(history, min_periods=1).median()
+    windows = windows.copy()
+    windows["baseline_us"] = baseline
+    windows["spike"] = windows[col] > factor * baseline
+    return windows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("logs", nargs="+", help="fio *_clat.N.log / *_lat.N.log files")
+    ap.add_argument("--window-ms", type=int, default=1000)
+    ap.add_argument("--percentiles", default="50,99,99.9")
+    ap.add_argument("--ddir", choices=sorted(DDIRS), default=None, help="Only this direction")
+    ap.add_argument("--spike-factor", type=float, default=3.0)
+    ap.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    args = ap.parse_args()
+    wanted = parse_percentiles(args.percentiles)
+    spike_col = f"lat_p{max(wanted):g}_us" if 99 not in wanted else "lat_p99_us"
+
+    summaries = []
+    for log in args.logs:
+        windows, summary = scan_lat_log(log, args.window_ms, wanted, args.chunksize, args.ddir)
+        if summary is None:
+            print(f"[!] {log}: no IOs")
+            continue
+        windows = flag_spikes(windows, spike_col, args.spike_factor)
+        out = Path(log).with_suffix(".windows.csv")
+        windows.to_csv(out, index=False)
+        spikes = windows[windows["spike"]]
+        print(f"\n=== {Path(log).name}: {len(windows)} windows of {args.window_ms} ms -> {out}")
+        if spikes.empty:
+            print("No latency spikes")
+        else:
+            print(f"{len(spikes)} spike window(s) (> {args.spike_factor:g}x rolling median {spike_col}):")
+            print(spikes[["start_s", "iops", spike_col, "baseline_us"]].to_string(index=False))
+        summaries.append(summary)
+
+    if summaries:
+        print("\n=== Lat-log summary ===")
+        print(pd.DataFrame(summaries).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
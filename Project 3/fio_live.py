@@ -0,0 +1,163 @@
+"""Live view of a running fio job from its --status-interval JSON stream.
+
+fio prints a complete (cumulative) JSON report every status interval. Each report is
+decoded as soon as its last line arrives; only the unfinished report is buffered.
+Consecutive reports are differenced into per-interval IOs, bytes and (with
+--output-format=json+) exact latency histograms, and a fixed number of the most
+recent intervals gives rolling IOPS, MiB/s and percentiles. The plot_rwmix.py /
+plot_qd_sweep.py figures and table are re-rendered in place at most every --refresh s.
+
+    fio --status-interval=10 --output-format=json+ jobs/rwmix_4k_rand_qd32.fio \
+        | python3 fio_live.py --view rwmix
+    fio --status-interval=10 --output-format=json+ --output=results/soak.json jobs/rwmix_4k_rand_qd32.fio &
+    python3 fio_live.py results/soak.json --follow --view rwmix --out results/soak
+"""
+import argparse
+import codecs
+import json
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+from fio_hist import LatencyHistogram, job_histogram, parse_percentiles
+import plot_qd_sweep
+import plot_rwmix
+
+VIEWS = {"rwmix": plot_rwmix, "qd": plot_qd_sweep}
+DDIRS = ("read", "write")
+
+
+def iter_json_objects(stream, chunk_size=1 << 16, follow=False, idle_s=60.0, poll_s=0.5):
+    """Yield each top-level object of a binary stream of concatenated JSON documents.
+
+    Reads take whatever bytes are available (read1), so a report is handled when it
+    arrives, not when chunk_size bytes have piled up behind it. fio pretty-prints every
+    report and closes it with "}" at the start of a line, so a decode is only attempted
+    when such a line has arrived, not on every chunk. With follow, a file still being
+    written is polled until it stops growing for idle_s.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    read = getattr(stream, "read1", stream.read)
+    buf, scan, idle = "", 0, 0.0
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            if not follow or idle >= idle_s:
+                return
+            time.sleep(poll_s)
+            idle += poll_s
+            continue
+        idle = 0.0
+        buf += utf8.decode(chunk)
+        while True:
+            close = buf.find("\n}", max(scan - 1, 0))
+            if close < 0:
+                scan = len(buf)
+                break
+            start = buf.find("{")
+            if start < 0 or start > close:
+                buf, scan = buf[close + 2:], 0  # stray text (fio warnings) between reports
+                continue
+            try:
+                obj, end = decoder.raw_decode(buf, start)
+            except json.JSONDecodeError:
+                scan = close + 2  # a nested "}" line, not the end of this report yet
+                continue
+            yield obj
+            buf, scan = buf[end:], 0
+
+
+class Rolling:
+    """Per-job rates and latency over the last `window` status intervals."""
+
+    def __init__(self, window, percentiles):
+        self.percentiles = percentiles
+        self.window = window
+        self.prev = {}       # (groupid, jobname) -> (runtime_ms, ios, bytes, cumulative histogram)
+        self.intervals = {}  # (groupid, jobname) -> deque of (seconds, ios, bytes, interval histogram)
+
+    def update(self, report):
+        rows = []
+        for job in report["jobs"]:
+            ios = sum(job[d]["total_ios"] for d in DDIRS if d in job)
+            if ios == 0:
+                continue  # not started yet (stonewall)
+            key = (job.get("groupid", 0), job["jobname"])
+            t_ms = job.get("job_runtime") or report.get("timestamp_ms", 0)
+            nbytes = sum(job[d]["io_bytes"] for d in DDIRS if d in job)
+            hist = job_histogram(job)
+            prev = self.prev.get(key)
+            self.prev[key] = (t_ms, ios, nbytes, hist)
+            if prev is None or t_ms <= prev[0]:
+                continue  # need two reports for an interval
+            q = self.intervals.setdefault(key, deque(maxlen=self.window))
+            q.append(((t_ms - prev[0]) / 1000.0, ios - prev[1], nbytes - prev[2], hist - prev[3]))
+
+            secs = sum(e[0] for e in q)
+            # Interval histograms are exact only with json+ bins; otherwise fall back to
+            # fio's cumulative percentile table for the whole run so far
+            exact = all(e[3].exact for e in q)
+            lat = LatencyHistogram.merge(*[e[3] for e in q]) if exact else hist
+            pcts = lat.percentiles(self.percentiles) / 1000.0
+            row = {"elapsed_s": t_ms / 1000.0, "job": job["jobname"],
+                   "iops": sum(e[1] for e in q) / secs, "MiBps": sum(e[2] for e in q) / secs / 2**20,
+                   "lat_avg_us": lat.mean() / 1000.0}
+            row.update({f"p{p:g}_us": v for p, v in zip(self.percentiles, pcts)})
+            row["latency"] = "window" if exact else "cumulative"
+            rows.append(row)
+        return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rolling stats and in-place plots from fio --status-interval JSON")
+    ap.add_argument("source", nargs="?", default="-", help="fio JSON output file, or - for stdin (default)")
+    ap.add_argument("--follow", action="store_true", help="Keep reading a file that fio is still writing")
+    ap.add_argument("--idle", type=float, default=60.0, help="With --follow, stop after this many seconds without output")
+    ap.add_argument("--window", type=int, default=6, help="Status intervals in the rolling window")
+    ap.add_argument("--percentiles", default="50,99,99.9")
+    ap.add_argument("--view", choices=["none"] + sorted(VIEWS), default="none",
+                    help="Also keep the plot_rwmix.py / plot_qd_sweep.py figures and table up to date")
+    ap.add_argument("--refresh", type=float, default=30.0, help="Minimum seconds between figure refreshes")
+    ap.add_argument("--out", default="results/live", help="Path prefix for <out>.live.csv, figures and <out>.md")
+    args = ap.parse_args()
+
+    rolling = Rolling(args.window, parse_percentiles(args.percentiles))
+    view = VIEWS.get(args.view)
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    stream = sys.stdin.buffer if args.source == "-" else open(args.source, "rb")
+
+    def render(report):
+        rows = view.load_rows(report)
+        if rows:
+            view.plot(rows, out)
+            out.with_suffix(".md").write_text(view.markdown(rows) + "\n")
+
+    last_render, report, n = 0.0, None, 0
+    with open(out.with_suffix(".live.csv"), "w") as csv:
+        header = None
+        for report in iter_json_objects(stream, follow=args.follow, idle_s=args.idle):
+            n += 1
+            rows = rolling.update(report)
+            for r in rows:
+                if header is None:
+                    header = list(r)
+                    csv.write(",".join(header) + "\n")
+                csv.write(",".join(f"{r[k]:.3f}" if isinstance(r[k], float) else str(r[k]) for k in header) + "\n")
+                pct = "  ".join(f"{k[:-3]} {r[k]:.0f}" for k in header if k.startswith("p") and k.endswith("_us"))
+                print(f"[{r['elapsed_s']:7.0f} s] {r['job']}: {r['iops']:9.0f} IOPS {r['MiBps']:8.1f} MiB/s  "
+                      f"{pct} us ({r['latency']})")
+            csv.flush()
+            if view and time.monotonic() - last_render >= args.refresh:
+                render(report)
+                last_render = time.monotonic()
+    if view and report is not None:
+        render(report)  # the final report is the complete run
+    print(f"{n} reports. Rolling stats in {out.with_suffix('.live.csv')}"
+          + (f", figures and {out.with_suffix('.md')} from the last report" if view else ""))
+
+
+if __name__ == "__main__":
+    main()
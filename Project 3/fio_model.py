@@ -0,0 +1,297 @@
+"""Predict fio throughput and p99 latency for configurations that were never run.
+
+Every fio JSON in a results directory (the rwmix, QD and block-size sweeps and the
+QD 1 baselines) becomes one training point per job over
+    pattern (rand/seq), read %, block size, queue depth.
+log IOPS and log p99 are each modelled as a linear trend plus a Gaussian process
+(squared-exponential kernel, one length scale per input) on the residuals. The
+kernel hyperparameters maximize the marginal likelihood over a grid, evaluated
+in fixed-size batches of Cholesky factorizations (memory stays flat as runs are
+added; only the best combination is kept). `fit` saves the
+model as an .npz; `predict` loads it and answers a query in milliseconds with a
+95% interval; `suggest` picks the runs that would shrink the predictive variance
+over the whole configuration space the most (greedy, integrated variance) and can
+write them as a fio job file.
+
+    python3 fio_model.py fit
+    python3 fio_model.py predict --pattern rand --read-pct 60 --bs 16k 64k --qd 8 64
+    python3 fio_model.py suggest -n 3 --write-jobs jobs/suggested.fio
+"""
+import argparse
+import configparser
+import itertools
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from fio_hist import job_histogram
+
+HERE = Path(__file__).resolve().parent
+FEATURES = ["rand", "read_frac", "log2_bs_4k", "log2_qd"]
+TARGETS = ["log_iops", "log_p99_us"]
+# Input scaling: every feature spans roughly [0, 1] over 4k-1M blocks and QD 1-256
+SCALE = np.array([1.0, 1.0, 8.0, 8.0])
+# From about independent points (0.125, below the spacing of any input) to an almost
+# constant kernel (4, far past the ~[0, 1] span): an optimum at either end is saturated,
+# not cut off by the grid
+LENGTH_GRID = [0.125, 0.25, 0.5, 1.0, 2.0, 4.0]
+NOISE_GRID = [0.01, 0.03, 0.1, 0.3, 1.0]
+RIDGE = 1e-3
+# Kernel matrices factorized per batch in the grid search (bounds its memory)
+BATCH_BYTES = 16 << 20
+# Query space for `suggest`
+GRID = {"rand": [0, 1], "read_pct": [0, 30, 50, 70, 100], "bs": [4096 << i for i in range(7)],
+        "qd": [1, 2, 4, 8, 16, 32, 64, 128]}
+
+
+def bs_bytes(text):
+    text = str(text).strip().lower()
+    mult = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}.get(text[-1:], 1)
+    return int(text.rstrip("kmg") or 0) * mult
+
+
+def fmt_bs(b):
+    return f"{b // 1024 ** 2}m" if b >= 1024 ** 2 and b % 1024 ** 2 == 0 else f"{b // 1024}k"
+
+
+def features(rand, read_pct, bs, qd):
+    """Model inputs, one row per configuration (arguments broadcast)."""
+    rand, read_pct, bs, qd = np.broadcast_arrays(*(np.asarray(v, float) for v in (rand, read_pct, bs, qd)))
+    return np.stack([rand, read_pct / 100.0, np.log2(bs / 4096.0), np.log2(qd)], axis=-1).reshape(-1, 4)
+
+
+def job_point(job, glob_opts):
+    """(pattern, read %, bs, QD, numjobs, IOPS, p99 us) of one fio job that did IO, else None."""
+    opts = {**glob_opts, **job.get("job options", {})}
+    rw = opts.get("rw", "read")
+    rand = rw.startswith("rand")
+    kind = rw[4:] if rand else rw
+    read_pct = {"read": 100, "write": 0}.get(kind, float(opts.get("rwmixread", 50)))
+    iops = sum(job[d]["iops"] for d in ("read", "write") if d in job)
+    if iops <= 0:
+        return None
+    p99 = float(job_histogram(job).percentiles(99.0)[0]) / 1000.0
+    return (float(rand), read_pct, bs_bytes(opts.get("bs", "4k")), int(opts.get("iodepth", 1)),
+            int(opts.get("numjobs", 1)), iops, p99)
+
+
+def load_points(results_dir):
+    rows, files = [], []
+    for jf in sorted(Path(results_dir).glob("*.json")):
+        try:
+            data = json.loads(jf.read_text())
+        except ValueError:
+            continue
+        if "jobs" not in data:
+            continue  # machine.json, qd_search summaries
+        files.append(jf.name)
+        for job in data["jobs"]:
+            p = job_point(job, data.get("global options", {}))
+            if p is not None:
+                rows.append(p)
+    return np.array(rows, dtype=float).reshape(-1, 7), files
+
+
+def _kernel(A, B, ls):
+    d = (A[..., :, None, :] - B[..., None, :, :]) / ls[..., None, None, :]
+    return np.exp(-0.5 * np.sum(d * d, axis=-1))
+
+
+def _trend(X, y):
+    """Ridge-regularized linear trend; the GP models what it leaves."""
+    F = np.hstack([np.ones((len(X), 1)), X])
+    return np.linalg.solve(F.T @ F + RIDGE * np.eye(F.shape[1]), F.T @ y)
+
+
+def fit_target(X, y):
+    """Trend coefficients, GP hyperparameters and weights for one target."""
+    beta = _trend(X, y)
+    r = y - np.hstack([np.ones((len(X), 1)), X]) @ beta
+    amp = max(r.std(), 1e-3)
+    combos = np.array([(*ls, nz) for ls in itertools.product(LENGTH_GRID, repeat=X.shape[1]) for nz in NOISE_GRID])
+    n = len(X)
+    sq = ((X[:, None, :] - X[None, :, :]) ** 2).reshape(n * n, -1)  # squared distance per input
+    batch = max(1, BATCH_BYTES // (8 * n * n))
+    best = (-np.inf, None, None)
+    for s in range(0, len(combos), batch):
+        ls, noise = combos[s:s + batch, :-1], combos[s:s + batch, -1]
+        # Log marginal likelihood of this batch of hyperparameter combinations
+        K = amp ** 2 * np.exp(-0.5 * sq @ (1.0 / ls ** 2).T).T.reshape(-1, n, n) + (noise ** 2)[:, None, None] * np.eye(n)
+        L = np.linalg.cholesky(K)
+        alpha = np.linalg.solve(L, np.broadcast_to(r[:, None], (len(ls), n, 1)))[..., 0]
+        lml = -0.5 * np.sum(alpha ** 2, axis=1) - np.sum(np.log(np.diagonal(L, axis1=1, axis2=2)), axis=1)
+        i = int(np.argmax(lml))
+        if lml[i] > best[0]:
+            best = (lml[i], ls[i], noise[i])
+    lml, ls, noise = best
+    Kb = amp ** 2 * _kernel(X, X, ls) + noise ** 2 * np.eye(n)
+    return {"beta": beta, "ls": ls, "noise": noise, "amp": amp,
+            "weights": np.linalg.solve(Kb, r), "K_inv": np.linalg.inv(Kb), "lml": lml}
+
+
+class FioModel:
+    """Trend + GP per target; predictions are in log space, reported back as IOPS and us."""
+
+    def __init__(self, X, params):
+        self.X = X
+        self.params = params
+
+    @classmethod
+    def fit(cls, points):
+        X = features(points[:, 0], points[:, 1], points[:, 2], points[:, 3]) / SCALE
+        ys = {"log_iops": np.log(points[:, 5]), "log_p99_us": np.log(points[:, 6])}
+        return cls(X, {t: fit_target(X, ys[t]) for t in TARGETS})
+
+    def save(self, path, files=()):
+        arrays = {"X": self.X, "files": np.asarray(list(files), dtype=str)}
+        for t, p in self.params.items():
+            arrays.update({f"{t}.{k}": np.asarray(v) for k, v in p.items()})
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as z:
+            params = {t: {k.split(".", 1)[1]: z[k] for k in z.files if k.startswith(t + ".")} for t in TARGETS}
+            return cls(z["X"], params)
+
+    def _gp(self, Xq, t):
+        p = self.params[t]
+        ks = p["amp"] ** 2 * _kernel(Xq, self.X, p["ls"])
+        mean = np.hstack([np.ones((len(Xq), 1)), Xq]) @ p["beta"] + ks @ p["weights"]
+        var = p["amp"] ** 2 - np.einsum("ij,jk,ik->i", ks, p["K_inv"], ks)
+        return mean, np.sqrt(np.clip(var, 0, None) + p["noise"] ** 2)
+
+    def predict(self, rand, read_pct, bs, qd):
+        """{target: (mean, std)} in log space for each (broadcast) configuration."""
+        Xq = features(rand, read_pct, bs, qd) / SCALE
+        return {t: self._gp(Xq, t) for t in TARGETS}
+
+    def outside(self, rand, read_pct, bs, qd):
+        """True where a configuration lies outside the range of the training data (extrapolation)."""
+        Xq = features(rand, read_pct, bs, qd) / SCALE
+        return ((Xq < self.X.min(axis=0)) | (Xq > self.X.max(axis=0))).any(axis=1)
+
+    def posterior_cov(self, Xq, t):
+        p = self.params[t]
+        ks = p["amp"] ** 2 * _kernel(Xq, self.X, p["ls"])
+        return p["amp"] ** 2 * _kernel(Xq, Xq, p["ls"]) - ks @ p["K_inv"] @ ks.T
+
+
+def suggest(model, n):
+    """Greedy: the run whose result would remove the most predictive variance summed over GRID
+    (both targets, scaled by their noise), then condition on it and repeat."""
+    cands = np.array(list(itertools.product(*GRID.values())), dtype=float)
+    Xq = features(cands[:, 0], cands[:, 1], cands[:, 2], cands[:, 3]) / SCALE
+    covs = {t: model.posterior_cov(Xq, t) for t in TARGETS}
+    picks = []
+    for _ in range(n):
+        gain = np.zeros(len(cands))
+        for t, C in covs.items():
+            nz = model.params[t]["noise"] ** 2
+            gain += np.sum(C ** 2, axis=0) / (np.diag(C) + nz) / nz
+        gain[picks] = -np.inf
+        i = int(np.argmax(gain))
+        picks.append(i)
+        for t, C in covs.items():
+            nz = model.params[t]["noise"] ** 2
+            covs[t] = C - np.outer(C[:, i], C[i, :]) / (C[i, i] + nz)
+    return cands[picks]
+
+
+def write_jobs(path, picks, template):
+    """fio job file: the template's [global] plus one stonewalled job per suggested run."""
+    cp = configparser.ConfigParser(allow_no_value=True, interpolation=None, strict=False)
+    cp.optionxform = str
+    cp.read(template)
+    out = configparser.ConfigParser(allow_no_value=True, interpolation=None)
+    out.optionxform = str
+    out["global"] = {k: v for k, v in cp["global"].items() if k not in ("rw", "rwmixread", "bs", "iodepth")}
+    for rand, read_pct, bs, qd in picks:
+        rw = {100: "read", 0: "write"}.get(int(read_pct), "rw")
+        name = f"{'rand' if rand else 'seq'}_r{int(read_pct)}_{fmt_bs(int(bs))}_qd{int(qd)}"
+        out[name] = {"stonewall": None, "rw": "rand" + rw if rand else rw,
+                     "bs": fmt_bs(int(bs)), "iodepth": str(int(qd))}
+        if rw == "rw":
+            out[name]["rwmixread"] = str(int(read_pct))
+    with open(path, "w") as f:
+        out.write(f, space_around_delimiters=False)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Performance-surface model over fio results")
+    ap.add_argument("--model", default="results/fio_model.npz")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    fp = sub.add_parser("fit", help="Train on every fio JSON in a results directory")
+    fp.add_argument("--results", default="results")
+    pp = sub.add_parser("predict", help="IOPS, MiB/s and p99 for untested configurations (all combinations)")
+    pp.add_argument("--pattern", nargs="+", choices=["rand", "seq"], default=["rand"])
+    pp.add_argument("--read-pct", type=float, nargs="+", default=[100])
+    pp.add_argument("--bs", nargs="+", default=["4k"])
+    pp.add_argument("--qd", type=int, nargs="+", default=[1])
+    sp = sub.add_parser("suggest", help="fio runs that would reduce the model's uncertainty most")
+    sp.add_argument("-n", type=int, default=3)
+    sp.add_argument("--write-jobs", metavar="FIO", help="Also write them as a fio job file")
+    sp.add_argument("--template", default=str(HERE / "jobs" / "rwmix_4k_rand_qd32.fio"),
+                    help="Job file whose [global] section the suggested jobs use")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "fit":
+        points, files = load_points(args.results)
+        multi = points[:, 4] != 1
+        if multi.any():
+            print(f"[!] Leaving out {int(multi.sum())} job(s) with numjobs != 1 (not a model input)")
+            points = points[~multi]
+        if len(points) < 4:
+            raise SystemExit(f"Only {len(points)} usable fio jobs in {args.results}")
+        t0 = time.perf_counter()
+        model = FioModel.fit(points)
+        Path(args.model).parent.mkdir(parents=True, exist_ok=True)
+        model.save(args.model, files)
+        print(f"{len(points)} jobs from {len(files)} files, fitted in {time.perf_counter() - t0:.2f} s")
+        for t in TARGETS:
+            p = model.params[t]
+            ls = ", ".join(f"{f}={v:g}" for f, v in zip(FEATURES, p["ls"]))
+            print(f"  {t}: length scales {ls}; noise {p['noise']:g} (log units)")
+        print(f"Saved {args.model}")
+        return
+
+    t0 = time.perf_counter()
+    model = FioModel.load(args.model)
+    if args.cmd == "predict":
+        combos = list(itertools.product([p == "rand" for p in args.pattern], args.read_pct,
+                                        [bs_bytes(b) for b in args.bs], args.qd))
+        rand, read_pct, bs, qd = (np.array(c, dtype=float) for c in zip(*combos))
+        pred = model.predict(rand, read_pct, bs, qd)
+        extra = model.outside(rand, read_pct, bs, qd)
+        elapsed = time.perf_counter() - t0
+        (mi, si), (mp, sp_) = pred["log_iops"], pred["log_p99_us"]
+        print("| Pattern | Read % | BS | QD | IOPS (95% CI) | MiB/s | p99 us (95% CI) |")
+        print("|---|---:|---:|---:|---:|---:|---:|")
+        for k, (r, rp, b, q) in enumerate(combos):
+            iops = np.exp(mi[k])
+            print(f"| {'rand' if r else 'seq'} | {rp:g} | {fmt_bs(b)} | {q}{' *' if extra[k] else ''} | {iops:.0f} "
+                  f"({np.exp(mi[k] - 1.96 * si[k]):.0f}-{np.exp(mi[k] + 1.96 * si[k]):.0f}) | "
+                  f"{iops * b / 2**20:.1f} | {np.exp(mp[k]):.0f} "
+                  f"({np.exp(mp[k] - 1.96 * sp_[k]):.0f}-{np.exp(mp[k] + 1.96 * sp_[k]):.0f}) |")
+        if extra.any():
+            print("\n* outside the measured range: extrapolated from the linear trend, treat with care")
+        print(f"\n{len(combos)} configurations in {elapsed * 1000:.1f} ms (model load included)")
+    else:
+        picks = suggest(model, args.n)
+        print(f"Runs that would reduce uncertainty most (searched {np.prod([len(v) for v in GRID.values()])} "
+              "configurations):")
+        for rand, read_pct, bs, qd in picks:
+            pred = model.predict(rand, read_pct, bs, qd)
+            si, sp_ = pred["log_iops"][1][0], pred["log_p99_us"][1][0]
+            print(f"  {'rand' if rand else 'seq'} read {read_pct:g}% bs {fmt_bs(int(bs))} QD {int(qd)}: "
+                  f"now IOPS x/÷{np.exp(1.96 * si):.2f}, p99 x/÷{np.exp(1.96 * sp_):.2f} (95%)")
+        if args.write_jobs:
+            write_jobs(args.write_jobs, picks, args.template)
+            print(f"Saved {args.write_jobs}; run it with: fio --output-format=json --output=results/<name>.json "
+                  f"{args.write_jobs}")
+
+
+if __name__ == "__main__":
+    main()
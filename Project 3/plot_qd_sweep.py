@@ -1,30 +1,59 @@
-import json, pathlib, numpy as np, matplotlib.pyplot as plt
+import argparse, json, pathlib
 
-path = pathlib.Path.home() / "fio" / "results" / "qd_sweep_4k_rand.json"
-with open(path) as f:
-    data = json.load(f)
+from fio_hist import bins_percentiles, job_bins
 
-rows = []
-for job in data["jobs"]:
+def job_row(job):
     qd = int(job["job options"]["iodepth"])
     bw = (job["read"]["bw"] + job["write"]["bw"]) / 1024.0  # MiB/s
     lat = job["read"]["clat_ns"]["mean"] / 1000.0 if job["read"]["clat_ns"]["mean"] > 0 else 0
-    p99 = job["read"]["clat_ns"]["percentile"]["99.000000"] / 1000.0
-    rows.append((qd, bw, lat, p99))
-
-rows.sort(key=lambda r: r[0])
-qd, bw, lat, p99 = zip(*rows)
-
-plt.errorbar(lat, bw, xerr=[l*0.05 for l in lat], fmt='o-', capsize=4)  # fake ±5% err if no repeats
-plt.title("4 KiB Random Read — Throughput vs Latency")
-plt.xlabel("Average Latency (µs)")
-plt.ylabel("Throughput (MiB/s)")
-plt.grid(True)
-plt.tight_layout()
-plt.savefig(path.with_suffix(".tradeoff.png"))
-
-# Markdown table
-print("| QD | BW (MiB/s) | Avg Lat (µs) | p99 Lat (µs) |")
-print("|---:|---:|---:|---:|")
-for q in rows:
-    print(f"| {q[0]} | {q[1]:.1f} | {q[2]:.1f} | {q[3]:.1f} |")
+    p99 = bins_percentiles(job_bins(job, ddirs=("read",))[0], [99.0])[0] / 1000.0
+    return (qd, bw, lat, p99)
+
+def load_rows(data):
+    """(QD, MiB/s, avg µs, p99 µs) per job that has done IO, by QD."""
+    rows = [job_row(job) for job in data["jobs"] if job["read"].get("io_bytes", 0) > 0]
+    rows.sort(key=lambda r: r[0])
+    return rows
+
+def plot(rows, path):
+    """Write <path>.tradeoff.png (overwritten on every call)."""
+    import matplotlib.pyplot as plt  # only here, so the table alone starts without it
+    qd, bw, lat, p99 = zip(*rows)
+
+    plt.figure()
+    plt.errorbar(lat, bw, xerr=[l*0.05 for l in lat], fmt='o-', capsize=4)  # fake ±5% err if no repeats
+    plt.title("4 KiB Random Read — Throughput vs Latency")
+    plt.xlabel("Average Latency (µs)")
+    plt.ylabel("Throughput (MiB/s)")
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(path.with_suffix(".tradeoff.png"))
+    plt.close()
+
+def markdown(rows):
+    # Markdown table
+    lines = ["| QD | BW (MiB/s) | Avg Lat (µs) | p99 Lat (µs) |",
+             "|---:|---:|---:|---:|"]
+    for q in rows:
+        lines.append(f"| {q[0]} | {q[1]:.1f} | {q[2]:.1f} | {q[3]:.1f} |")
+    return "\n".join(lines)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(usage="python3 plot_qd_sweep.py [<fio_json> ...] [--no-plot]")
+    ap.add_argument("json", nargs="*", default=[str(pathlib.Path.home() / "fio" / "results" / "qd_sweep_4k_rand.json")])
+    ap.add_argument("--no-plot", action="store_true", help="Only print the Markdown table (matplotlib is not loaded)")
+    args = ap.parse_args(argv)
+
+    for path in map(pathlib.Path, args.json):
+        with open(path) as f:
+            data = json.load(f)
+
+        rows = load_rows(data)
+        if not args.no_plot:
+            plot(rows, path)
+        if len(args.json) > 1:
+            print(f"\n### {path.name}\n")
+        print(markdown(rows))
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,12 @@
-import json, sys, pathlib
-import matplotlib.pyplot as plt
+import argparse, json, pathlib
 
-path = pathlib.Path.home() / "fio" / "results" / "rwmix_4k_rand_qd32.json"
-if len(sys.argv) > 1:
-    path = pathlib.Path(sys.argv[1])
-
-with open(path) as f:
-    data = json.load(f)
+from fio_hist import bins_percentiles, job_bins
 
 # Order the mixes as requested
-order = ["R100", "W100", "R70W30", "R50W50"]
+ORDER = ["R100", "W100", "R70W30", "R50W50"]
 
-rows = []
-for job in data["jobs"]:
+def job_row(job):
     name = job["jobname"]
-    if name not in order:
-        continue
     # Throughput (MiB/s)
     # fio reports 'bw' in KiB/s
     if "read" in job and job["read"]["io_bytes"] > 0:
@@ -43,46 +34,87 @@ for job in data["jobs"]:
         r_weight = (job["read"]["total_ios"] if "read" in job else 0)/total_ios
         w_weight = (job["write"]["total_ios"] if "write" in job else 0)/total_ios
         lat_avg_us = r_weight * r_latus + w_weight * w_latus
-        lat_p99_us = max(r_p99us, w_p99us)  # conservative
+        # p99 of the combined read+write distribution. Exact when fio ran with
+        # --output-format=json+ (latency bins); otherwise a mixture of the two
+        # percentile tables, which is still tighter than max(r_p99, w_p99).
+        bins, exact = job_bins(job)
+        lat_p99_us = bins_percentiles(bins, [99.0])[0] / 1000.0
+        n_dirs = sum(1 for d in ("read", "write") if d in job and job[d]["io_bytes"] > 0)
+        p99_exact = exact or n_dirs == 1  # one direction: fio's own p99
     else:
         lat_avg_us = lat_p99_us = 0.0
+        p99_exact = True
 
-    rows.append({
+    return {
         "name": name, "total_bw_mib": total_bw_mib,
         "r_bw_mib": rbw_mib, "w_bw_mib": wbw_mib,
-        "lat_avg_us": lat_avg_us, "lat_p99_us": lat_p99_us,
+        "lat_avg_us": lat_avg_us, "lat_p99_us": lat_p99_us, "p99_exact": p99_exact,
         "r_lat_us": r_latus, "w_lat_us": w_latus
-    })
+    }
+
+def load_rows(data):
+    """One row per mix in ORDER; mixes that have not done any IO yet (live status) are skipped."""
+    rows = [job_row(job) for job in data["jobs"]
+            if job["jobname"] in ORDER and any(job.get(d, {}).get("io_bytes", 0) > 0 for d in ("read", "write"))]
+    # Reorder
+    return sorted(rows, key=lambda r: ORDER.index(r["name"]))
+
+def plot(rows, path):
+    """Write <path>.throughput.png and <path>.latency.png (overwritten on every call)."""
+    import matplotlib.pyplot as plt  # only here, so the table alone starts without it
+    labels = [r["name"] for r in rows]
+    bw = [r["total_bw_mib"] for r in rows]
+    lat = [r["lat_avg_us"] for r in rows]
+
+    # Plot 1: Throughput vs Mix (MiB/s)
+    plt.figure()
+    plt.title("4 KiB Random, QD=32 — Throughput vs Read/Write Mix")
+    plt.xlabel("Mix")
+    plt.ylabel("Throughput (MiB/s)")
+    plt.plot(labels, bw, marker="o")
+    plt.grid(True, which="both", axis="both")
+    plt.tight_layout()
+    plt.savefig(path.with_suffix(".throughput.png"))
+    plt.close()
+
+    # Plot 2: Avg Latency vs Mix (µs)
+    plt.figure()
+    plt.title("4 KiB Random, QD=32 — Average Latency vs Read/Write Mix")
+    plt.xlabel("Mix")
+    plt.ylabel("Average Latency (µs)")
+    plt.plot(labels, lat, marker="o")
+    plt.grid(True, which="both", axis="both")
+    plt.tight_layout()
+    plt.savefig(path.with_suffix(".latency.png"))
+    plt.close()
 
-# Reorder
-rows = sorted(rows, key=lambda r: order.index(r["name"]))
+def markdown(rows):
+    """Markdown table you can paste."""
+    lines = ["| Mix | Total BW (MiB/s) | Avg Lat (µs) | p99 Lat (µs) | Read Lat (µs) | Write Lat (µs) |",
+             "|---|---:|---:|---:|---:|---:|"]
+    for r in rows:
+        p99 = f"{r['lat_p99_us']:.1f}" if r["p99_exact"] else f"~{r['lat_p99_us']:.1f}"
+        lines.append(f"| {r['name']} | {r['total_bw_mib']:.1f} | {r['lat_avg_us']:.1f} | {p99} | {r['r_lat_us']:.1f} | {r['w_lat_us']:.1f} |")
+    if not all(r["p99_exact"] for r in rows):
+        lines.append("\n~ combined p99 estimated from fio's percentile tables; rerun fio with --output-format=json+ for exact values")
+    return "\n".join(lines)
 
-labels = [r["name"] for r in rows]
-bw = [r["total_bw_mib"] for r in rows]
-lat = [r["lat_avg_us"] for r in rows]
+def main(argv=None):
+    ap = argparse.ArgumentParser(usage="python3 plot_rwmix.py [<fio_json> ...] [--no-plot]")
+    ap.add_argument("json", nargs="*", default=[str(pathlib.Path.home() / "fio" / "results" / "rwmix_4k_rand_qd32.json")])
+    ap.add_argument("--no-plot", action="store_true", help="Only print the Markdown table (matplotlib is not loaded)")
+    args = ap.parse_args(argv)
 
-# Plot 1: Throughput vs Mix (MiB/s)
-plt.figure()
-plt.title("4 KiB Random, QD=32 — Throughput vs Read/Write Mix")
-plt.xlabel("Mix")
-plt.ylabel("Throughput (MiB/s)")
-plt.plot(labels, bw, marker="o")
-plt.grid(True, which="both", axis="both")
-plt.tight_layout()
-plt.savefig(path.with_suffix(".throughput.png"))
+    for path in map(pathlib.Path, args.json):
+        with open(path) as f:
+            data = json.load(f)
 
-# Plot 2: Avg Latency vs Mix (µs)
-plt.figure()
-plt.title("4 KiB Random, QD=32 — Average Latency vs Read/Write Mix")
-plt.xlabel("Mix")
-plt.ylabel("Average Latency (µs)")
-plt.plot(labels, lat, marker="o")
-plt.grid(True, which="both", axis="both")
-plt.tight_layout()
-plt.savefig(path.with_suffix(".latency.png"))
+        rows = load_rows(data)
+        if not args.no_plot:
+            plot(rows, path)
+        if len(args.json) > 1:
+            print(f"\n### {path.name}\n")
+        print(markdown(rows))
 
-# Also print a Markdown table you can paste
-print("| Mix | Total BW (MiB/s) | Avg Lat (µs) | p99 Lat (µs) | Read Lat (µs) | Write Lat (µs) |")
-print("|---|---:|---:|---:|---:|---:|")
-for r in rows:
-    print(f"| {r['name']} | {r['total_bw_mib']:.1f} | {r['lat_avg_us']:.1f} | {r['lat_p99_us']:.1f} | {r['r_lat_us']:.1f} | {r['w_lat_us']:.1f} |")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Find the highest throughput that keeps p99 completion latency under an SLO.
+
+Instead of running every queue depth of qd_sweep_4k_rand.fio for 30 s each, the
+[global] section of a job file is used as a template and QD is searched per numjobs:
+doubling from QD 1 while p99 meets the SLO and IOPS still grow, then bisecting
+between the last passing and the first failing depth. Only the points near the
+knee get measured.
+
+    python3 qd_search.py --slo-us 500
+    python3 qd_search.py --slo-us 2000 --numjobs 1 2 4 --filename /mnt/nvme/fio.dat --runtime 15
+
+Writes <out>.csv (every probe, with the Pareto frontier marked), <out>.json (the chosen
+operating point and the search settings), <out>.png, and each probe's fio JSON under
+<out>_runs/. The default target is a file on tmpfs (/dev/shm) so the search can be
+tried anywhere; point --filename at the device under test for real numbers.
+"""
+import argparse
+import configparser
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from fio_hist import job_histogram
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+from acslib import fingerprint
+
+
+def read_template(path):
+    """fio job file -> ConfigParser (keys keep their case, bare flags like `stonewall` allowed)."""
+    cp = configparser.ConfigParser(allow_no_value=True, interpolation=None, strict=False)
+    cp.optionxform = str
+    cp.read(path)
+    return cp
+
+
+def is_tmpfs(path):
+    """True if path lives on tmpfs, where O_DIRECT is not supported."""
+    path = os.path.realpath(path)
+    best, fstype = "", None
+    try:
+        with open("/proc/mounts") as f:
+            for line in f:
+                _, mnt, fs = line.split()[:3]
+                if (path == mnt or path.startswith(mnt.rstrip("/") + "/")) and len(mnt) > len(best):
+                    best, fstype = mnt, fs
+    except OSError:
+        return False
+    return fstype == "tmpfs"
+
+
+def job_file(glob_opts, iodepth, numjobs):
+    """One-job fio file: the template's [global] options plus this probe's QD and numjobs."""
+    cp = configparser.ConfigParser(allow_no_value=True, interpolation=None)
+    cp.optionxform = str
+    cp["global"] = glob_opts
+    cp[f"qd{iodepth}_nj{numjobs}"] = {"iodepth": str(iodepth), "numjobs": str(numjobs)}
+    buf = io.StringIO()
+    cp.write(buf, space_around_delimiters=False)
+    return buf.getvalue()
+
+
+def summarize(data):
+    """fio JSON -> IOPS, MiB/s, mean and p99 completion latency (us) over every job and direction."""
+    iops = sum(j[d]["iops"] for j in data["jobs"] for d in ("read", "write") if d in j)
+    bw = sum(j[d]["bw_bytes"] for j in data["jobs"] for d in ("read", "write") if d in j)
+    hist = job_histogram(data["jobs"][0])
+    for job in data["jobs"][1:]:
+        hist = hist + job_histogram(job)
+    return {"iops": iops, "bw_MiBps": bw / 2**20, "lat_avg_us": hist.mean() / 1000,
+            "p99_us": float(hist.percentiles(99.0)[0]) / 1000}
+
+
+def make_probe(args, glob_opts, runs_dir):
+    """probe(iodepth, numjobs) runs fio once per point; returns (probe, {(qd, nj): result})."""
+    cache = {}
+
+    def probe(iodepth, numjobs):
+        if (iodepth, numjobs) in cache:
+            return cache[(iodepth, numjobs)]
+        out = runs_dir / f"qd{iodepth}_nj{numjobs}.json"
+        with tempfile.NamedTemporaryFile("w", suffix=".fio", delete=False) as f:
+            f.write(job_file(glob_opts, iodepth, numjobs))
+        try:
+            subprocess.run([args.fio, "--output-format=json", f"--output={out}", f.name], check=True)
+        finally:
+            os.unlink(f.name)
+        r = {"numjobs": numjobs, "iodepth": iodepth, **summarize(json.loads(out.read_text()))}
+        r["meets_slo"] = r["p99_us"] <= args.slo_us
+        print(f"  numjobs={numjobs} QD={iodepth:>4}: {r['iops']:10.0f} IOPS  p99 {r['p99_us']:9.1f} us"
+              f"{'' if r['meets_slo'] else '  > SLO'}")
+        cache[(iodepth, numjobs)] = r
+        return r
+
+    return probe, cache
+
+
+def search_qd(probe, numjobs, max_qd, min_gain):
+    """Double QD while the SLO holds and IOPS still grow by min_gain, then bisect the SLO edge."""
+    ok, bad, qd = None, None, 1
+    while qd <= max_qd:
+        r = probe(qd, numjobs)
+        if not r["meets_slo"]:
+            bad = qd
+            break
+        saturated = ok is not None and r["iops"] < probe(ok, numjobs)["iops"] * (1 + min_gain)
+        ok = qd
+        if saturated:
+            return  # past the throughput knee: deeper queues only add latency
+        qd *= 2
+    if ok is None or bad is None:
+        return
+    while bad - ok > 1:
+        mid = (ok + bad) // 2
+        if probe(mid, numjobs)["meets_slo"]:
+            ok = mid
+        else:
+            bad = mid
+
+
+def pareto(df):
+    """Points no other point beats on both IOPS (higher) and p99 (lower)."""
+    best_p99, keep = float("inf"), set()
+    for i, r in df.sort_values(["iops", "p99_us"], ascending=[False, True]).iterrows():
+        if r["p99_us"] < best_p99:
+            keep.add(i)
+            best_p99 = r["p99_us"]
+    return df.index.isin(keep)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Search queue depth (and numjobs) for max IOPS under a p99 SLO")
+    ap.add_argument("--slo-us", type=float, required=True, help="p99 completion-latency SLO in microseconds")
+    ap.add_argument("--template", default=str(HERE / "jobs" / "qd_sweep_4k_rand.fio"),
+                    help="fio job file whose [global] section defines the workload")
+    ap.add_argument("--numjobs", type=int, nargs="+", help="numjobs values to search (default: the template's)")
+    ap.add_argument("--max-qd", type=int, default=256)
+    ap.add_argument("--min-gain", type=float, default=0.03,
+                    help="Stop doubling once IOPS grow by less than this fraction; also the tie tolerance "
+                         "when picking the operating point")
+    ap.add_argument("--filename", default="/dev/shm/fio_qd_search.dat" if Path("/dev/shm").is_dir()
+                    else str(Path(tempfile.gettempdir()) / "fio_qd_search.dat"))
+    ap.add_argument("--size", default="1G")
+    ap.add_argument("--runtime", type=int, default=10, help="Seconds per probe")
+    ap.add_argument("--ramp", type=int, default=2, help="ramp_time per probe")
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="Override a [global] option")
+    ap.add_argument("--fio", default="fio")
+    ap.add_argument("--out", default="results/qd_search")
+    ap.add_argument("--dry-run", action="store_true", help="Print the QD 1 job file and exit")
+    args = ap.parse_args()
+
+    glob_opts = dict(read_template(args.template)["global"])
+    glob_opts.update(filename=args.filename, size=args.size, runtime=str(args.runtime),
+                     ramp_time=str(args.ramp), time_based="1")
+    if glob_opts.get("direct") == "1" and is_tmpfs(Path(args.filename).parent):
+        print(f"[!] {args.filename} is on tmpfs, which has no O_DIRECT: running with direct=0")
+        glob_opts["direct"] = "0"
+    for kv in args.set:
+        k, _, v = kv.partition("=")
+        glob_opts[k] = v
+    numjobs = args.numjobs or [int(glob_opts.pop("numjobs", "1"))]
+    glob_opts.pop("numjobs", None)
+    glob_opts.pop("iodepth", None)
+
+    if args.dry_run:
+        print(job_file(glob_opts, 1, numjobs[0]), end="")
+        return
+
+    out = Path(args.out)
+    runs_dir = out.parent / f"{out.name}_runs"
+    runs_dir.mkdir(parents=True, exist_ok=True)
+    fingerprint.write_sidecar(out.parent, disk_path=args.filename)
+    probe, results = make_probe(args, glob_opts, runs_dir)
+    for nj in numjobs:
+        print(f"numjobs={nj}:")
+        search_qd(probe, nj, args.max_qd, args.min_gain)
+
+    df = pd.DataFrame(list(results.values()))
+    df = df.sort_values(["numjobs", "iodepth"]).reset_index(drop=True)
+    df["frontier"] = pareto(df)
+    df.to_csv(out.with_suffix(".csv"), index=False)
+
+    ok = df[df["meets_slo"]]
+    chosen = None
+    if not ok.empty:
+        # Highest IOPS under the SLO; within min_gain of it, the fewest outstanding IOs
+        near = ok[ok["iops"] >= ok["iops"].max() * (1 - args.min_gain)]
+        chosen = near.loc[(near["iodepth"] * near["numjobs"]).idxmin()].to_dict()
+    summary = {"slo_p99_us": args.slo_us, "template": args.template, "filename": args.filename,
+               "runtime_s": args.runtime, "probes": len(df), "chosen": chosen}
+    out.with_suffix(".json").write_text(json.dumps(summary, indent=2, default=lambda v: v.item()) + "\n")
+
+    plt.figure(figsize=(8, 5))
+    for nj, sub in df.groupby("numjobs"):
+        sub = sub.sort_values("iodepth")
+        plt.plot(sub["iops"], sub["p99_us"], "o-", label=f"numjobs={nj}")
+        for r in sub.itertuples():
+            plt.annotate(f"{r.iodepth}", (r.iops, r.p99_us), textcoords="offset points", xytext=(4, 4), fontsize=7)
+    plt.axhline(args.slo_us, color="red", linestyle="--", label=f"p99 SLO {args.slo_us:g} us")
+    if chosen:
+        plt.scatter([chosen["iops"]], [chosen["p99_us"]], s=200, facecolors="none", edgecolors="black",
+                    label=f"chosen: QD {chosen['iodepth']} x {chosen['numjobs']} jobs")
+    plt.yscale("log")
+    plt.xlabel("Throughput (IOPS)")
+    plt.ylabel("p99 completion latency (us)")
+    plt.title("Throughput vs p99 (labels: QD)")
+    plt.grid(True, which="both", linestyle=":")
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(out.with_suffix(".png"))
+
+    print(f"\n{len(df)} probes x {args.runtime + args.ramp} s. Saved {out}.csv, {out}.json, {out}.png")
+    if chosen:
+        print(f"Operating point: QD {chosen['iodepth']} x {chosen['numjobs']} jobs, {chosen['iops']:.0f} IOPS, "
+              f"p99 {chosen['p99_us']:.1f} us (SLO {args.slo_us:g} us)")
+    else:
+        print(f"No probe met the SLO (p99 <= {args.slo_us:g} us), not even QD 1")
+
+
+if __name__ == "__main__":
+    main()
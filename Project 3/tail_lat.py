@@ -1,32 +1,49 @@
-import json, pathlib, sys
+import argparse, json, pathlib
 
-# Allow passing JSON file as arg
-if len(sys.argv) < 2:
-    print("Usage: python3 tail_lat.py <fio_json>")
-    sys.exit(1)
+from fio_hist import bins_percentiles, job_bins, merge_bins, parse_percentiles, percentile_lookup
 
-p = pathlib.Path(sys.argv[1])
-d = json.loads(p.read_text())
+# Pass one fio JSON, or several repeated runs of the same sweep: jobs with the same
+# QD are merged. With --output-format=json+ the merge and every percentile are
+# exact; plain json only has fio's own percentile table, so percentiles fio did
+# not list are shown as "-" and merged runs are marked "~" (approximate).
+def main(argv=None):
+    ap = argparse.ArgumentParser(usage="python3 tail_lat.py <fio_json> [<fio_json> ...]")
+    ap.add_argument("json", nargs="+")
+    ap.add_argument("--percentiles", default="50,95,99,99.9",
+                    help="Comma-separated percentiles to report, e.g. 50,99,99.99,99.999")
+    args = ap.parse_args(argv)
+    wanted = parse_percentiles(args.percentiles)
 
-print("| QD | p50 (µs) | p95 (µs) | p99 (µs) | p99.9 (µs) | Avg (µs) |")
-print("|---:|---:|---:|---:|---:|---:|")
+    by_qd = {}
+    for path in args.json:
+        d = json.loads(pathlib.Path(path).read_text())
+        for j in d["jobs"]:
+            qd = int(j["job options"]["iodepth"])
+            cl = j["read"]["clat_ns"]
+            e = by_qd.setdefault(qd, {"hists": [], "listed": None, "ios": 0, "lat_sum": 0.0})
+            e["hists"].append(job_bins(j, ddirs=("read",)))
+            listed = set(percentile_lookup(cl.get("percentile", {})))
+            e["listed"] = listed if e["listed"] is None else e["listed"] & listed
+            e["ios"] += cl.get("N", 0)
+            e["lat_sum"] += cl["mean"] * cl.get("N", 0)
 
-for j in sorted(d["jobs"], key=lambda x:int(x["job options"]["iodepth"])):
-    qd = int(j["job options"]["iodepth"])
-    cl = j["read"]["clat_ns"]
-    pct = cl.get("percentile", {})
+    print("| QD | " + " | ".join(f"p{p:g} (µs)" for p in wanted) + " | Avg (µs) |")
+    print("|---:|" + "---:|" * (len(wanted) + 1))
 
-    # Find keys by numeric closeness (fio sometimes formats them differently)
-    def find_percentile(target):
-        for k, v in pct.items():
-            if abs(float(k) - target) < 1e-6:
-                return v / 1000.0  # ns → µs
-        return None
+    for qd in sorted(by_qd):
+        e = by_qd[qd]
+        bins, exact = merge_bins(*e["hists"])
+        vals = [v / 1000.0 for v in bins_percentiles(bins, wanted)]  # ns → µs
+        cells = []
+        for p, v in zip(wanted, vals):
+            if exact:
+                cells.append(f"{v:.1f}")
+            elif round(p, 6) not in e["listed"]:
+                cells.append("-")
+            else:
+                cells.append(f"{v:.1f}" if len(e["hists"]) == 1 else f"~{v:.1f}")
+        avg = e["lat_sum"] / e["ios"] / 1000.0 if e["ios"] else float("nan")
+        print(f"| {qd} | " + " | ".join(cells) + f" | {avg:.1f} |")
 
-    p50  = find_percentile(50.0)
-    p95  = find_percentile(95.0)
-    p99  = find_percentile(99.0)
-    p999 = find_percentile(99.9)
-    avg  = cl["mean"] / 1000.0
-
-    print(f"| {qd} | {p50:.1f} | {p95:.1f} | {p99:.1f} | {p999:.1f} | {avg:.1f} |")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""One entry point for the analysis scripts of all three projects.
+
+Run it from the project directory you would run the script from (the scripts keep
+their relative default paths). Only the chosen script is imported, and the scripts
+import pandas/matplotlib only on the paths that need them, so the table commands
+start with little more than numpy:
+
+    python3 ../acsbench.py tail-lat results/qd_sweep_4k_rand.json --percentiles 50,99,99.99
+    python3 ../acsbench.py rwmix --no-plot results/rwmix_*.json
+    python3 ../acsbench.py roofline --csv results/default_results.csv --profile machine_profile.json
+
+Batch mode runs many commands in one process, so each heavy module is imported once
+for all of them. Lines are shell-quoted subcommands; blank lines and # comments are
+skipped, and -C DIR runs the line in another directory:
+
+    printf '%s\\n' "tail-lat run1.json" "tail-lat run2.json" "-C ../Project 2 part6" | python3 acsbench.py batch -
+
+pipeline.py reruns these commands as a build graph, only where inputs changed.
+"""
+import argparse
+import importlib
+import os
+import shlex
+import sys
+import time
+import traceback
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+# subcommand -> (project directory, module, what it does)
+COMMANDS = {
+    "plots":      ("Project 1", "make_plots",      "Speedup, GFLOP/s and CPE plots from bench.cpp results"),
+    "roofline":   ("Project 1", "roofline",        "Roofline plot of bench.cpp results"),
+    "part6":      ("Project 2", "analyze_part6",   "saxpy throughput vs footprint and stride"),
+    "part7":      ("Project 2", "analyze_part7",   "saxpy TLB impact at large footprint"),
+    "average":    ("Project 2", "average_runs",    "Average microbench run CSVs (median + CI)"),
+    "microbench": ("Project 2", "plot_microbench", "Microbench sweep plots"),
+    "usl":        ("Project 2", "usl_fit",         "USL fit of bandwidth vs threads: saturation point and peak"),
+    "fio":        ("Project 3", "analyze_fio",     "Baseline and sweep tables/plots from a fio results dir"),
+    "qd-sweep":   ("Project 3", "plot_qd_sweep",   "QD sweep table and throughput/latency plot"),
+    "rwmix":      ("Project 3", "plot_rwmix",      "Read/write mix table and plots"),
+    "tail-lat":   ("Project 3", "tail_lat",        "Tail-latency percentile table"),
+    "fio-model":  ("Project 3", "fio_model",       "Predict untested fio configurations; suggest the next runs"),
+}
+
+
+def load(name):
+    project, module, _ = COMMANDS[name]
+    path = str(ROOT / project)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return importlib.import_module(module)
+
+
+def run(name, argv, cwd=None):
+    """Run one subcommand in this process; returns its exit status."""
+    old_argv, old_cwd = sys.argv, os.getcwd()
+    sys.argv = [f"acsbench {name}"] + argv  # argparse usage lines name the subcommand
+    try:
+        if cwd:
+            os.chdir(cwd)
+        load(name).main(argv)
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)  # as the interpreter would for sys.exit("message")
+        return 1
+    finally:
+        sys.argv = old_argv
+        os.chdir(old_cwd)
+        if "matplotlib.pyplot" in sys.modules:
+            sys.modules["matplotlib.pyplot"].close("all")  # don't carry figures into the next command
+
+
+def batch(lines, keep_going=True, timing=False):
+    failed = 0
+    for lineno, line in enumerate(lines, 1):
+        words = shlex.split(line, comments=True)
+        if not words:
+            continue
+        cwd = None
+        if words[0] == "-C" and len(words) > 2:
+            cwd, words = words[1], words[2:]
+        if words[0] not in COMMANDS:
+            print(f"[!] line {lineno}: unknown command {words[0]!r}", file=sys.stderr)
+            status = 2
+        else:
+            t0 = time.perf_counter()
+            try:
+                status = run(words[0], words[1:], cwd)
+            except Exception:
+                traceback.print_exc()
+                status = 1
+            if timing:
+                print(f"[{time.perf_counter() - t0:.3f} s] {line.strip()}", file=sys.stderr)
+        if status:
+            failed += 1
+            print(f"[!] line {lineno} exited with {status}: {line.strip()}", file=sys.stderr)
+            if not keep_going:
+                break
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    listing = "\n".join(f"  {k:<11} {p}/{m}.py: {what}" for k, (p, m, what) in COMMANDS.items())
+    ap = argparse.ArgumentParser(prog="acsbench", formatter_class=argparse.RawDescriptionHelpFormatter,
+                                 description="Analysis scripts of all three projects",
+                                 epilog=f"commands:\n{listing}\n  {'batch':<11} FILE|- [--stop] [--time]: "
+                                        "one command per line, all in this process\n\n"
+                                        "Options after the command are the script's own (acsbench <command> --help).")
+    ap.add_argument("-C", dest="cwd", metavar="DIR", help="Run in DIR (e.g. the project directory)")
+    ap.add_argument("command", choices=sorted(COMMANDS) + ["batch"], metavar="command")
+    ap.add_argument("args", nargs=argparse.REMAINDER)
+    args = ap.parse_args(argv)
+    rest = args.args  # everything after the command, --help included, goes to the script
+
+    if args.command != "batch":
+        return run(args.command, rest, args.cwd)
+
+    bp = argparse.ArgumentParser(prog="acsbench batch")
+    bp.add_argument("file", nargs="?", default="-", help="Commands, one per line (- for stdin)")
+    bp.add_argument("--stop", action="store_true", help="Stop at the first failing command")
+    bp.add_argument("--time", action="store_true", help="Report each command's wall time on stderr")
+    bargs = bp.parse_args(rest)
+    if args.cwd:
+        os.chdir(args.cwd)
+    lines = sys.stdin.read().splitlines() if bargs.file == "-" else Path(bargs.file).read_text().splitlines()
+    return batch(lines, keep_going=not bargs.stop, timing=bargs.time)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
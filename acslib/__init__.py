@@ -0,0 +1 @@
+"""Helpers shared by the Project 1/2/3 benchmark scripts."""
@@ -0,0 +1,200 @@
+"""Compare two result sets and rank regressions/improvements per configuration.
+
+Usage:
+    python -m acslib.compare old.csv new.csv                          # bench.cpp or microbench CSVs
+    python -m acslib.compare old_results/ new_results/ --metric clat_p99_ns   # fio JSON (files or dirs)
+    python -m acslib.compare old.csv new.csv --fail-on-regression     # exit 1 if anything got worse
+
+Rows are aligned on each kind's configuration keys; every row is one raw sample
+(a rep, a run, a fio job). Per configuration a two-sided Mann-Whitney U test
+(normal approximation with tie correction) is computed for all groups at once
+from one grouped rank, p-values are Benjamini-Hochberg adjusted, and Cliff's
+delta and the relative change of the median give the effect size.
+"""
+import argparse
+import glob
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from acslib.fingerprint import SIDECAR
+from acslib.kvcsv import fill_bench, fill_mode, read_kv_csv
+
+KEYS = {
+    "bench": ["kernel", "dtype", "N", "stride", "misalign", "variant", "threads", "sweeps", "tile"],
+    "microbench": ["N_bytes", "stride", "repeats", "read_pct", "threads", "mode"],
+    "fio": ["jobname", "rw", "bs", "iodepth", "numjobs"],
+}
+DEFAULT_METRIC = {"bench": "gflops", "microbench": "GiB/s", "fio": "iops"}
+# Metrics where smaller is better; everything else (GFLOP/s, GiB/s, IOPS, bw) is higher-is-better
+LOWER_IS_BETTER = ("time", "lat", "clat", "cpe")
+
+
+def detect_kind(path):
+    p = Path(path)
+    if p.is_dir() or p.suffix == ".json":
+        return "fio"
+    with open(p) as f:
+        head = f.readline()
+    return "bench" if "kernel" in head else "microbench"
+
+
+def load_fio(path):
+    files = sorted(p for p in Path(path).glob("*.json") if p.name != SIDECAR) if Path(path).is_dir() else [Path(path)]
+    rows = []
+    for jf in files:
+        data = json.loads(jf.read_text())
+        for job in data["jobs"]:
+            # rw/bs/iodepth/numjobs are usually set in the job file's [global] section
+            opts = {**data.get("global options", {}), **job.get("job options", {})}
+            for ddir in ("read", "write"):
+                st = job.get(ddir, {})
+                if st.get("io_bytes", 0) <= 0:
+                    continue
+                clat = st["clat_ns"]
+                rows.append({"jobname": job["jobname"], "rw": opts.get("rw", ddir), "bs": opts.get("bs", ""),
+                             "iodepth": opts.get("iodepth", "1"), "numjobs": opts.get("numjobs", "1"),
+                             "ddir": ddir, "iops": st["iops"], "bw_bytes": st["bw_bytes"],
+                             "clat_mean_ns": clat["mean"],
+                             "clat_p99_ns": clat.get("percentile", {}).get("99.000000", np.nan)})
+    return pd.DataFrame(rows)
+
+
+def load(pattern, kind):
+    """Concatenate every file of one result set (a path or a glob of repeated runs)."""
+    files = sorted(glob.glob(pattern)) or [pattern]
+    if kind == "fio":
+        return pd.concat([load_fio(f) for f in files], ignore_index=True)
+    df = pd.concat([read_kv_csv(f) for f in files], ignore_index=True)
+    return fill_mode(df) if kind == "microbench" else fill_bench(df)
+
+
+def _erfc(x):
+    # Chebyshev fit (Numerical Recipes erfcc), |relative error| < 1.2e-7, vectorized over x
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    r = t * np.exp(-z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (
+            -0.82215223 + t * 0.17087277)))))))))
+    return np.where(x >= 0, r, 2.0 - r)
+
+
+def benjamini_hochberg(p):
+    p = np.asarray(p, dtype=np.float64)
+    q = np.full(p.shape, np.nan)
+    ok = np.isfinite(p)
+    if not ok.any():
+        return q
+    pv = p[ok]
+    order = np.argsort(pv)
+    ranked = pv[order] * len(pv) / np.arange(1, len(pv) + 1)
+    ranked = np.minimum.accumulate(ranked[::-1])[::-1].clip(max=1.0)
+    out = np.empty_like(pv)
+    out[order] = ranked
+    q[ok] = out
+    return q
+
+
+def compare(a, b, keys, metric, lower_is_better=None):
+    """One row per configuration present in both sets, most severe regression first."""
+    if lower_is_better is None:
+        lower_is_better = any(metric.startswith(p) for p in LOWER_IS_BETTER)
+    a = a[keys + [metric]].dropna(subset=[metric]).assign(_set=0)
+    b = b[keys + [metric]].dropna(subset=[metric]).assign(_set=1)
+    both = pd.concat([a, b], ignore_index=True)
+    both[keys] = both[keys].astype(str)
+    both["_gid"] = both.groupby(keys, sort=False).ngroup()
+
+    # Ranks within each configuration (ties averaged) for every group in one pass
+    both["_rank"] = both.groupby("_gid")[metric].rank(method="average")
+    g = both.groupby(["_gid", "_set"])
+    n = g.size().unstack(fill_value=0).reindex(columns=[0, 1], fill_value=0)
+    med = g[metric].median().unstack()
+    rank_a = both[both["_set"] == 0].groupby("_gid")["_rank"].sum()
+    ties = both.groupby(["_gid", metric]).size()
+    tie_term = (ties ** 3 - ties).groupby(level="_gid").sum()
+
+    res = both.drop_duplicates("_gid").set_index("_gid")[keys]
+    na, nb = n[0], n[1]
+    res["n_a"], res["n_b"] = na, nb
+    res = res[(na > 0) & (nb > 0)].copy()
+    na, nb = res["n_a"].to_numpy(float), res["n_b"].to_numpy(float)
+    ntot = na + nb
+    u_a = rank_a.reindex(res.index).to_numpy() - na * (na + 1) / 2  # pairs with A > B (+0.5 ties)
+    mu = na * nb / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = na * nb / 12 * ((ntot + 1) - tie_term.reindex(res.index).to_numpy() / (ntot * (ntot - 1)))
+        z = (np.abs(u_a - mu) - 0.5) / np.sqrt(var)
+        p = np.where((var > 0) & (na > 1) & (nb > 1), _erfc(np.maximum(z, 0) / np.sqrt(2)), np.nan)
+        res["median_a"] = med[0].reindex(res.index).to_numpy()
+        res["median_b"] = med[1].reindex(res.index).to_numpy()
+        res["rel_change"] = res["median_b"] / res["median_a"] - 1
+    res["cliffs_delta"] = 1 - 2 * u_a / (na * nb)  # > 0: B tends to be larger
+    res["p_value"] = p
+    res["q_value"] = benjamini_hochberg(p)
+
+    worse = -res["rel_change"] if not lower_is_better else res["rel_change"]
+    res["_badness"] = worse
+    return res.sort_values("_badness", ascending=False).reset_index(drop=True), lower_is_better
+
+
+def classify(res, alpha=0.05, min_change=0.03):
+    significant = (res["q_value"] < alpha) & (res["rel_change"].abs() >= min_change)
+    return np.select([significant & (res["_badness"] > 0), significant & (res["_badness"] < 0)],
+                     ["regression", "improvement"], "unchanged")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Rank per-configuration regressions between two result sets")
+    ap.add_argument("old", help="Baseline results: a file, a quoted glob of repeated runs, or a fio results dir")
+    ap.add_argument("new", help="Candidate results, same forms")
+    ap.add_argument("--kind", choices=sorted(KEYS), help="Default: detected from the first file")
+    ap.add_argument("--metric", help="Column to compare (default: gflops / GiB/s / iops)")
+    ap.add_argument("--keys", nargs="+", help="Override the configuration keys")
+    ap.add_argument("--alpha", type=float, default=0.05, help="FDR level for the BH-adjusted p-values")
+    ap.add_argument("--min-change", type=float, default=0.03, help="Ignore median changes smaller than this fraction")
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--out", help="Write the full report as CSV")
+    ap.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 if any regression is found")
+    args = ap.parse_args(argv)
+
+    kind = args.kind or detect_kind((glob.glob(args.old) or [args.old])[0])
+    metric = args.metric or DEFAULT_METRIC[kind]
+    keys = args.keys or KEYS[kind]
+    a, b = load(args.old, kind), load(args.new, kind)
+    if kind == "fio" and "ddir" not in keys:
+        keys = keys + ["ddir"]
+
+    res, lower = compare(a, b, keys, metric)
+    res.insert(0, "verdict", classify(res, args.alpha, args.min_change))
+    res = res.drop(columns="_badness")
+    only_a = len(a.drop_duplicates(keys)) - len(res)
+    only_b = len(b.drop_duplicates(keys)) - len(res)
+
+    counts = res["verdict"].value_counts()
+    print(f"{kind}: {len(res)} configurations compared on {metric} ({'lower' if lower else 'higher'} is better); "
+          f"{only_a} only in baseline, {only_b} only in candidate")
+    print(f"{counts.get('regression', 0)} regressions, {counts.get('improvement', 0)} improvements "
+          f"(q < {args.alpha:g}, |change| >= {args.min_change:.0%})")
+    cols = keys + ["n_a", "n_b", "median_a", "median_b", "rel_change", "cliffs_delta", "q_value"]
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        for verdict in ("regression", "improvement"):
+            sub = res[res["verdict"] == verdict]
+            if verdict == "improvement":
+                sub = sub.iloc[::-1]
+            if not sub.empty:
+                print(f"\n=== {verdict.capitalize()}s (top {min(args.top, len(sub))}) ===")
+                print(sub[cols].head(args.top).to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+    if args.out:
+        res.to_csv(args.out, index=False)
+        print(f"\nFull report saved to {args.out}")
+    if args.fail_on_regression and counts.get("regression", 0):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Render many small figures, optionally across a process pool.
+
+A figure job is a plain dict holding only the (already aggregated) arrays to draw,
+so it pickles cheaply:
+
+    {"out": "plots/x.png", "title": ..., "xlabel": ..., "ylabel": ...,
+     "xscale": "log" or ("log", {"base": 2}), "yscale": ..., "grid": {...} or None,
+     "legend": bool, "tight_layout": bool, "figsize": (w, h), "dpi": int,
+     "series": [{"kind": "line"|"errorbar"|"bar", "x": [...], "y": [...], "yerr": [...],
+                 "label": str, "style": {...}}]}
+
+Workers use the object-oriented Figure API with the Agg canvas, never pyplot,
+so there is no global figure state to share or leak between jobs.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _apply_scale(set_scale, scale):
+    if scale is None:
+        return
+    if isinstance(scale, (tuple, list)):
+        set_scale(scale[0], **scale[1])
+    else:
+        set_scale(scale)
+
+
+def render(job):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=job.get("figsize"))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    for s in job["series"]:
+        kind = s.get("kind", "line")
+        style = s.get("style", {})
+        if kind == "errorbar":
+            ax.errorbar(s["x"], s["y"], yerr=s.get("yerr"), label=s.get("label"), **style)
+        elif kind == "bar":
+            ax.bar(s["x"], s["y"], yerr=s.get("yerr"), label=s.get("label"), **style)
+        else:
+            ax.plot(s["x"], s["y"], label=s.get("label"), **style)
+    if job.get("title"):  ax.set_title(job["title"])
+    if job.get("xlabel"): ax.set_xlabel(job["xlabel"])
+    if job.get("ylabel"): ax.set_ylabel(job["ylabel"])
+    _apply_scale(ax.set_xscale, job.get("xscale"))
+    _apply_scale(ax.set_yscale, job.get("yscale"))
+    if job.get("grid") is not None:
+        ax.grid(True, **job["grid"])
+    if job.get("legend"):
+        ax.legend()
+    if job.get("tight_layout"):
+        fig.tight_layout()
+    fig.savefig(job["out"], bbox_inches=job.get("bbox_inches"), dpi=job.get("dpi"))
+    return job["out"]
+
+
+def render_all(jobs, n_jobs=1):
+    """Render every job; n_jobs > 1 spreads them over a process pool (0 = all cores)."""
+    jobs = list(jobs)
+    if n_jobs == 0:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs <= 1 or len(jobs) <= 1:
+        _init_worker()
+        return [render(j) for j in jobs]
+    n_jobs = min(n_jobs, len(jobs))
+    chunk = max(1, len(jobs) // (n_jobs * 4))
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker) as pool:
+        return list(pool.map(render, jobs, chunksize=chunk))
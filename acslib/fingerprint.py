@@ -0,0 +1,210 @@
+"""Machine fingerprint recorded next to every results directory.
+
+Each harness writes `machine.json` into the directory its CSV/JSON results go to, so a
+result tree copied off a host still says which CPU, clock, kernel, memory and disk
+produced it (acslib.fleet joins it onto every row):
+
+    python -m acslib.fingerprint                              # print this host's fingerprint
+    python -m acslib.fingerprint --write results/csv          # save results/csv/machine.json
+    python -m acslib.fingerprint --write ~/fio/results --disk ~/fio/testfile.dat
+
+Everything is read from /proc and /sys (sysctl on macOS) without root. Fields that
+cannot be read are null; the memory channel count is rarely visible unprivileged,
+so it can be given with --mem-channels or ACS_MEM_CHANNELS.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+from pathlib import Path
+
+SIDECAR = "machine.json"
+# Fields that identify the host's hardware/OS configuration (machine_id is a hash of these;
+# the disk is left out so Project 1/2 and Project 3 trees of one host share an id)
+ID_FIELDS = ["host", "cpu_model", "threads", "cores", "mem_total_bytes", "mem_channels", "kernel"]
+
+
+def _read(path, default=None):
+    try:
+        return Path(path).read_text().strip()
+    except OSError:
+        return default
+
+
+def _sysctl(key):
+    try:
+        return subprocess.run(["sysctl", "-n", key], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _cpuinfo():
+    """model name, logical CPUs, physical cores and nominal MHz from /proc/cpuinfo."""
+    model, mhz, threads, cores = None, None, 0, set()
+    phys = None
+    for line in (_read("/proc/cpuinfo", "") or "").splitlines():
+        key, _, val = line.partition(":")
+        key, val = key.strip(), val.strip()
+        if key == "processor":
+            threads += 1
+        elif key == "model name" and model is None:
+            model = val
+        elif key == "cpu MHz" and mhz is None:
+            mhz = float(val)
+        elif key == "physical id":
+            phys = val
+        elif key == "core id":
+            cores.add((phys, val))
+    return model, mhz, threads or None, len(cores) or None
+
+
+def cpu():
+    model, mhz, threads, cores = _cpuinfo()
+    if model is None and platform.system() == "Darwin":
+        model = _sysctl("machdep.cpu.brand_string")
+        threads = int(_sysctl("hw.logicalcpu") or 0) or None
+        cores = int(_sysctl("hw.physicalcpu") or 0) or None
+    freq = Path("/sys/devices/system/cpu/cpu0/cpufreq")
+    max_khz = _read(freq / "cpuinfo_max_freq")
+    return {
+        "cpu_model": model or platform.processor() or platform.machine(),
+        "threads": threads or os.cpu_count(),
+        "cores": cores,
+        "max_ghz": int(max_khz) / 1e6 if max_khz else (mhz / 1000 if mhz else None),
+        "governor": _read(freq / "scaling_governor"),
+        "smt": _read("/sys/devices/system/cpu/smt/control"),
+    }
+
+
+def size_bytes(text):
+    """sysfs cache size ("48K", "2048K", "32M") -> bytes; None if unreadable."""
+    if not text:
+        return None
+    mult = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}.get(text[-1].upper(), 1)
+    digits = text.rstrip("KMGkmg")
+    return int(digits) * mult if digits.isdigit() else None
+
+
+def cache_levels(cpu=0):
+    """Data and unified caches of one CPU from sysfs: [(level, bytes, shared_cpu_list)]."""
+    out = []
+    for d in sorted(Path(f"/sys/devices/system/cpu/cpu{cpu}/cache").glob("index*")):
+        level, size = _read(d / "level"), size_bytes(_read(d / "size"))
+        if _read(d / "type") == "Instruction" or not level or not size:
+            continue
+        out.append((int(level), size, _read(d / "shared_cpu_list")))
+    return out
+
+
+def cache_sizes(cpu=0):
+    """{level: bytes} of the data/unified caches, from sysfs (Linux) or sysctl (macOS)."""
+    sizes = {level: size for level, size, _ in cache_levels(cpu)}
+    if not sizes and platform.system() == "Darwin":
+        for level, key in ((1, "hw.l1dcachesize"), (2, "hw.l2cachesize"), (3, "hw.l3cachesize")):
+            size = int(_sysctl(key) or 0)
+            if size > 0:
+                sizes[level] = size
+    return sizes
+
+
+def llc_bytes():
+    """Size of the last-level cache (bytes), or None if it cannot be read."""
+    sizes = cache_sizes()
+    return sizes[max(sizes)] if sizes else None
+
+
+def memory(channels=None):
+    total = None
+    for line in (_read("/proc/meminfo", "") or "").splitlines():
+        if line.startswith("MemTotal:"):
+            total = int(line.split()[1]) * 1024
+    if total is None and platform.system() == "Darwin":
+        total = int(_sysctl("hw.memsize") or 0) or None
+    if channels is None and os.environ.get("ACS_MEM_CHANNELS"):
+        channels = int(os.environ["ACS_MEM_CHANNELS"])
+    if channels is None:
+        # EDAC lists the populated DIMMs; with one DIMM per channel that is the channel count
+        mcs = sorted(Path("/sys/devices/system/edac/mc").glob("mc*/dimm*"))
+        channels = len(mcs) or None
+    return {"mem_total_bytes": total, "mem_channels": channels}
+
+
+def disk(path):
+    """Model and rotational flag of the block device holding path (Linux)."""
+    if not path:
+        return {"disk_path": None, "disk_model": None, "disk_rotational": None}
+    p = Path(os.path.expanduser(path))
+    while not p.exists() and p != p.parent:
+        p = p.parent
+    st = os.stat(p)
+    dev = Path(f"/sys/dev/block/{os.major(st.st_dev)}:{os.minor(st.st_dev)}")
+    model = rot = None
+    if dev.exists():
+        real = dev.resolve()
+        # A partition's device/queue live on its parent disk
+        blk = real if (real / "device").exists() else real.parent
+        model = _read(blk / "device" / "model") or _read(blk / "device" / "name")
+        rot = _read(blk / "queue" / "rotational")
+        model = model or blk.name
+    return {"disk_path": str(path), "disk_model": model, "disk_rotational": None if rot is None else rot == "1"}
+
+
+def collect(disk_path=None, mem_channels=None):
+    fp = {"host": platform.node(), "kernel": platform.release(), "os": platform.system()}
+    fp.update(cpu())
+    fp.update(memory(mem_channels))
+    fp.update(disk(disk_path))
+    fp["machine_id"] = hashlib.sha1(json.dumps([fp.get(k) for k in ID_FIELDS]).encode()).hexdigest()[:12]
+    return fp
+
+
+def write_sidecar(directory, disk_path=None, mem_channels=None):
+    """Write <directory>/machine.json for this host; returns the fingerprint."""
+    fp = collect(disk_path, mem_channels)
+    out = Path(directory) / SIDECAR
+    out.parent.mkdir(parents=True, exist_ok=True)
+    old = load_sidecar(out)
+    if old and old.get("machine_id") != fp["machine_id"]:
+        print(f"[!] {out} was written by {old.get('host')} ({old.get('machine_id')}); replacing it", file=sys.stderr)
+    out.write_text(json.dumps(fp, indent=2) + "\n")
+    return fp
+
+
+def load_sidecar(path):
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def find_sidecar(path, root=None):
+    """The machine.json closest to path, looking upward no further than root."""
+    p = Path(path).resolve()
+    root = Path(root).resolve() if root else None
+    for d in ([p] if p.is_dir() else []) + list(p.parents):
+        fp = load_sidecar(d / SIDECAR)
+        if fp is not None:
+            return fp
+        if root is not None and d == root:
+            break
+    return None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Print or save this machine's fingerprint")
+    ap.add_argument("--write", metavar="DIR", help="Save DIR/machine.json instead of printing")
+    ap.add_argument("--disk", help="A file on the device under test (fio filename)")
+    ap.add_argument("--mem-channels", type=int, help="Populated memory channels, if /sys does not show them")
+    args = ap.parse_args(argv)
+    if args.write:
+        fp = write_sidecar(args.write, args.disk, args.mem_channels)
+        print(f"{fp['host']} ({fp['machine_id']}): saved {Path(args.write) / SIDECAR}")
+    else:
+        print(json.dumps(collect(args.disk, args.mem_channels), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Merge result trees from many hosts and compare them per machine profile.
+
+Copy each host's results somewhere (one directory per host, any layout inside) and
+point the aggregator at them:
+
+    python -m acslib.fleet fleet/*/ --out fleet_report
+    python -m acslib.fleet fleet/*/ --kind microbench --by cpu_model mem_channels
+    python -m acslib.fleet fleet/*/ --kind fio --by disk_model --jobs 8
+
+Every bench.cpp CSV, microbench CSV and fio JSON under the given roots is loaded,
+with the files split into shards that are parsed in parallel worker processes. Each
+row gets the fingerprint from the nearest machine.json (acslib.fingerprint) above
+it, plus metrics normalized by that machine's profile:
+    bench       gflops_per_ghz    (measured perf clock if the row has one, else max_ghz)
+    microbench  gibps_per_channel (GiB/s over populated memory channels)
+    fio         iops_per_job      (IOPS over numjobs)
+For each kind, <out>/fleet_<kind>.csv has every row, and <out>/fleet_<kind>_by_<group>.csv
+has one row per configuration and one median column per machine group.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from acslib.compare import KEYS, DEFAULT_METRIC, load_fio
+from acslib.fingerprint import SIDECAR, find_sidecar
+from acslib.kvcsv import fill_bench, fill_mode, read_kv_csv
+
+# fingerprint field -> row column (renamed where a result column has the same name)
+FP_COLUMNS = {"host": "host", "machine_id": "machine_id", "cpu_model": "cpu_model", "max_ghz": "max_ghz",
+              "threads": "hw_threads", "cores": "hw_cores", "mem_channels": "mem_channels",
+              "kernel": "os_kernel", "disk_model": "disk_model"}
+DEFAULT_BY = {"bench": "cpu_model", "microbench": "cpu_model", "fio": "disk_model"}
+
+
+def classify(path):
+    """'bench', 'microbench', 'fio' or None for files that are not raw results."""
+    if path.name == SIDECAR:
+        return None
+    if path.suffix == ".json":
+        with open(path) as f:
+            head = f.read(4096)
+        return "fio" if '"fio version"' in head else None
+    if path.suffix in (".csv", ".txt"):
+        with open(path, errors="replace") as f:
+            head = f.readline() + f.readline()
+        if "kernel" in head and "gflops" in head and ",rep," not in head:
+            return "bench"  # (--samples files repeat the main CSV rep by rep)
+        if "GiB/s=" in head:
+            return "microbench"
+    return None
+
+
+def discover(roots):
+    """[(kind, path, root)] for every result file under the roots."""
+    found = []
+    for root in roots:
+        for dirpath, dirs, files in os.walk(root):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]  # .fio_cache
+            for name in files:
+                p = Path(dirpath) / name
+                kind = classify(p)
+                if kind:
+                    found.append((kind, str(p), root))
+    return found
+
+
+def load_shard(items):
+    """Parse one shard of files (runs in a worker); returns {kind: DataFrame}."""
+    frames = {}
+    sidecars = {}
+    for kind, path, root in items:
+        try:
+            df = load_fio(path) if kind == "fio" else read_kv_csv(path, cache=False)
+        except (ValueError, KeyError, OSError, pd.errors.ParserError) as e:
+            print(f"[!] skipping {path}: {e}", file=sys.stderr)
+            continue
+        d = str(Path(path).parent)
+        if d not in sidecars:
+            sidecars[d] = find_sidecar(d, root) or {}
+        fp = sidecars[d]
+        for field, col in FP_COLUMNS.items():
+            df[col] = fp.get(field)
+        if not fp:
+            df["host"] = Path(root).name  # no fingerprint: at least keep the tree apart
+        df["source"] = path
+        frames.setdefault(kind, []).append(df)
+    return {k: pd.concat(v, ignore_index=True) for k, v in frames.items()}
+
+
+def normalize(kind, df):
+    if kind == "bench":
+        fill_bench(df)
+        ghz = df["ghz"] if "ghz" in df else pd.Series(float("nan"), index=df.index)
+        df["gflops_per_ghz"] = df["gflops"] / ghz.fillna(pd.to_numeric(df["max_ghz"], errors="coerce"))
+    elif kind == "microbench":
+        fill_mode(df)
+        df["gibps_per_channel"] = df["GiB/s"] / pd.to_numeric(df["mem_channels"], errors="coerce")
+    elif kind == "fio":
+        df["iops_per_job"] = df["iops"] / pd.to_numeric(df["numjobs"], errors="coerce")
+    return df
+
+
+def aggregate(roots, jobs=None, kinds=None):
+    """{kind: DataFrame of every row, fingerprinted and normalized}."""
+    items = [it for it in discover(roots) if not kinds or it[0] in kinds]
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(items)))
+    shards = [items[i::jobs] for i in range(jobs)]
+    if jobs == 1:
+        parts = [load_shard(items)]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            parts = list(pool.map(load_shard, shards))
+    out = {}
+    for kind in sorted({k for p in parts for k in p}):
+        out[kind] = normalize(kind, pd.concat([p[kind] for p in parts if kind in p], ignore_index=True))
+    return out
+
+
+def compare_hosts(df, kind, by, metric, fallback=None):
+    """One row per configuration, one median column per machine group.
+
+    Hosts without a fingerprint get a column of their own (named after the host), and
+    rows whose metric is NaN (the profile lacks the field it is normalized by) use the
+    fallback metric instead, in a column marked as such, rather than dropping out.
+    """
+    keys = [k for k in KEYS[kind] if k in df] + (["ddir"] if kind == "fio" else [])
+    group = df[by].fillna("unknown").astype(str).agg(" / ".join, axis=1)
+    group = group.where(df[by].notna().any(axis=1), "host " + df["host"].astype(str))
+    if fallback and fallback != metric:
+        raw = df[metric].isna() & df[fallback].notna()
+        df = df.assign(**{metric: df[metric].fillna(df[fallback])})
+        group = group.where(~raw, group + f" [{fallback}]")
+    df = df.assign(_group=group)
+    table = df.pivot_table(index=keys, columns="_group", values=metric, aggfunc="median")
+    table.columns.name = None
+    return table.reset_index()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Merge result trees from many hosts and compare per machine profile")
+    ap.add_argument("roots", nargs="+", help="One results directory per host")
+    ap.add_argument("--kind", nargs="+", choices=sorted(KEYS), help="Default: every kind found")
+    ap.add_argument("--by", nargs="+", help="Fingerprint columns to group machines by "
+                    "(default: cpu_model for bench/microbench, disk_model for fio)")
+    ap.add_argument("--metric", help="Column to compare (default: the normalized metric, e.g. gibps_per_channel, "
+                    "falling back to gflops / GiB/s / iops where the profile lacks the field)")
+    ap.add_argument("--jobs", type=int, help="Worker processes (default: CPU count)")
+    ap.add_argument("--out", default="fleet_report")
+    args = ap.parse_args(argv)
+
+    results = aggregate(args.roots, args.jobs, args.kind)
+    if not results:
+        raise SystemExit("No bench/microbench/fio results found")
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    normalized = {"bench": "gflops_per_ghz", "microbench": "gibps_per_channel", "fio": "iops_per_job"}
+    for kind, df in results.items():
+        df.to_csv(out / f"fleet_{kind}.csv", index=False)
+        by = args.by or [DEFAULT_BY[kind]]
+        metric = args.metric or normalized[kind]
+        if metric not in df or df[metric].isna().all():
+            metric = DEFAULT_METRIC[kind]
+        missing = df.loc[df[metric].isna(), "host"].dropna().astype(str).unique()
+        if len(missing):
+            print(f"[!] {kind}: no {metric} for {', '.join(sorted(missing))} (no machine.json or the field is "
+                  f"unknown); their columns show raw {DEFAULT_METRIC[kind]}", file=sys.stderr)
+        table = compare_hosts(df, kind, by, metric, fallback=DEFAULT_METRIC[kind])
+        name = out / f"fleet_{kind}_by_{'_'.join(by)}.csv"
+        table.to_csv(name, index=False)
+        print(f"\n=== {kind}: {len(df)} rows from {df['host'].nunique()} hosts, "
+              f"{df['machine_id'].nunique()} machine profiles; median {metric} by {', '.join(by)} ===")
+        with pd.option_context("display.width", 200, "display.max_columns", None):
+            print(table.head(20).to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+        print(f"Saved {out / f'fleet_{kind}.csv'} and {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Loader for the microbenchmark CSV dialect where cells look like `ws_KiB=32` or `read%=100`.
+
+Every `=` is translated to `,` in one pass over the raw bytes, so `key=value`
+becomes two fields and pandas' C parser reads only the value fields. Columns come
+out typed (int/float) without a per-column string round trip. Parsed frames are cached in memory and
+as an .npz under the user cache dir ($XDG_CACHE_HOME or ~/.cache, then acslib/kvcache), keyed by
+file size and mtime. Strings are stored as fixed-width unicode arrays, so loading one never
+needs pickle and a cache file cannot run code.
+
+Files without a header row (e.g. intensity.csv, raw microbench stdout) take
+their column names from the keys on the first line. Cells past the header (such
+as the counters acslib.perfctr appends) are named by their keys; rows that lack
+them read as NaN.
+"""
+import hashlib
+import io
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_KEY_RE = re.compile(rb"(^|,)[^,=\r\n]*=", re.MULTILINE)
+_EQ_TO_COMMA = bytes.maketrans(b"=", b",")
+
+# Keys that are not valid/consistent column names in the files that do have headers
+KEY_RENAMES = {"read%": "read_pct"}
+# microbench rows written before it took an access mode all came from the rand_r loop
+LEGACY_MODE = "rand"
+# bench.cpp rows written before its omp/blocked variants were one thread, one sweep, no tiling
+BENCH_DEFAULTS = {"threads": 1, "sweeps": 1, "tile": 0}
+
+# Bump when the cache layout changes so old .npz files are re-parsed
+CACHE_VERSION = 1
+
+_memo = {}
+
+
+def cache_dir():
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "acslib" / "kvcache"
+
+
+def strip_keys(data):
+    """bytes -> bytes with every `key=` cell prefix removed (regex; used as a fallback)."""
+    return _KEY_RE.sub(rb"\1", data)
+
+
+def _names(cells, header):
+    """Parser field names (with a `_key<i>` slot before each value) and the value column names."""
+    names, values = [], []
+    for i, cell in enumerate(cells):
+        key, eq, _ = cell.partition(b"=")
+        name = header[i] if header and i < len(header) else KEY_RENAMES.get(key.decode(), key.decode())
+        if eq:
+            names.append(f"_key{i}")
+        names.append(name)
+        values.append(name)
+    return names, values
+
+
+def _parse(path, usecols, dtype):
+    data = Path(path).read_bytes()
+    nl = data.find(b"\n")
+    first = data[:nl if nl >= 0 else len(data)].rstrip(b"\r")
+    has_header = b"=" not in first
+    if has_header:
+        nl2 = data.find(b"\n", nl + 1)
+        sample = data[nl + 1:nl2 if nl2 >= 0 else len(data)].rstrip(b"\r")
+    else:
+        sample = first
+    if b"=" not in sample:
+        return pd.read_csv(io.BytesIO(data), usecols=usecols, dtype=dtype)
+
+    # Turn every '=' into ',' so "k=v" becomes two fields, then let the C parser read
+    # only the value fields. One bytes.translate over the file, no per-column strings.
+    cells = sample.split(b",")
+    header = first.decode().split(",") if has_header else None
+    names, values = _names(cells, header)
+
+    n_kv = sum(b"=" in c for c in cells)
+    df = pd.read_csv(io.BytesIO(data.translate(_EQ_TO_COMMA)), header=None, names=names,
+                     skiprows=1 if has_header else 0, usecols=usecols or values, dtype=dtype,
+                     skip_blank_lines=True)
+    if data.count(b"=") != n_kv * len(df):
+        # Rows don't all share the first row's layout: strip keys with the regex instead,
+        # naming columns after the widest row so appended fields are kept
+        rows = data.splitlines()[1 if has_header else 0:]
+        _, values = _names(max(rows, key=lambda r: r.count(b",")).split(b","), header)
+        buf = io.BytesIO(strip_keys(data))
+        df = pd.read_csv(buf, header=None, names=values, skiprows=1 if has_header else 0,
+                         usecols=usecols, dtype=dtype, skip_blank_lines=True)
+    return df
+
+
+def fill_mode(df):
+    """Give microbench rows without a `mode` (older CSVs) the mode they were measured with."""
+    df["mode"] = df["mode"].fillna(LEGACY_MODE) if "mode" in df else LEGACY_MODE
+    return df
+
+
+def fill_bench(df):
+    """Give bench.cpp rows without threads/sweeps/tile (older CSVs, bench_numpy.py) their values."""
+    for c, v in BENCH_DEFAULTS.items():
+        df[c] = df[c].fillna(v).astype(int) if c in df else v
+    return df
+
+
+def _load_cached(npz, stamp):
+    try:
+        with np.load(npz, allow_pickle=False) as z:
+            if z["_stamp"].tolist() != stamp:
+                return None
+            cols = {}
+            for i, name in enumerate(z["_columns"].tolist()):
+                v = z[f"v{i}"]
+                if f"na{i}" in z.files:  # a string column: object, or pandas 3's str
+                    v = pd.Series(v.astype(object)).mask(z[f"na{i}"]).astype(z[f"dt{i}"].item())
+                cols[name] = v
+            return pd.DataFrame(cols)
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _store_cached(npz, stamp, df):
+    arrays = {"_stamp": np.array(stamp, dtype=np.int64), "_columns": np.array(df.columns, dtype=str)}
+    for i, name in enumerate(df.columns):
+        col = df[name]
+        if col.dtype.kind in "biuf":
+            arrays[f"v{i}"] = col.to_numpy()
+        elif pd.api.types.is_string_dtype(col.dtype) and all(isinstance(v, str) for v in col.dropna()):
+            arrays[f"v{i}"] = col.fillna("").to_numpy(dtype=str)
+            arrays[f"na{i}"] = col.isna().to_numpy()
+            arrays[f"dt{i}"] = np.array(str(col.dtype))
+        else:
+            return  # e.g. a category dtype the caller asked for: memory cache only
+    npz.parent.mkdir(parents=True, exist_ok=True)
+    tmp = npz.with_suffix(".tmp.npz")
+    np.savez(tmp, **arrays)
+    os.replace(tmp, npz)
+
+
+def read_kv_csv(path, usecols=None, dtype=None, cache=True):
+    """Read a key=value CSV into a typed DataFrame (cached by path, size and mtime)."""
+    path = Path(path)
+    st = path.stat()
+    key = (str(path.resolve()), st.st_size, st.st_mtime_ns,
+           tuple(usecols) if usecols else None, repr(dtype))
+    if cache and key in _memo:
+        return _memo[key].copy()
+
+    # One file per (CSV, usecols, dtype), overwritten when the CSV changes
+    variant = hashlib.sha1(repr((key[0],) + key[3:]).encode()).hexdigest()[:16]
+    npz = cache_dir() / f"{path.name}.{variant}.npz"
+    stamp = [CACHE_VERSION, st.st_size, st.st_mtime_ns]
+    df = _load_cached(npz, stamp) if cache else None
+    if df is None:
+        df = _parse(path, usecols, dtype)
+        if cache:
+            try:
+                _store_cached(npz, stamp, df)
+            except OSError:
+                pass  # no writable cache dir: memory cache only
+    if cache:
+        _memo[key] = df
+        return df.copy()
+    return df
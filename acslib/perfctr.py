@@ -0,0 +1,152 @@
+"""Hardware counters for benchmark runs via Linux `perf stat`.
+
+Wrap any benchmark command; its counters become extra key=value fields on the
+result row, so the kvcsv loader and the results store pick them up as columns:
+
+    python -m acslib.perfctr -- ./bin/microbench 67108864 1 5 100 1
+    N_bytes=67108864,...,GiB/s=0.661,ghz=3.790,tsc_ghz=2.100,core_cycles=...,instructions=...,llc_misses=...,dtlb_misses=...
+
+    python -m acslib.perfctr -- ./saxpy 262144 1024 1 5 0 >> part6_data.csv
+
+    python -m acslib.perfctr --line -- ./ptrchase.exe
+    (several result rows from one process: the counters follow as their own line)
+
+    python -m acslib.perfctr --csv-row results/default_results.csv -- ./bench_simd --kernel saxpy ...
+    (bench writes its own CSV row; the counters are added to that last row as new columns)
+
+ghz is the measured average core clock (cycles / task-clock) and tsc_ghz the rate
+of the reference clock rdtsc counts at (ref-cycles / task-clock; not every CPU has
+it). Counters cover the whole process, including allocation/initialisation and
+warmup. Without perf the command still runs and no fields are added; events the
+CPU or perf_event_paranoid does not allow are left out.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# column name -> perf event
+EVENTS = {
+    "core_cycles": "cycles",
+    "ref_cycles": "ref-cycles",
+    "instructions": "instructions",
+    "llc_misses": "LLC-load-misses",
+    "dtlb_misses": "dTLB-load-misses",
+    "task_clock_ms": "task-clock",
+}
+COLUMNS = ["ghz", "tsc_ghz", "core_cycles", "instructions", "llc_misses", "dtlb_misses"]
+
+
+def perf_available():
+    return shutil.which("perf") is not None
+
+
+def parse_perf_csv(text):
+    """`perf stat -x,` output -> {column: float}; unsupported/uncounted events are left out."""
+    by_event = {v: k for k, v in EVENTS.items()}
+    out = {}
+    for line in text.splitlines():
+        fields = line.split(",")
+        if len(fields) < 3 or line.startswith("#"):
+            continue
+        value, event = fields[0], fields[2].split(":")[0]
+        if "/" in event:  # PMU-qualified name on hybrid CPUs, e.g. cpu_core/cycles/
+            event = event.split("/")[1]
+        if event in by_event and not value.startswith("<"):
+            try:
+                out[by_event[event]] = float(value)
+            except ValueError:
+                pass
+    if out.get("task_clock_ms"):
+        ns = out["task_clock_ms"] * 1e6
+        if out.get("core_cycles"):
+            out["ghz"] = out["core_cycles"] / ns
+        if out.get("ref_cycles"):
+            out["tsc_ghz"] = out["ref_cycles"] / ns
+    return out
+
+
+def run(cmd, events=None, **kwargs):
+    """Run cmd under perf stat. Returns (CompletedProcess, counters dict; empty without perf)."""
+    if not perf_available():
+        return subprocess.run(cmd, **kwargs), {}
+    events = events or list(EVENTS.values())
+    with tempfile.NamedTemporaryFile("r", suffix=".perf", delete=False) as tmp:
+        path = tmp.name
+    try:
+        proc = subprocess.run(["perf", "stat", "-x,", "-o", path, "-e", ",".join(events), "--"] + list(cmd), **kwargs)
+        with open(path) as f:
+            counters = parse_perf_csv(f.read())
+    finally:
+        os.unlink(path)
+    return proc, counters
+
+
+def _fmt(col, value):
+    return f"{value:.3f}" if col.endswith("ghz") else f"{value:.0f}"
+
+
+def kv_fields(counters):
+    """',ghz=3.790,...' for the columns that were measured ('' if none)."""
+    return "".join(f",{c}={_fmt(c, counters[c])}" for c in COLUMNS if c in counters)
+
+
+def join_last_csv_row(path, counters):
+    """Add counters as columns to the last row of a header CSV (e.g. a bench.cpp results file)."""
+    cols = [c for c in COLUMNS if c in counters]
+    if not cols:
+        return
+    with open(path) as f:
+        lines = f.read().splitlines()
+    header = lines[0].split(",")
+    for c in cols:
+        if c not in header:
+            header.append(c)
+    last = lines[-1].split(",")
+    last += [""] * (len(header) - len(last))
+    for c in cols:
+        last[header.index(c)] = _fmt(c, counters[c])
+    lines[0], lines[-1] = ",".join(header), ",".join(last)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run a benchmark under perf stat and attach its counters to the result")
+    ap.add_argument("--csv-row", help="Add the counters to the last row of this CSV instead of stdout")
+    ap.add_argument("--line", action="store_true",
+                    help="Print the counters as their own key=value line (for programs printing several rows)")
+    ap.add_argument("cmd", nargs=argparse.REMAINDER, help="-- command [args...]")
+    args = ap.parse_args(argv)
+    cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+    if not cmd:
+        ap.error("no command given")
+
+    proc, counters = run(cmd, capture_output=not args.csv_row, text=True)
+    if proc.returncode != 0:
+        if not args.csv_row:
+            sys.stdout.write(proc.stdout)
+            sys.stderr.write(proc.stderr)
+        return proc.returncode
+    if args.csv_row:
+        join_last_csv_row(args.csv_row, counters)
+        return 0
+    sys.stderr.write(proc.stderr)
+    if args.line:
+        sys.stdout.write(proc.stdout)
+        if counters:
+            print(kv_fields(counters)[1:])
+        return 0
+    # Counters go on the last result line; anything printed before it passes through unchanged
+    lines = proc.stdout.rstrip("\n").split("\n")
+    lines[-1] += kv_fields(counters)
+    print("\n".join(lines))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""Incremental builds of report artifacts (tables, figures) from raw results.
+
+A node is a plain dict describing one script run:
+
+    {"name": "average", "cwd": "Project 2", "cmd": ["average_runs.py"],
+     "inputs": ["results/csv/microbench_results_run*.csv"],
+     "outputs": ["results/csv/microbench_results_avg.csv"],
+     "stdout": "table.md"}          # optional: the script's stdout is saved there
+
+cmd[0] is the script (run with this interpreter); input patterns and outputs are
+relative to cwd, and a directory output stands for everything under it. A node
+depends on every node whose outputs its input patterns match. Its key hashes the
+command, the content of every input file and the source of the script and of the
+local modules it imports (acslib.*, siblings in cwd). A node runs only when its key
+differs from its last successful build or an output that build produced is gone,
+so a rebuilt input whose content did not change stops the rebuild there. Content
+hashes are cached by size and mtime: an unchanged tree is checked without reading it.
+Independent nodes run in parallel, each in its own process (MPLBACKEND=Agg).
+
+State (node keys, file hashes) is one JSON file, rewritten after every node.
+"""
+import ast
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+ACSLIB = Path(__file__).resolve().parent
+
+
+def load_state(path):
+    try:
+        state = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        state = {}
+    state.setdefault("files", {})
+    state.setdefault("nodes", {})
+    return state
+
+
+def save_state(state, path):
+    tmp = Path(str(path) + ".tmp")
+    tmp.write_text(json.dumps(state, indent=1, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def file_hash(state, path):
+    """sha256 of a file's content, recomputed only when its size or mtime changed."""
+    st = os.stat(path)
+    key = str(path)
+    rec = state["files"].get(key)
+    if rec and rec[0] == st.st_size and rec[1] == st.st_mtime_ns:
+        return rec[2]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    state["files"][key] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+    return h.hexdigest()
+
+
+def expand(node):
+    """Input files of a node, as sorted absolute paths."""
+    files = set()
+    for pat in node["inputs"]:
+        files.update(Path(p).resolve() for p in glob.glob(os.path.join(node["cwd"], pat)) if os.path.isfile(p))
+    return sorted(files)
+
+
+def code_deps(script, cwd):
+    """The script plus every acslib module or module in cwd it imports, transitively."""
+    seen, todo = set(), [Path(script).resolve()]
+    while todo:
+        path = todo.pop()
+        if path in seen or not path.is_file():
+            continue
+        seen.add(path)
+        for n in ast.walk(ast.parse(path.read_text(), str(path))):
+            if isinstance(n, ast.Import):
+                names = [a.name for a in n.names]
+            elif isinstance(n, ast.ImportFrom) and n.module and not n.level:
+                names = [n.module] + [f"{n.module}.{a.name}" for a in n.names]  # from acslib import x
+            else:
+                continue
+            for name in names:
+                parts = name.split(".")
+                if parts[0] == "acslib" and len(parts) > 1:
+                    todo.append(ACSLIB / f"{parts[1]}.py")
+                elif len(parts) == 1:
+                    todo.append(Path(cwd).resolve() / f"{name}.py")
+    return sorted(seen)
+
+
+def node_key(node, state):
+    h = hashlib.sha256(json.dumps([node["cmd"], node.get("stdout")]).encode())
+    cwd = Path(node["cwd"])
+    for path in expand(node) + code_deps(cwd / node["cmd"][0], cwd):
+        h.update(f"{path}\0{file_hash(state, path)}\0".encode())
+    return h.hexdigest()
+
+
+def _outputs(node):
+    outs = list(node["outputs"]) + ([node["stdout"]] if node.get("stdout") else [])
+    return [(Path(node["cwd"]) / o).resolve() for o in outs]
+
+
+def _produces(node, pattern_path):
+    """Does one of node's outputs match this absolute input pattern?"""
+    for out in _outputs(node):
+        if fnmatch.fnmatch(str(out), pattern_path) or Path(pattern_path).is_relative_to(out):
+            return True
+    return False
+
+
+def dependencies(nodes):
+    """name -> names of the nodes producing its inputs."""
+    deps = {}
+    for n in nodes:
+        pats = [str((Path(n["cwd"]) / p).resolve()) for p in n["inputs"]]
+        deps[n["name"]] = [m["name"] for m in nodes
+                           if m is not n and any(_produces(m, p) for p in pats)]
+    return deps
+
+
+def stale_reason(node, key, state, force=False):
+    """Why the node must run, or None if its last build is still valid."""
+    prev = state["nodes"].get(node["name"])
+    if force:
+        return "forced"
+    if not prev:
+        return "never built"
+    if prev["key"] != key:
+        return "inputs, command or code changed"
+    missing = [o for o in prev["outputs"] if not Path(o).exists()]
+    if missing:
+        return f"{Path(missing[0]).name} is missing"
+    return None
+
+
+def run_node(node):
+    """Run one node's command; returns (returncode, stdout, stderr, seconds)."""
+    env = dict(os.environ, MPLBACKEND="Agg")
+    t0 = time.perf_counter()
+    p = subprocess.run([sys.executable] + node["cmd"], cwd=node["cwd"], env=env,
+                       capture_output=True, text=True)
+    if p.returncode == 0 and node.get("stdout"):
+        Path(node["cwd"], node["stdout"]).write_text(p.stdout)
+    return p.returncode, p.stdout, p.stderr, time.perf_counter() - t0
+
+
+def build(nodes, state_path, jobs=1, dry_run=False, force=(), verbose=False):
+    """Bring every node up to date; returns {name: status}.
+
+    status is built, fresh, stale (dry run), no inputs, failed, or blocked (an
+    upstream node failed). `force` names nodes to run even when fresh.
+    """
+    state = load_state(state_path)
+    by_name = {n["name"]: n for n in nodes}
+    deps = dependencies(nodes)
+    status, pending, running = {}, [n["name"] for n in nodes], {}
+
+    def report(name, what, extra=""):
+        status[name] = what
+        if verbose or what not in ("fresh", "no inputs"):
+            print(f"[{what}{extra}] {name}", flush=True)
+
+    def ready():
+        return next((p for p in pending if all(d in status for d in deps[p])), None)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            while (name := ready()) is not None:
+                pending.remove(name)
+                node = by_name[name]
+                if any(status[d] in ("failed", "blocked") for d in deps[name]):
+                    report(name, "blocked")
+                    continue
+                if dry_run and any(status[d] == "stale" for d in deps[name]):
+                    report(name, "stale", f": after {', '.join(d for d in deps[name] if status[d] == 'stale')}")
+                    continue
+                if not expand(node):
+                    report(name, "no inputs")
+                    continue
+                key = node_key(node, state)
+                why = stale_reason(node, key, state, name in force)
+                if why is None:
+                    report(name, "fresh")
+                elif dry_run:
+                    report(name, "stale", f": {why}")
+                else:
+                    running[pool.submit(run_node, node)] = (name, key)
+            if not running:
+                if pending:  # only reachable through a dependency cycle
+                    for name in pending:
+                        report(name, "blocked", ": dependency cycle")
+                    break
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name, key = running.pop(fut)
+                rc, out, err, secs = fut.result()
+                if rc:
+                    report(name, "failed", f" with {rc}")
+                    sys.stderr.write("".join(f"    {l}\n" for l in (err or out).splitlines()[-15:]))
+                    continue
+                state["nodes"][name] = {"key": key, "outputs": [str(o) for o in _outputs(by_name[name]) if o.exists()]}
+                save_state(state, state_path)
+                report(name, "built", f" {secs:.1f} s")
+                if verbose and out.strip():
+                    sys.stdout.write("".join(f"    {l}\n" for l in out.splitlines()))
+    save_state(state, state_path)
+    return status
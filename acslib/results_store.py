@@ -0,0 +1,183 @@
+"""Local SQLite store for benchmark results from all three projects.
+
+Usage:
+    python -m acslib.results_store ingest bench      results.db "Project 1/results/default_results.csv"
+    python -m acslib.results_store ingest microbench results.db "Project 2/results/csv/microbench_results_run*.csv"
+    python -m acslib.results_store ingest saxpy      results.db "Project 2/part6_data.csv"
+
+Re-ingesting a file replaces its rows only if the file's size or mtime changed.
+"""
+import argparse
+import glob
+import os
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from acslib.kvcsv import BENCH_DEFAULTS, LEGACY_MODE, read_kv_csv
+
+# Hardware counters acslib.perfctr adds to a row (NULL when a run was not wrapped)
+PERF_COLS = [("ghz", "REAL"), ("tsc_ghz", "REAL"), ("core_cycles", "REAL"), ("instructions", "REAL"),
+             ("llc_misses", "REAL"), ("dtlb_misses", "REAL")]
+
+# table -> (columns with SQLite types, index columns, CSV column -> table column renames)
+SCHEMA = {
+    "bench_runs": (
+        [("timestamp", "TEXT"), ("kernel", "TEXT"), ("dtype", "TEXT"), ("N", "INTEGER"),
+         ("stride", "INTEGER"), ("misalign", "INTEGER"), ("variant", "TEXT"),
+         ("time_ms", "REAL"), ("gflops", "REAL"), ("cpe", "REAL"), ("threads", "INTEGER"),
+         ("sweeps", "INTEGER"), ("tile", "INTEGER")] + PERF_COLS,
+        ["kernel", "dtype", "N", "variant", "stride", "threads"],
+        {},
+    ),
+    "microbench_runs": (
+        [("ts", "TEXT"), ("N_bytes", "INTEGER"), ("stride", "INTEGER"), ("repeats", "INTEGER"),
+         ("read_pct", "INTEGER"), ("threads", "INTEGER"), ("mode", "TEXT"), ("time", "REAL"),
+         ("gibps", "REAL")] + PERF_COLS,
+        ["N_bytes", "stride", "read_pct", "threads", "mode"],
+        {"GiB/s": "gibps"},
+    ),
+    "saxpy_runs": (
+        [("ws_KiB", "INTEGER"), ("stride", "INTEGER"), ("pattern", "INTEGER"),
+         ("repeats", "INTEGER"), ("cycles", "INTEGER"), ("bytes", "REAL")] + PERF_COLS,
+        ["ws_KiB", "stride", "pattern"],
+        {},
+    ),
+}
+KINDS = {"bench": "bench_runs", "microbench": "microbench_runs", "saxpy": "saxpy_runs"}
+# Value for a column a CSV predates (else NULL)
+DEFAULTS = {"bench_runs": BENCH_DEFAULTS, "microbench_runs": {"mode": LEGACY_MODE}}
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE IF NOT EXISTS sources "
+                 "(path TEXT PRIMARY KEY, tbl TEXT, size INTEGER, mtime_ns INTEGER)")
+    for table, (cols, index, _) in SCHEMA.items():
+        coldefs = ", ".join(f'"{c}" {t}' for c, t in cols)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({coldefs}, source TEXT)")
+        # Stores created before a column existed get it added (NULL for the old rows, or the
+        # value those rows were measured with, see DEFAULTS)
+        have = {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+        for c, t in cols:
+            if c not in have:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN "{c}" {t}')
+                if c in DEFAULTS.get(table, {}):
+                    conn.execute(f'UPDATE {table} SET "{c}" = ?', (DEFAULTS[table][c],))
+        idx_cols = ", ".join(f'"{c}"' for c in index)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_cfg ON {table} ({idx_cols})")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_src ON {table} (source)")
+    conn.commit()
+    return conn
+
+
+def read_results_csv(path, table):
+    cols, _, renames = SCHEMA[table]
+    df = read_kv_csv(path).rename(columns=renames)
+    out = pd.DataFrame(index=df.index)
+    defaults = DEFAULTS.get(table, {})
+    for c, t in cols:
+        if c not in df:
+            out[c] = defaults.get(c)
+        elif t == "TEXT":
+            out[c] = df[c].fillna(defaults.get(c, "nan")).astype(str)
+        else:
+            out[c] = pd.to_numeric(df[c], errors="coerce")
+            if c in defaults:
+                out[c] = out[c].fillna(defaults[c])
+    return out
+
+
+def ingest(conn, kind, path):
+    """Load one CSV into the store. Returns the number of rows written (0 if unchanged)."""
+    table = KINDS[kind]
+    path = str(Path(path).resolve())
+    st = os.stat(path)
+    prev = conn.execute("SELECT size, mtime_ns FROM sources WHERE path = ?", (path,)).fetchone()
+    if prev == (st.st_size, st.st_mtime_ns):
+        return 0
+
+    df = read_results_csv(path, table)
+    df["source"] = path
+    with conn:
+        conn.execute(f"DELETE FROM {table} WHERE source = ?", (path,))
+        names = ", ".join(f'"{c}"' for c in df.columns)
+        marks = ", ".join("?" for _ in df.columns)
+        rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+        conn.executemany(f"INSERT INTO {table} ({names}) VALUES ({marks})", rows)
+        conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                     (path, table, st.st_size, st.st_mtime_ns))
+    return len(df)
+
+
+def _where(table, filters):
+    known = {c for c, _ in SCHEMA[table][0]}
+    clauses, params = [], []
+    for col, val in filters.items():
+        if val is None:
+            continue
+        if col not in known:
+            raise ValueError(f"{table} has no column {col!r}")
+        if isinstance(val, (list, tuple, set)):
+            clauses.append(f'"{col}" IN ({", ".join("?" for _ in val)})')
+            params.extend(val)
+        else:
+            clauses.append(f'"{col}" = ?')
+            params.append(val)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def query(conn, table, columns=None, **filters):
+    """Return only the rows of `table` matching filters (scalar -> '=', list -> 'IN')."""
+    known = [c for c, _ in SCHEMA[table][0]]
+    columns = columns or known
+    for c in columns:
+        if c not in known:
+            raise ValueError(f"{table} has no column {c!r}")
+    where, params = _where(table, filters)
+    sel = ", ".join(f'"{c}"' for c in columns)
+    return pd.read_sql_query(f"SELECT {sel} FROM {table}{where}", conn, params=params)
+
+
+def microbench_summary(conn, **filters):
+    """Per-configuration mean/std of time and GiB/s, same columns as microbench_results_avg.csv."""
+    where, params = _where("microbench_runs", filters)
+    sql = (
+        "SELECT N_bytes, stride, repeats, read_pct, threads, mode, "
+        "AVG(time) AS mean_time, "
+        "(SUM(time*time) - SUM(time)*SUM(time)/COUNT(time)) / NULLIF(COUNT(time)-1, 0) AS var_time, "
+        "AVG(gibps) AS mean_bw, "
+        "(SUM(gibps*gibps) - SUM(gibps)*SUM(gibps)/COUNT(gibps)) / NULLIF(COUNT(gibps)-1, 0) AS var_bw, "
+        "COUNT(time) AS count "
+        f"FROM microbench_runs{where} "
+        "GROUP BY N_bytes, stride, repeats, read_pct, threads, mode"
+    )
+    df = pd.read_sql_query(sql, conn, params=params)
+    df["std_time"] = df.pop("var_time").clip(lower=0) ** 0.5
+    df["std_bw"] = df.pop("var_bw").clip(lower=0) ** 0.5
+    return df[["N_bytes", "stride", "repeats", "read_pct", "threads", "mode",
+               "mean_time", "std_time", "mean_bw", "std_bw", "count"]]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ing = sub.add_parser("ingest", help="Load result CSVs into the store")
+    ing.add_argument("kind", choices=sorted(KINDS))
+    ing.add_argument("db")
+    ing.add_argument("paths", nargs="+", help="CSV files or glob patterns")
+    args = ap.parse_args()
+
+    conn = connect(args.db)
+    files = sorted({f for p in args.paths for f in (glob.glob(p) or [p])})
+    total = 0
+    for f in files:
+        n = ingest(conn, args.kind, f)
+        total += n
+        print(f"{f}: {n} rows" if n else f"{f}: unchanged")
+    print(f"Ingested {total} rows into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Bootstrap confidence intervals of the median and a sequential-stopping repeat loop.
+
+repeat_until_stable() keeps asking a configuration for more samples until the
+bootstrap CI of the median is narrower than a target fraction of the median, so
+in-cache sizes stop after a few reps while DRAM-bound or noisy ones get more.
+"""
+import numpy as np
+import pandas as pd
+
+N_BOOT = 2000
+CONF = 0.95
+
+
+def bootstrap_median_ci(samples, conf=CONF, n_boot=N_BOOT, seed=0):
+    """(median, lo, hi) of samples; all resamples are drawn and reduced in one array op."""
+    x = np.asarray(samples, dtype=np.float64)
+    x = x[np.isfinite(x)]
+    if len(x) == 0:
+        return np.nan, np.nan, np.nan
+    med = float(np.median(x))
+    if len(x) == 1:
+        return med, np.nan, np.nan
+    rng = np.random.default_rng(seed)
+    boots = np.median(x[rng.integers(0, len(x), size=(n_boot, len(x)))], axis=1)
+    alpha = (1.0 - conf) / 2.0
+    lo, hi = np.quantile(boots, [alpha, 1.0 - alpha])
+    return med, float(lo), float(hi)
+
+
+def rel_ci_width(med, lo, hi):
+    if not np.isfinite(lo) or not np.isfinite(hi) or med == 0:
+        return np.inf
+    return (hi - lo) / abs(med)
+
+
+def repeat_until_stable(sample, rel_width=0.05, min_reps=3, max_reps=30, conf=CONF, verbose=False):
+    """Call sample() until the median's CI is narrower than rel_width * median.
+
+    sample() returns one value or a list of values (e.g. all reps of one process run);
+    an empty one raises ValueError, as the loop would never reach max_reps.
+    Returns (all raw samples, (median, lo, hi), converged).
+    """
+    values = []
+    while True:
+        new = np.atleast_1d(sample()).tolist()
+        if not new:
+            raise ValueError(f"sample() returned no values after {len(values)} samples")
+        values.extend(new)
+        if len(values) < min_reps:
+            continue
+        ci = bootstrap_median_ci(values, conf)
+        width = rel_ci_width(*ci)
+        if verbose:
+            print(f"    n={len(values)} median={ci[0]:.4g} CI width={width:.1%}")
+        if width <= rel_width:
+            return values, ci, True
+        if len(values) >= max_reps:
+            return values, ci, False
+
+
+def group_median_ci(df, keys, col, conf=CONF):
+    """Per-group median and CI bounds of df[col]: columns median_<col>, ci_lo_<col>, ci_hi_<col>."""
+    rows = []
+    for k, g in df.groupby(keys, sort=True):
+        med, lo, hi = bootstrap_median_ci(g[col].to_numpy(), conf)
+        rows.append((*(k if isinstance(k, tuple) else (k,)), med, lo, hi))
+    names = list(keys) if isinstance(keys, (list, tuple)) else [keys]
+    return pd.DataFrame(rows, columns=names + [f"median_{col}", f"ci_lo_{col}", f"ci_hi_{col}"])
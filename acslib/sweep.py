@@ -0,0 +1,140 @@
+"""Adaptive working-set sweeps: measure a coarse log-spaced grid, then bisect only
+where the metric (GFLOP/s, GiB/s, ...) changes sharply between neighbours.
+
+Flat regions (inside one cache level) keep their coarse spacing; each L1/L2/LLC/DRAM
+transition is refined until its interval is narrower than min_ratio, so knees are
+located to a few percent of N with far fewer runs than a dense grid.
+
+step_fit splits a finished curve (e.g. load latency vs working set) into plateaus,
+one per cache level, choosing the number of levels by BIC.
+"""
+import heapq
+import math
+
+
+def log_grid(lo, hi, points, align=1):
+    """points log-spaced sizes from lo to hi (inclusive), rounded to multiples of align."""
+    if points < 2 or hi <= lo:
+        return [align_to(lo, align)]
+    step = (math.log(hi) - math.log(lo)) / (points - 1)
+    return sorted({align_to(math.exp(math.log(lo) + i * step), align) for i in range(points)})
+
+
+def align_to(n, align):
+    return max(align, int(round(n / align)) * align)
+
+
+def _jump(m1, m2):
+    if m1 <= 0 or m2 <= 0:
+        return math.inf if m1 != m2 else 0.0
+    return abs(math.log(m2 / m1))
+
+
+def adaptive_sweep(measure, lo, hi, coarse=8, rel_change=0.10, min_ratio=1.06,
+                   max_points=64, align=1, verbose=False):
+    """Return sorted [(N, metric)] with extra points only around sharp changes.
+
+    measure(N) -> float is called once per size. An interval [a, b] is bisected at the
+    geometric midpoint while metric changes by more than rel_change across it and
+    b/a > min_ratio; the steepest interval is refined first, until max_points runs.
+    """
+    results = {}
+
+    def run(n):
+        results[n] = float(measure(n))
+        if verbose:
+            print(f"  N={n}: {results[n]:.4g}")
+        return results[n]
+
+    for n in log_grid(lo, hi, coarse, align):
+        run(n)
+
+    thresh = math.log1p(rel_change)
+    heap = []
+
+    def push(a, b):
+        j = _jump(results[a], results[b])
+        if j > thresh and b / a > min_ratio:
+            heapq.heappush(heap, (-j, a, b))
+
+    ns = sorted(results)
+    for a, b in zip(ns, ns[1:]):
+        push(a, b)
+    while heap and len(results) < max_points:
+        _, a, b = heapq.heappop(heap)
+        mid = align_to(math.sqrt(a * b), align)
+        if mid <= a or mid >= b:
+            continue  # can't split further at this alignment
+        run(mid)
+        push(a, mid)
+        push(mid, b)
+    return sorted(results.items())
+
+
+def find_knees(points, rel_change=0.10):
+    """Group consecutive steep intervals into knees.
+
+    Returns [(N_before, N_after, metric_before, metric_after)], one per transition,
+    spanning the run of adjacent intervals whose metric changes by more than rel_change.
+    """
+    thresh = math.log1p(rel_change)
+    knees, cur = [], None
+    for (a, ma), (b, mb) in zip(points, points[1:]):
+        if _jump(ma, mb) > thresh:
+            if cur and cur[1] == a and (mb - ma) * (cur[3] - cur[2]) > 0:
+                cur = (cur[0], b, cur[2], mb)
+            else:
+                if cur:
+                    knees.append(cur)
+                cur = (a, b, ma, mb)
+        elif cur:
+            knees.append(cur)
+            cur = None
+    if cur:
+        knees.append(cur)
+    return knees
+
+
+def _segment_costs(ys):
+    """cost[i][j] = squared error of ys[i:j] around its mean (j > i)."""
+    n = len(ys)
+    s1, s2 = [0.0], [0.0]
+    for y in ys:
+        s1.append(s1[-1] + y)
+        s2.append(s2[-1] + y * y)
+    return lambda i, j: max(0.0, (s2[j] - s2[i]) - (s1[j] - s1[i]) ** 2 / (j - i))
+
+
+def step_fit(ys, max_segments=6, min_len=2):
+    """Best piecewise-constant fit of ys (in order), as [(start, end)] index ranges.
+
+    For each k up to max_segments the optimal split into k runs of at least min_len
+    points is found by dynamic programming over segment costs; k is then chosen by
+    BIC (k means and k-1 change points), so flat curves stay one segment.
+    """
+    n = len(ys)
+    cost = _segment_costs(ys)
+    inf = float("inf")
+    kmax = max(1, min(max_segments, n // min_len))
+    # best[k][j]: cost of ys[:j] in k segments; back[k][j]: start of the last one
+    best = [[inf] * (n + 1) for _ in range(kmax + 1)]
+    back = [[0] * (n + 1) for _ in range(kmax + 1)]
+    best[0][0] = 0.0
+    for k in range(1, kmax + 1):
+        for j in range(k * min_len, n + 1):
+            for i in range((k - 1) * min_len, j - min_len + 1):
+                c = best[k - 1][i] + cost(i, j)
+                if c < best[k][j]:
+                    best[k][j], back[k][j] = c, i
+
+    floor = 1e-12 * max(1.0, sum(y * y for y in ys) / max(n, 1))
+    def bic(k):
+        return n * math.log(max(best[k][n], floor) / n) + (2 * k - 1) * math.log(n)
+    k = min((k for k in range(1, kmax + 1) if best[k][n] < inf), key=bic)
+
+    segs, j = [], n
+    for kk in range(k, 0, -1):
+        i = back[kk][j]
+        segs.append((i, j))
+        j = i
+    return segs[::-1]
@@ -0,0 +1,104 @@
+"""Rebuild the report tables and figures of all three projects from their raw results,
+running only the scripts whose inputs, options or code changed (acslib/pipeline.py):
+
+    python3 pipeline.py                   # build everything that is stale
+    python3 pipeline.py -n                # list what would run, and why
+    python3 pipeline.py -j 4              # independent scripts in parallel
+    python3 pipeline.py --only fio qd-sweep --force fio
+    python3 pipeline.py --fio-results ~/fio/results
+
+Each script runs in its project directory with its default paths, as acsbench.py
+runs it. A new fio JSON reruns analyze_fio.py (whose .fio_cache parses only that
+file) and the qd-sweep/rwmix node of that file, nothing else.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from acsbench import COMMANDS, ROOT
+from acslib.pipeline import build, dependencies
+
+STATE = ROOT / ".pipeline_state.json"
+
+
+def node(command, args=(), inputs=(), outputs=(), stdout=None, name=None):
+    project, module, _ = COMMANDS[command]
+    return {"name": name or command, "cwd": str(ROOT / project), "cmd": [f"{module}.py", *args],
+            "inputs": list(inputs), "outputs": list(outputs), "stdout": stdout}
+
+
+def graph(fio_results="results"):
+    nodes = [
+        node("plots", ["results/default_results.csv"], ["results/default_results.csv"], ["plots"]),
+        node("average", [], ["results/csv/microbench_results_run*.csv"],
+             ["results/csv/microbench_results_avg.csv"]),
+        node("microbench", [], ["results/csv/microbench_results_avg.csv"], ["figures"]),
+        node("part6", [], ["part6_data.csv"],
+             ["part6_throughput_vs_ws.png", "part6_latency_vs_stride.png", "part6_llc_misses_per_access.png"]),
+        node("part7", [], ["part6_data.csv"],
+             ["part7_throughput_vs_stride.png", "part7_latency_vs_stride.png", "part7_dtlb_misses_per_access.png"]),
+        node("fio", [fio_results], [f"{fio_results}/*.json"],
+             [f"{t}_table.{ext}" for t in ("baseline", "sweep") for ext in ("csv", "md")] +
+             ["baseline_bandwidth.png", "baseline_iops.png", "sweep_bandwidth.png", "sweep_latency.png"]),
+    ]
+    # One node per sweep file, so a new or changed JSON only redraws its own figure
+    res = Path(ROOT / COMMANDS["fio"][0], fio_results)
+    for command, prefix, suffixes in (("qd-sweep", "qd_sweep", [".tradeoff.png"]),
+                                      ("rwmix", "rwmix", [".throughput.png", ".latency.png"])):
+        for js in sorted(res.glob(f"{prefix}*.json")):
+            rel = str(Path(fio_results, js.name))
+            stem = str(Path(fio_results, js.stem))
+            nodes.append(node(command, [rel], [rel], [stem + s for s in suffixes], stdout=stem + ".md",
+                              name=f"{command}:{js.stem}"))
+    return nodes
+
+
+def select(nodes, only):
+    """The named nodes (a name, or the part before ':') and everything upstream of them."""
+    deps = dependencies(nodes)
+    keep = [n["name"] for n in nodes if n["name"] in only or n["name"].split(":")[0] in only]
+    todo = list(keep)
+    while todo:
+        for d in deps[todo.pop()]:
+            if d not in keep:
+                keep.append(d)
+                todo.append(d)
+    return [n for n in nodes if n["name"] in keep]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Incremental rebuild of every report table and figure",
+                                 epilog="nodes: " + ", ".join(["plots", "average", "microbench", "part6", "part7",
+                                                               "fio", "qd-sweep[:<file>]", "rwmix[:<file>]"]))
+    ap.add_argument("--only", nargs="+", metavar="NODE", help="Build only these nodes (and what they need)")
+    ap.add_argument("--force", nargs="+", default=[], metavar="NODE", help="Rerun these nodes even if up to date")
+    ap.add_argument("-n", "--dry-run", action="store_true", help="Only report which nodes are stale and why")
+    ap.add_argument("-j", "--jobs", type=int, default=1, help="Nodes run in parallel")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Also list fresh nodes and print script output")
+    ap.add_argument("--fio-results", default="results", help="fio JSON directory, relative to Project 3")
+    ap.add_argument("--state", default=str(STATE), help="Where node keys and file hashes are kept")
+    ap.add_argument("--list", action="store_true", help="Print the nodes with their inputs and dependencies")
+    args = ap.parse_args(argv)
+
+    nodes = graph(args.fio_results)
+    if args.only:
+        nodes = select(nodes, args.only)
+    if args.list:
+        deps = dependencies(nodes)
+        for n in nodes:
+            after = f"  (after {', '.join(deps[n['name']])})" if deps[n["name"]] else ""
+            print(f"{n['name']:<28} {Path(n['cwd']).name}: {' '.join(n['cmd'])}{after}")
+            print(f"{'':<28} <- {' '.join(n['inputs'])}")
+        return 0
+
+    force = {n["name"] for n in nodes if n["name"] in args.force or n["name"].split(":")[0] in args.force}
+    status = build(nodes, args.state, jobs=args.jobs, dry_run=args.dry_run, force=force, verbose=args.verbose)
+    counts = {}
+    for s in status.values():
+        counts[s] = counts.get(s, 0) + 1
+    print(", ".join(f"{v} {k}" for k, v in sorted(counts.items())))
+    return 1 if counts.get("failed") or counts.get("blocked") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())